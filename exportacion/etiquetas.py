@@ -0,0 +1,254 @@
+# exportacion/etiquetas.py
+"""
+Hojas de etiquetas adhesivas (tipo Avery) con el código QR o de barras del
+serial de cada elemento, listas para pegar en los equipos y para leerlas con
+el escáner en las auditorías físicas (inventario/auditoria.py).
+
+Para que miles de etiquetas salgan en segundos:
+
+- El código de cada etiqueta (lo caro: codificar el QR) se traduce una sola
+  vez a operadores PDF, directamente desde la matriz del codificador y sin
+  pasar por las formas de reportlab, y se guarda en una caché LRU en memoria
+  (settings.ETIQUETAS_MAX_DIBUJOS dibujos por proceso) con clave serial +
+  fecha_actualizacion: reimprimir un equipo que no cambió no lo vuelve a
+  codificar. Cada etiqueta se dibuja con un solo drawPath.
+- Los elementos se leen con .iterator() y solo los campos que se imprimen.
+- El PDF se escribe en un SpooledTemporaryFile: en memoria mientras es
+  pequeño y en disco a partir de TAMANO_EN_MEMORIA.
+
+Uso:
+    from exportacion.etiquetas import generar_etiquetas, exportar_a_etiquetas
+
+    archivo, total = generar_etiquetas(Elemento.objects.all(), hoja='5160')
+    response = exportar_a_etiquetas(elementos, hoja='L7160', codigo='barras')
+"""
+import threading
+from collections import OrderedDict, namedtuple
+from itertools import groupby
+from tempfile import SpooledTemporaryFile
+
+from reportlab.graphics.barcode import qrencoder
+from reportlab.graphics.barcode.code128 import Code128
+from reportlab.lib.pagesizes import A4, letter
+from reportlab.lib.units import inch, mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from reportlab.pdfgen.pathobject import PDFPathObject
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import FileResponse
+from django.utils import timezone
+
+# Formato de hoja: medidas de la etiqueta y de su grilla en la página
+Hoja = namedtuple('Hoja', 'nombre pagina columnas filas ancho alto margen_izquierdo margen_superior paso_x paso_y')
+
+HOJAS = {
+    '5160': Hoja('Avery 5160 (Carta, 30 por hoja)', letter, 3, 10,
+                 2.625 * inch, 1 * inch, 0.1875 * inch, 0.5 * inch, 2.75 * inch, 1 * inch),
+    'L7160': Hoja('Avery L7160 (A4, 21 por hoja)', A4, 3, 7,
+                  63.5 * mm, 38.1 * mm, 7.2 * mm, 15.15 * mm, 66.04 * mm, 38.1 * mm),
+}
+CODIGOS = {'qr': 'Código QR', 'barras': 'Código de barras (Code 128)'}
+
+# Etiqueta ya preparada: trazo del código (en módulos), su posición y escala
+# dentro de la etiqueta (x, y, escala_x, escala_y) y las líneas de texto
+Dibujo = namedtuple('Dibujo', 'trazo ubicacion textos')
+
+CAMPOS_ETIQUETA = ('pk', 'serial', 'marca', 'modelo', 'localizacion', 'fecha_actualizacion')
+TAMANO_EN_MEMORIA = 5 * 1024 * 1024
+TAMANO_BLOQUE = 500
+MASCARA_QR = 0
+ANCHO_BARRA = 0.54  # Ancho máximo de un módulo Code 128 (pt), el de reportlab
+MARGEN = 0.08 * inch
+FUENTE = 'Helvetica'
+FUENTE_SERIAL = 'Helvetica-Bold'
+
+_dibujos = OrderedDict()
+_candado = threading.Lock()  # La generación puede correr en varios hilos (vistas asíncronas)
+
+
+# ==============================================================================
+# 1. Dibujo de una etiqueta (con caché)
+# ==============================================================================
+
+class Trazo(PDFPathObject):
+    """
+    Trazo ya convertido a operadores PDF, con coordenadas enteras (en módulos
+    del código; la escala se aplica al dibujarlo). En la caché ocupa una sola
+    cadena, y dibujarlo de nuevo es solo copiarla al contenido de la página.
+    """
+    def __init__(self, codigo):
+        super().__init__()
+        self.codigo = codigo
+
+    def getCode(self):
+        return self.codigo
+
+
+def _trazo_qr(texto):
+    """
+    Módulos oscuros del QR como rectángulos (uno por tramo horizontal), en
+    unidades de módulo con el origen abajo a la izquierda. Devuelve (trazo, módulos por lado).
+    """
+    qr = qrencoder.QRCode(None, qrencoder.QRErrorCorrectLevel.M)
+    qr.addData(texto)
+    # Máscara fija: QRCode.make() prueba las 8 y elige la de menor penalización,
+    # lo que cuesta ~15 veces más. Los lectores aceptan cualquiera.
+    qr.version = qr.calculate_version()
+    qr.makeImpl(False, MASCARA_QR)
+    lado = qr.getModuleCount()
+    rectangulos = []
+    for fila, modulos in enumerate(qr.modules):
+        columna = 0
+        for oscuro, tramo in groupby(modulos, bool):
+            largo = len(list(tramo))
+            if oscuro:
+                rectangulos.append(f'{columna} {lado - fila - 1} {largo} 1 re')
+            columna += largo
+    return Trazo(' '.join(rectangulos)), lado
+
+
+def _trazo_barras(texto):
+    """Barras Code 128 del texto en unidades de módulo y alto 1. Devuelve (trazo, módulos de ancho)."""
+    barras = Code128(texto, quiet=False)
+    barras.validate()
+    barras.encode()
+    barras.decompose()
+    # 'decomposed' alterna barras (mayúsculas) y espacios (minúsculas); la letra es el ancho en módulos
+    rectangulos, x = [], 0
+    for c in barras.decomposed:
+        largo = ord(c.lower()) - ord('a') + 1
+        if c.isupper():
+            rectangulos.append(f'{x} 0 {largo} 1 re')
+        x += largo
+    return Trazo(' '.join(rectangulos)), x
+
+
+def _recortar(texto, fuente, tamano, ancho):
+    """Texto recortado con '…' para que quepa en el ancho dado."""
+    texto = texto or ''
+    if stringWidth(texto, fuente, tamano) <= ancho:
+        return texto
+    while texto and stringWidth(texto + '…', fuente, tamano) > ancho:
+        texto = texto[:-1]
+    return texto + '…'
+
+
+def _dibujar(elemento, hoja, codigo):
+    ancho, alto = hoja.ancho - 2 * MARGEN, hoja.alto - 2 * MARGEN
+    lineas = [
+        (FUENTE_SERIAL, 8, elemento.serial),
+        (FUENTE, 7, f'{elemento.marca} {elemento.modelo}'),
+        (FUENTE, 6, elemento.localizacion),
+    ]
+
+    if codigo == 'qr':
+        # QR cuadrado a la izquierda y los textos a su derecha
+        trazo, modulos = _trazo_qr(elemento.serial)
+        x_codigo, y_codigo, escala_x, escala_y = MARGEN, MARGEN, alto / modulos, alto / modulos
+        x, ancho_texto, y = 2 * MARGEN + alto, ancho - alto - MARGEN, hoja.alto - MARGEN - 8
+    else:
+        # Código de barras arriba, a todo el ancho (se angosta si no cabe), y los textos debajo
+        trazo, modulos = _trazo_barras(elemento.serial)
+        x_codigo, y_codigo = MARGEN, hoja.alto - MARGEN - alto / 2
+        escala_x, escala_y = min(ANCHO_BARRA, ancho / modulos), alto / 2
+        x, ancho_texto, y = MARGEN, ancho, y_codigo - 10
+
+    textos = []
+    for fuente, tamano, texto in lineas:
+        textos.append((x, y, fuente, tamano, _recortar(texto, fuente, tamano, ancho_texto)))
+        y -= tamano + 2
+    return Dibujo(trazo, (x_codigo, y_codigo, escala_x, escala_y), textos)
+
+
+def dibujo_etiqueta(elemento, hoja, codigo):
+    """Dibujo de la etiqueta del elemento, reutilizado mientras no cambie (LRU)."""
+    clave = (elemento.serial, elemento.fecha_actualizacion, hoja.nombre, codigo)
+    with _candado:
+        dibujo = _dibujos.get(clave)
+        if dibujo is not None:
+            _dibujos.move_to_end(clave)
+            return dibujo
+    dibujo = _dibujar(elemento, hoja, codigo)
+    with _candado:
+        _dibujos[clave] = dibujo
+        # Una LRU recorrida en orden con más elementos que su tamaño nunca acierta:
+        # ver ETIQUETAS_MAX_DIBUJOS en settings
+        while len(_dibujos) > settings.ETIQUETAS_MAX_DIBUJOS:
+            _dibujos.popitem(last=False)
+    return dibujo
+
+
+# ==============================================================================
+# 2. Hojas de etiquetas
+# ==============================================================================
+
+def _elementos_con_serial(elementos):
+    """Solo los elementos con serial (los que manejan cantidad no llevan etiqueta)."""
+    if isinstance(elementos, QuerySet):
+        # Agrupadas por localización para pegarlas recorriendo cada sala
+        return (
+            elementos.filter(maneja_cantidad=False).exclude(serial=None)
+            .order_by('localizacion', 'serial').only(*CAMPOS_ETIQUETA)
+            .iterator(chunk_size=TAMANO_BLOQUE)
+        )
+    return sorted(
+        (elemento for elemento in elementos if elemento.serial),
+        key=lambda elemento: (elemento.localizacion, elemento.serial),
+    )
+
+
+def generar_etiquetas(elementos, hoja='5160', codigo='qr', destino=None):
+    """
+    Escribe el PDF de etiquetas en 'destino' (archivo binario abierto) o en un
+    SpooledTemporaryFile nuevo. Devuelve (archivo, total de etiquetas) con el
+    archivo posicionado al inicio.
+    """
+    if hoja not in HOJAS:
+        raise ValueError(f'Hoja de etiquetas desconocida: {hoja}')
+    if codigo not in CODIGOS:
+        raise ValueError(f'Tipo de código desconocido: {codigo}')
+    hoja = HOJAS[hoja]
+    archivo = destino if destino is not None else SpooledTemporaryFile(max_size=TAMANO_EN_MEMORIA)
+
+    pdf = canvas.Canvas(archivo, pagesize=hoja.pagina, pageCompression=1)
+    pdf.setTitle('Etiquetas de inventario')
+    _, alto_pagina = hoja.pagina
+    por_hoja = hoja.columnas * hoja.filas
+
+    total = 0
+    for elemento in _elementos_con_serial(elementos):
+        posicion = total % por_hoja
+        if total and not posicion:
+            pdf.showPage()
+        fila, columna = divmod(posicion, hoja.columnas)
+        dibujo = dibujo_etiqueta(elemento, hoja, codigo)
+
+        pdf.saveState()
+        pdf.translate(
+            hoja.margen_izquierdo + columna * hoja.paso_x,
+            alto_pagina - hoja.margen_superior - fila * hoja.paso_y - hoja.alto,
+        )
+        for x, y, fuente, tamano, texto in dibujo.textos:
+            pdf.setFont(fuente, tamano)
+            pdf.drawString(x, y, texto)
+        x, y, escala_x, escala_y = dibujo.ubicacion
+        pdf.transform(escala_x, 0, 0, escala_y, x, y)
+        pdf.drawPath(dibujo.trazo, stroke=0, fill=1)
+        pdf.restoreState()
+        total += 1
+
+    pdf.save()
+    archivo.seek(0)
+    return archivo, total
+
+
+def exportar_a_etiquetas(elementos, hoja='5160', codigo='qr'):
+    """
+    Devuelve un FileResponse con la hoja de etiquetas en PDF (se envía desde
+    el archivo temporal, sin copiarlo a memoria).
+    """
+    archivo, _ = generar_etiquetas(elementos, hoja=hoja, codigo=codigo)
+    nombre_archivo = f"Etiquetas_Inventario_{timezone.now().strftime('%Y%m%d_%H%M')}.pdf"
+    return FileResponse(archivo, as_attachment=True, filename=nombre_archivo, content_type='application/pdf')
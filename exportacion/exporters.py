@@ -1,15 +1,16 @@
 # exportacion/exporters.py
-import openpyxl
+import json
 from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
 
-from django.http import HttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 
+
+def con_relaciones(elementos):
+    """Carga tipo, estado y usuario en la misma consulta (evita una consulta por fila)."""
+    return elementos.select_related('tipo_dispositivo', 'estado', 'usuario_registro')
+
 # ==============================================================================
 # 1. Exportación a Excel (usando openpyxl)
 # ==============================================================================
@@ -19,6 +20,9 @@ def exportar_a_excel(elementos):
     Genera un archivo Excel (.xlsx) con los datos del inventario.
     Devuelve un objeto HttpResponse con el archivo adjunto.
     """
+    # openpyxl se importa al exportar, no al arrancar el worker (ver motores.py)
+    import openpyxl
+
     # 1. Crear un libro de trabajo y una hoja de cálculo
     wb = openpyxl.Workbook()
     ws = wb.active
@@ -37,7 +41,7 @@ def exportar_a_excel(elementos):
         cell.font = header_font
 
     # 3. Llenar los datos de los elementos
-    for elemento in elementos:
+    for elemento in con_relaciones(elementos):
         fila = [
             elemento.serial,
             elemento.tipo_dispositivo.nombre if elemento.tipo_dispositivo else "N/A",
@@ -89,6 +93,12 @@ def exportar_a_pdf(elementos):
     Genera un archivo PDF con la lista resumida del inventario.
     Devuelve un objeto HttpResponse con el archivo adjunto.
     """
+    # reportlab se importa al exportar, no al arrancar el worker (ver motores.py)
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
     # 1. Preparar el buffer y el documento
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
@@ -105,7 +115,7 @@ def exportar_a_pdf(elementos):
     data = [
         ['Serial', 'Tipo', 'Marca', 'Modelo', 'Ubicación', 'Estado']
     ]
-    for elemento in elementos:
+    for elemento in con_relaciones(elementos):
         data.append([
             elemento.serial,
             elemento.tipo_dispositivo.nombre if elemento.tipo_dispositivo else "N/A",
@@ -141,4 +151,78 @@ def exportar_a_pdf(elementos):
     nombre_archivo = f"Inventario_Exportado_{timezone.now().strftime('%Y%m%d_%H%M')}.pdf"
     response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
     
-    return response
\ No newline at end of file
+    return response
+
+
+# ==============================================================================
+# 3. Exportación a JSON (en streaming)
+# ==============================================================================
+
+# Cantidad de elementos que se serializan juntos antes de enviar un bloque
+TAMANO_BLOQUE_JSON = 200
+
+
+def elemento_a_dict(elemento):
+    """Representación plana de un elemento para la exportación JSON."""
+    return {
+        'id': elemento.pk,
+        'serial': elemento.serial,
+        'maneja_cantidad': elemento.maneja_cantidad,
+        'cantidad': elemento.cantidad,
+        'tipo': elemento.tipo_dispositivo.nombre if elemento.tipo_dispositivo else None,
+        'marca': elemento.marca,
+        'modelo': elemento.modelo,
+        'localizacion': elemento.localizacion,
+        'estado': elemento.estado.nombre if elemento.estado else None,
+        'fecha_adquisicion': elemento.fecha_adquisicion,
+        'precio': elemento.precio,
+        'registrado_por': elemento.usuario_registro.email if elemento.usuario_registro else None,
+        'descripcion': elemento.descripcion,
+        'fecha_actualizacion': elemento.fecha_actualizacion,
+    }
+
+
+def _bloque_json(lote, primero):
+    datos = ','.join(json.dumps(elemento_a_dict(e), cls=DjangoJSONEncoder, ensure_ascii=False) for e in lote)
+    return datos if primero else ',' + datos
+
+
+def iterar_json(elementos):
+    """Genera el arreglo JSON por bloques sin cargar todo el inventario en memoria."""
+    yield '['
+    lote, primero = [], True
+    for elemento in con_relaciones(elementos).iterator(chunk_size=TAMANO_BLOQUE_JSON):
+        lote.append(elemento)
+        if len(lote) == TAMANO_BLOQUE_JSON:
+            yield _bloque_json(lote, primero)
+            lote, primero = [], False
+    if lote:
+        yield _bloque_json(lote, primero)
+    yield ']'
+
+
+async def aiterar_json(elementos):
+    """Versión asíncrona de iterar_json (para el modo ASGI)."""
+    yield '['
+    lote, primero = [], True
+    async for elemento in con_relaciones(elementos).aiterator(chunk_size=TAMANO_BLOQUE_JSON):
+        lote.append(elemento)
+        if len(lote) == TAMANO_BLOQUE_JSON:
+            yield _bloque_json(lote, primero)
+            lote, primero = [], False
+    if lote:
+        yield _bloque_json(lote, primero)
+    yield ']'
+
+
+def exportar_a_json(elementos, asincrono=False):
+    """
+    Devuelve un StreamingHttpResponse con el inventario en formato JSON.
+    Con asincrono=True el contenido se genera con el ORM asíncrono.
+    """
+    contenido = aiterar_json(elementos) if asincrono else iterar_json(elementos)
+    response = StreamingHttpResponse(contenido, content_type='application/json; charset=utf-8')
+    nombre_archivo = f"Inventario_Exportado_{timezone.now().strftime('%Y%m%d_%H%M')}.json"
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+
+    return response
@@ -0,0 +1,45 @@
+# exportacion/management/commands/generar_etiquetas.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exportacion.etiquetas import CODIGOS, HOJAS, generar_etiquetas
+from inventario.models import Elemento
+from inventario.ubicaciones import filtrar_subarbol
+
+
+class Command(BaseCommand):
+    """
+    Genera el PDF de etiquetas sin pasar por el navegador (ej. para imprimir
+    las de una sede entera o programarlo con cron):
+
+        python manage.py generar_etiquetas etiquetas.pdf --ubicacion "Sede Norte"
+        python manage.py generar_etiquetas etiquetas.pdf --hoja L7160 --codigo barras
+    """
+    help = 'Genera hojas de etiquetas (QR o código de barras) de los elementos con serial.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('salida', help='Ruta del PDF a generar.')
+        parser.add_argument('--ubicacion', help='Solo esta localización y las que cuelgan de ella (nombre o ruta).')
+        parser.add_argument('--hoja', choices=sorted(HOJAS), default='5160', help='Formato de la hoja (predeterminado: 5160).')
+        parser.add_argument('--codigo', choices=sorted(CODIGOS), default='qr', help='Tipo de código (predeterminado: qr).')
+
+    def handle(self, *args, **options):
+        elementos = Elemento.objects.all()
+        if options['ubicacion']:
+            elementos = filtrar_subarbol(elementos, options['ubicacion'])
+
+        inicio = time.perf_counter()
+        try:
+            with open(options['salida'], 'wb') as destino:
+                _, total = generar_etiquetas(elementos, hoja=options['hoja'], codigo=options['codigo'], destino=destino)
+        except OSError as error:
+            raise CommandError(f'No se pudo escribir {options["salida"]}: {error}')
+
+        if not total:
+            self.stdout.write(self.style.WARNING('No hay elementos con serial para etiquetar.'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} etiquetas ({HOJAS[options["hoja"]].nombre}) en {options["salida"]} '
+            f'({time.perf_counter() - inicio:.1f} s).'
+        ))
@@ -0,0 +1,34 @@
+# exportacion/motores.py
+"""
+Registro de los motores de exportación.
+
+openpyxl y reportlab (sobre todo reportlab.platypus) tardan más en importarse
+que el resto de la aplicación, y la mayoría de las peticiones no exporta nada.
+Las vistas no importan los motores: los piden por formato a motor(), que los
+importa la primera vez que se usan en el proceso. Así arrancar un worker no
+paga esas librerías (ver el comando 'tiempo_arranque').
+
+Uso:
+    from exportacion.motores import motor
+
+    response = motor('excel')(elementos)
+"""
+from functools import cache
+
+from django.utils.module_loading import import_string
+
+MOTORES = {
+    'excel': 'exportacion.exporters.exportar_a_excel',
+    'pdf': 'exportacion.exporters.exportar_a_pdf',
+    'json': 'exportacion.exporters.exportar_a_json',
+    'etiquetas': 'exportacion.etiquetas.exportar_a_etiquetas',
+}
+
+
+@cache
+def motor(formato):
+    """Función que exporta en el formato dado (se importa al primer uso)."""
+    if formato not in MOTORES:
+        raise ValueError(f'Formato de exportación desconocido: {formato}')
+    return import_string(MOTORES[formato])
+
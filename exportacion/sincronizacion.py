@@ -0,0 +1,145 @@
+# exportacion/sincronizacion.py
+"""
+Sincronización incremental para clientes con copia local (lectores de mano,
+clientes sin conexión).
+
+El cliente guarda un cursor opaco y en cada sincronización pide los cambios
+posteriores a él, página por página, hasta recibir "mas": false:
+
+    GET /exportacion/sincronizar/                  -> copia completa (primera vez)
+    GET /exportacion/sincronizar/?cursor=<cursor>  -> solo lo que cambió desde entonces
+
+Los elementos tienen el mismo formato que la exportación JSON y la respuesta
+va comprimida con gzip (si el cliente lo acepta).
+
+El cursor guarda dos posiciones, cada una recorrida por su propio índice:
+
+- elementos modificados o creados: (fecha_actualizacion, id), índice elemento_sync_idx;
+- eliminados ("lápidas"): las filas de eliminación y de archivado del
+  historial, (fecha, elemento_id), índice parcial historial_eliminacion_idx.
+  Un elemento restaurado del archivo vuelve como modificado, con una
+  fecha_actualizacion posterior a la de su lápida. Como las dos listas avanzan
+  por separado, el elemento puede llegar antes que su lápida (en la misma
+  página o en una anterior): las lápidas de elementos que volvieron después
+  no se entregan, y el cliente puede aplicar ambas listas en cualquier orden.
+
+Solo se entregan cambios con más de MARGEN de antigüedad: un guardado toma
+su fecha_actualizacion antes del COMMIT, y sin el margen una transacción
+lenta podría confirmarse con una fecha que el cliente ya dejó atrás. Por lo
+mismo se lee siempre de la base principal (no está en REPLICA_VISTAS): una
+réplica con más atraso que MARGEN haría avanzar el cursor sobre cambios que
+todavía no tiene.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.db.models import Q
+from django.utils import timezone
+
+from inventario.models import Elemento, HistorialElemento
+
+from .exporters import con_relaciones, elemento_a_dict
+
+MARGEN = datetime.timedelta(seconds=5)
+TAMANO_PAGINA = 500
+TAMANO_PAGINA_MAX = 2000
+
+# Acciones del historial con las que un elemento sale del inventario activo
+ACCIONES_BAJA = (HistorialElemento.Accion.ELIMINACION, HistorialElemento.Accion.ARCHIVADO)
+
+# Posición inicial de los elementos (antes de cualquier fecha)
+INICIO = (datetime.datetime.min.replace(tzinfo=datetime.timezone.utc), 0)
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+# ==============================================================================
+# 1. Cursor
+# ==============================================================================
+
+def codificar_cursor(elementos, eliminados):
+    datos = [elementos[0].isoformat(), elementos[1], eliminados[0].isoformat(), eliminados[1]]
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Cursor -> ((fecha, id) de elementos, (fecha, elemento_id) de eliminados)."""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        fecha_e, pk, fecha_b, elemento_id = json.loads(texto)
+        return (
+            (datetime.datetime.fromisoformat(fecha_e), int(pk)),
+            (datetime.datetime.fromisoformat(fecha_b), int(elemento_id)),
+        )
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError) as error:
+        raise CursorInvalido('Cursor de sincronización inválido.') from error
+
+
+def _despues_de(campo_fecha, campo_id, posicion):
+    """(campo_fecha, campo_id) > posicion, escrito para que use el índice compuesto."""
+    fecha, pk = posicion
+    return Q(**{f'{campo_fecha}__gt': fecha}) | Q(**{campo_fecha: fecha, f'{campo_id}__gt': pk})
+
+
+# ==============================================================================
+# 2. Página de cambios
+# ==============================================================================
+
+def _sin_restaurados(eliminados):
+    """Quita las lápidas de elementos que volvieron al inventario después (restaurados del archivo)."""
+    actuales = dict(
+        Elemento.objects.filter(pk__in={elemento_id for _, elemento_id in eliminados})
+        .order_by()
+        .values_list('pk', 'fecha_actualizacion')
+    )
+    return [
+        (fecha, elemento_id) for fecha, elemento_id in eliminados
+        if elemento_id not in actuales or actuales[elemento_id] <= fecha
+    ]
+
+
+def pagina_cambios(cursor=None, limite=TAMANO_PAGINA):
+    """
+    Cambios posteriores al cursor (None = copia completa). Devuelve el
+    diccionario de la respuesta: elementos, eliminados, cursor siguiente y
+    si quedan más páginas.
+    """
+    limite = max(1, min(limite, TAMANO_PAGINA_MAX))
+    hasta = timezone.now() - MARGEN
+
+    if cursor:
+        pos_elementos, pos_eliminados = decodificar_cursor(cursor)
+    else:
+        # Copia completa: de los eliminados solo interesa lo que ocurra desde ahora
+        pos_elementos, pos_eliminados = INICIO, (hasta, 0)
+
+    elementos = list(
+        con_relaciones(Elemento.objects.all())
+        .filter(_despues_de('fecha_actualizacion', 'pk', pos_elementos), fecha_actualizacion__lt=hasta)
+        .order_by('fecha_actualizacion', 'pk')[:limite]
+    )
+    eliminados = list(
+        HistorialElemento.objects
+        .filter(_despues_de('fecha', 'elemento_id', pos_eliminados), accion__in=ACCIONES_BAJA, fecha__lt=hasta)
+        .order_by('fecha', 'elemento_id')
+        .values_list('fecha', 'elemento_id')
+        .distinct()[:limite]
+    )
+
+    mas = len(elementos) == limite or len(eliminados) == limite
+    if elementos:
+        pos_elementos = (elementos[-1].fecha_actualizacion, elementos[-1].pk)
+    if eliminados:
+        pos_eliminados = eliminados[-1]
+        eliminados = _sin_restaurados(eliminados)
+
+    return {
+        'elementos': [elemento_a_dict(elemento) for elemento in elementos],
+        'eliminados': [{'id': elemento_id, 'fecha': fecha} for fecha, elemento_id in eliminados],
+        'cursor': codificar_cursor(pos_elementos, pos_eliminados),
+        'mas': mas,
+    }
@@ -1,3 +1,200 @@
-from django.test import TestCase
+# exportacion/tests.py
+import datetime
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from inventario.archivo import archivar_lote, restaurar
+from inventario.models import Elemento
+from inventario.signals import version_catalogos, version_datos
+from . import etiquetas
+from inventario.testing import PresupuestoConsultasMixin, crear_inventario, modo_asgi
+from usuarios.models import Usuario
+
+
+class PresupuestoConsultasExportacionTests(PresupuestoConsultasMixin, TestCase):
+    """Las exportaciones deben hacer las mismas consultas con 3 o con 40 elementos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario_inventario = Usuario.objects.create_user(
+            'usuario@prueba.co', 'clave-prueba', nombre='Ana', apellido='Gómez', is_approved=True,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.usuario_inventario)
+
+    def test_exportar_excel(self):
+        self.assertPresupuestoConsultas('exportacion:exportar_excel')
+
+    def test_exportar_pdf(self):
+        self.assertPresupuestoConsultas('exportacion:exportar_pdf')
+
+    @modo_asgi(False)  # El cliente síncrono no lee el streaming asíncrono (ver ExportacionAsgiTests)
+    def test_exportar_json(self):
+        self.assertPresupuestoConsultas('exportacion:exportar_json')
+
+    def test_exportar_etiquetas(self):
+        self.assertPresupuestoConsultas('exportacion:exportar_etiquetas')
+
+    def test_sincronizar(self):
+        self.assertPresupuestoConsultas('exportacion:sincronizar')
+
+
+@mock.patch('exportacion.sincronizacion.MARGEN', datetime.timedelta(0))
+class SincronizacionTests(TestCase):
+    """Sincronización incremental por cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        self.url = reverse('exportacion:sincronizar')
+
+    def sincronizar(self, cursor=None, limite=None):
+        """Recorre todas las páginas; devuelve (ids, eliminados, cursor final)."""
+        ids, eliminados = [], []
+        while True:
+            params = {k: v for k, v in {'cursor': cursor, 'limite': limite}.items() if v}
+            datos = self.client.get(self.url, params).json()
+            ids += [e['id'] for e in datos['elementos']]
+            eliminados += [e['id'] for e in datos['eliminados']]
+            cursor = datos['cursor']
+            if not datos['mas']:
+                return ids, eliminados, cursor
+
+    def test_copia_completa_por_paginas_y_luego_solo_cambios(self):
+        creados = crear_inventario(7, self.usuario)
+        ids, eliminados, cursor = self.sincronizar(limite=3)
+        self.assertEqual(sorted(ids), sorted(e.pk for e in creados))
+        self.assertEqual(eliminados, [])
+
+        modificado = Elemento.objects.get(pk=creados[1].pk)
+        modificado.descripcion = 'Revisado'
+        modificado.save()
+        Elemento.objects.get(pk=creados[2].pk).delete()
+
+        ids, eliminados, cursor = self.sincronizar(cursor)
+        self.assertEqual((ids, eliminados), ([creados[1].pk], [creados[2].pk]))
+        self.assertEqual(self.sincronizar(cursor)[:2], ([], []))
+
+    def test_restaurado_no_llega_como_eliminado(self):
+        creados = crear_inventario(3, self.usuario)  # El tercero está de baja
+        *_, cursor = self.sincronizar()
+
+        self.assertEqual(archivar_lote([creados[2].pk], meses=0), 1)
+        restaurar([creados[2].pk])
+        ids, eliminados, _ = self.sincronizar(cursor)
+        self.assertEqual((ids, eliminados), ([creados[2].pk], []))
+
+    def test_respuesta_comprimida_y_cursor_invalido(self):
+        crear_inventario(3, self.usuario)
+        respuesta = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(respuesta['Content-Encoding'], 'gzip')
+        self.assertEqual(self.client.get(self.url, {'cursor': 'no-es-un-cursor'}).status_code, 400)
+
+
+class EtiquetasTests(TestCase):
+    """Hojas de etiquetas con QR / código de barras."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        crear_inventario(40, cls.usuario)  # 32 con serial y 8 por cantidad
+
+    def setUp(self):
+        etiquetas._dibujos.clear()
+
+    def test_paginas_y_cache_de_dibujos(self):
+        archivo, total = etiquetas.generar_etiquetas(Elemento.objects.all())
+        self.assertEqual(total, 32)
+        self.assertEqual(archivo.read().count(b'/Type /Page\n'), 2)  # 30 por hoja
+        self.assertEqual(len(etiquetas._dibujos), 32)
+
+        # Reimprimir reutiliza los dibujos; editar un elemento genera uno nuevo
+        elemento = Elemento.objects.exclude(serial=None).first()
+        elemento.modelo = 'Modelo editado'
+        elemento.save()
+        with mock.patch.object(etiquetas, '_dibujar', wraps=etiquetas._dibujar) as dibujar:
+            etiquetas.generar_etiquetas(Elemento.objects.all(), hoja='L7160')
+            etiquetas.generar_etiquetas(Elemento.objects.all(), hoja='L7160')
+        self.assertEqual(dibujar.call_count, 32)
+
+        with mock.patch.object(etiquetas, '_dibujar', wraps=etiquetas._dibujar) as dibujar:
+            etiquetas.generar_etiquetas(Elemento.objects.all())
+        self.assertEqual(dibujar.call_count, 1)
+
+    @override_settings(ETIQUETAS_MAX_DIBUJOS=10)
+    def test_la_cache_respeta_su_tamano(self):
+        etiquetas.generar_etiquetas(Elemento.objects.all())
+        self.assertEqual(len(etiquetas._dibujos), 10)
+
+    def test_vista_pdf(self):
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get(reverse('exportacion:exportar_etiquetas'), {'codigo': 'barras', 'hoja': 'otra'})
+        self.assertEqual(respuesta['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(respuesta.streaming_content).startswith(b'%PDF'))
+
+
+class CargarBDTests(TestCase):
+    """Restauración de un respaldo (psql simulado)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+
+    def test_restaurar_invalida_las_versiones(self):
+        self.client.force_login(self.usuario)
+        versiones = (version_datos(), version_catalogos())
+        exito = subprocess.CompletedProcess(args=[], returncode=0, stdout='', stderr='')
+        with tempfile.TemporaryDirectory() as directorio, override_settings(BASE_DIR=Path(directorio)), \
+                mock.patch('exportacion.views.subprocess.run', return_value=exito) as psql:
+            respuesta = self.client.post(reverse('exportacion:cargar_bd'), {
+                'archivo_bd': SimpleUploadedFile('respaldo.sql', b'SELECT 1;'),
+            })
+        self.assertRedirects(respuesta, reverse('exportacion:gestion_bd'), fetch_redirect_response=False)
+        self.assertEqual(psql.call_args.args[0][0], 'psql')
+        self.assertNotEqual(version_datos(), versiones[0])
+        self.assertNotEqual(version_catalogos(), versiones[1])
+
+
+@modo_asgi()
+class ExportacionAsgiTests(TestCase):
+    """Descargas asíncronas (MODO_ASGI=True) con AsyncClient."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('usuario@prueba.co', 'clave-prueba', is_approved=True)
+        crear_inventario(4, cls.usuario)
+
+    def setUp(self):
+        self.async_client.force_login(self.usuario)
+
+    async def test_json_en_streaming(self):
+        respuesta = await self.async_client.get(reverse('exportacion:exportar_json'))
+        self.assertEqual(respuesta.status_code, 200)
+        cuerpo = b''.join([parte async for parte in respuesta.streaming_content])
+        self.assertEqual(len(json.loads(cuerpo)), 4)
+
+    async def test_excel_pdf_y_etiquetas(self):
+        for nombre, tipo in (
+            ('exportacion:exportar_excel', 'spreadsheetml'),
+            ('exportacion:exportar_pdf', 'application/pdf'),
+            ('exportacion:exportar_etiquetas', 'application/pdf'),
+        ):
+            with self.subTest(nombre):
+                respuesta = await self.async_client.get(reverse(nombre))
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertIn(tipo, respuesta['Content-Type'])
+
+    async def test_opciones_redirige_al_formato(self):
+        respuesta = await self.async_client.get(reverse('exportacion:opciones_exportacion'), {'formato': 'pdf'})
+        self.assertEqual(respuesta['Content-Type'], 'application/pdf')
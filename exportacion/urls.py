@@ -1,21 +1,47 @@
 # exportacion/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 
 # Define el namespace de la aplicación
 app_name = 'exportacion'
 
+# En modo ASGI las descargas usan sus versiones asíncronas (ver views.py, sección 3)
+if settings.MODO_ASGI:
+    vistas = {
+        'opciones': views.opciones_exportacion_async,
+        'excel': views.exportar_inventario_excel_async,
+        'pdf': views.exportar_inventario_pdf_async,
+        'json': views.exportar_inventario_json_async,
+        'etiquetas': views.exportar_inventario_etiquetas_async,
+        'descargar_bd': views.descargar_base_datos_async,
+    }
+else:
+    vistas = {
+        'opciones': views.opciones_exportacion,
+        'excel': views.exportar_inventario_excel,
+        'pdf': views.exportar_inventario_pdf,
+        'json': views.exportar_inventario_json,
+        'etiquetas': views.exportar_inventario_etiquetas,
+        'descargar_bd': views.descargar_base_datos,
+    }
+
 urlpatterns = [
     # Muestra las opciones de exportación y maneja el inicio de la solicitud GET
-    path('opciones/', views.opciones_exportacion, name='opciones_exportacion'),
+    path('opciones/', vistas['opciones'], name='opciones_exportacion'),
     
     # Rutas directas para la generación de archivos (generalmente llamadas desde opciones_exportacion)
     # Estas se mantienen separadas por si se necesita llamarlas vía AJAX en el futuro.
     
-    path('excel/', views.exportar_inventario_excel, name='exportar_excel'),
-    path('pdf/', views.exportar_inventario_pdf, name='exportar_pdf'),
+    path('excel/', vistas['excel'], name='exportar_excel'),
+    path('pdf/', vistas['pdf'], name='exportar_pdf'),
+    path('json/', vistas['json'], name='exportar_json'),
+    path('etiquetas/', vistas['etiquetas'], name='exportar_etiquetas'),
+
+    # Cambios desde el último cursor del cliente (lectores de mano / copias locales)
+    path('sincronizar/', views.sincronizar_inventario, name='sincronizar'),
 
     path('gestion-bd/', views.GestionBDView.as_view(), name='gestion_bd'), # Nueva vista para mostrar opciones
-    path('descargar-bd/', views.descargar_base_datos, name='descargar_bd'), # Nueva función para descargar
+    path('descargar-bd/', vistas['descargar_bd'], name='descargar_bd'), # Nueva función para descargar
     path('cargar-bd/', views.CargarBDView.as_view(), name='cargar_bd'), # Nueva vista para cargar
 ]
\ No newline at end of file
@@ -1,11 +1,14 @@
 # exportacion/views.py
 import os
 import shutil
+import asyncio
 import datetime
 import subprocess
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
-from django.http import HttpResponse, Http404, FileResponse
+from django.http import HttpResponse, Http404, FileResponse, JsonResponse
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.gzip import gzip_page
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.views.generic import View
@@ -14,17 +17,42 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.management import call_command
 import json
 
-# Importamos la lógica de exportación que crearemos en exporters.py
-from .exporters import exportar_a_excel, exportar_a_pdf 
+# Los motores de exportación (openpyxl, reportlab) se importan al primer uso, ver motores.py
+from .motores import motor
 # Importamos el modelo Elemento para obtener los datos
 from inventario.models import Elemento 
+from inventario.signals import incrementar_version_catalogos, incrementar_version_datos
+from inventario.ubicaciones import filtrar_subarbol
 from .forms import CargarBDForm # Formulario necesario para la carga
+from .sincronizacion import TAMANO_PAGINA, CursorInvalido, pagina_cambios
+from inventario_tecnologico.metricas import medir_exportacion
 
 
 # ==============================================================================
 # 1. Vistas de Exportación de Inventario (Excel/PDF)
 # ==============================================================================
 
+def contexto_opciones():
+    """Opciones de las etiquetas para el formulario de exportación."""
+    from .etiquetas import CODIGOS, HOJAS
+
+    return {
+        'hojas_etiquetas': list(HOJAS.items()),
+        'codigos_etiquetas': list(CODIGOS.items()),
+    }
+
+
+def elementos_solicitados(request):
+    """
+    Elementos a exportar: todo el inventario o, con ?ubicacion=<nombre o ruta>
+    (ej. 'Sede Norte' o 'sede norte/piso 2/'), solo esa ubicación y lo que
+    cuelga de ella (consulta por prefijo de la ruta materializada).
+    """
+    ubicacion = request.GET.get('ubicacion', '').strip()
+    elementos = Elemento.objects.all()
+    return filtrar_subarbol(elementos, ubicacion) if ubicacion else elementos
+
+
 @login_required
 def opciones_exportacion(request):
     """
@@ -35,25 +63,30 @@ def opciones_exportacion(request):
         # Si se envió el formulario GET con un formato, se redirige a la vista de exportación.
         formato = request.GET.get('formato')
         
-        # Obtener los elementos. Aquí se podría añadir lógica de filtrado si es necesario.
-        elementos = Elemento.objects.all() 
+        # Obtener los elementos (opcionalmente solo los de una ubicación)
+        elementos = elementos_solicitados(request)
         
         if not elementos.exists():
             messages.warning(request, "No hay elementos en el inventario para exportar.")
-            return render(request, 'exportacion/opciones_exportacion.html')
+            return render(request, 'exportacion/opciones_exportacion.html', contexto_opciones())
 
         if formato == 'excel':
             return exportar_inventario_excel(request, elementos)
         elif formato == 'pdf':
             return exportar_inventario_pdf(request, elementos)
+        elif formato == 'json':
+            return exportar_inventario_json(request, elementos)
+        elif formato == 'etiquetas':
+            return exportar_inventario_etiquetas(request, elementos)
         else:
             messages.error(request, "Formato de exportación no válido.")
             
-    return render(request, 'exportacion/opciones_exportacion.html')
+    return render(request, 'exportacion/opciones_exportacion.html', contexto_opciones())
 
 
 @login_required
 @require_http_methods(["GET"]) # Solo permite peticiones GET
+@medir_exportacion('excel')
 def exportar_inventario_excel(request, elementos=None):
     """
     Función que llama a la utilidad de exportación a Excel y devuelve la respuesta HTTP.
@@ -61,11 +94,11 @@ def exportar_inventario_excel(request, elementos=None):
     """
     # Si la lista de elementos no se pasa (ej. llamada directa), se obtiene todo el inventario
     if elementos is None:
-        elementos = Elemento.objects.all()
+        elementos = elementos_solicitados(request)
 
     try:
         # La función de utilidad devuelve un HttpResponse
-        response = exportar_a_excel(elementos)
+        response = motor('excel')(elementos)
         return response
     except Exception as e:
         messages.error(request, f"Error al generar el archivo Excel: {e}")
@@ -74,23 +107,89 @@ def exportar_inventario_excel(request, elementos=None):
 
 @login_required
 @require_http_methods(["GET"]) # Solo permite peticiones GET
+@medir_exportacion('pdf')
 def exportar_inventario_pdf(request, elementos=None):
     """
     Función que llama a la utilidad de exportación a PDF y devuelve la respuesta HTTP.
     Esta función helper es llamada desde opciones_exportacion.
     """
     if elementos is None:
-        elementos = Elemento.objects.all()
+        elementos = elementos_solicitados(request)
 
     try:
         # La función de utilidad devuelve un HttpResponse
-        response = exportar_a_pdf(elementos)
+        response = motor('pdf')(elementos)
         return response
     except Exception as e:
         messages.error(request, f"Error al generar el archivo PDF: {e}")
         return redirect('exportacion:opciones_exportacion')
 
 
+@login_required
+@require_http_methods(["GET"]) # Solo permite peticiones GET
+@medir_exportacion('json')
+def exportar_inventario_json(request, elementos=None):
+    """
+    Exporta el inventario a JSON en streaming (se envía a medida que se genera).
+    """
+    if elementos is None:
+        elementos = elementos_solicitados(request)
+
+    return motor('json')(elementos)
+
+
+def opciones_etiquetas(request):
+    """Hoja (?hoja=5160|L7160) y tipo de código (?codigo=qr|barras) pedidos; los valores desconocidos toman el predeterminado."""
+    from .etiquetas import CODIGOS, HOJAS
+
+    hoja = request.GET.get('hoja')
+    codigo = request.GET.get('codigo')
+    return {
+        'hoja': hoja if hoja in HOJAS else '5160',
+        'codigo': codigo if codigo in CODIGOS else 'qr',
+    }
+
+
+@login_required
+@require_http_methods(["GET"])
+@medir_exportacion('etiquetas')
+def exportar_inventario_etiquetas(request, elementos=None):
+    """
+    Hoja de etiquetas en PDF con el código QR o de barras de cada serial
+    (ver etiquetas.py). Se puede filtrar por ?ubicacion como las demás exportaciones.
+    """
+    if elementos is None:
+        elementos = elementos_solicitados(request)
+
+    try:
+        return motor('etiquetas')(elementos, **opciones_etiquetas(request))
+    except Exception as e:
+        messages.error(request, f"Error al generar las etiquetas: {e}")
+        return redirect('exportacion:opciones_exportacion')
+
+
+@gzip_page
+@require_http_methods(["GET"])
+def sincronizar_inventario(request):
+    """
+    Cambios del inventario posteriores al cursor del cliente, por páginas
+    (ver sincronizacion.py). Pensada para clientes que guardan una copia local.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Autenticación requerida.'}, status=401)
+
+    try:
+        limite = int(request.GET.get('limite', TAMANO_PAGINA))
+    except ValueError:
+        return JsonResponse({'error': 'El parámetro "limite" debe ser un número.'}, status=400)
+    try:
+        datos = pagina_cambios(request.GET.get('cursor'), limite)
+    except CursorInvalido as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    return JsonResponse(datos, json_dumps_params={'ensure_ascii': False})
+
+
 # ==============================================================================
 # 2. Vistas de Gestión de Base de Datos (BD) - ADAPTADO PARA POSTGRESQL
 # ==============================================================================
@@ -108,6 +207,42 @@ class GestionBDView(LoginRequiredMixin, UserPassesTestMixin, View):
         return render(request, 'exportacion/gestionar_bd.html')
 
 
+def _preparar_respaldo():
+    """
+    Crea la carpeta de respaldos y arma el comando pg_dump a partir de settings.
+    Devuelve (nombre_archivo, ruta, comando, entorno).
+    """
+    # Obtener configuración de la base de datos desde settings
+    db_config = settings.DATABASES['default']
+    
+    # Crear carpeta de respaldo
+    backup_dir = settings.BASE_DIR.parent / "Base de Datos - Inventario" 
+    if not os.path.exists(backup_dir):
+        os.makedirs(backup_dir)
+        
+    # Generar nombre del archivo de respaldo
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_filename = f"inventario_db_backup_{timestamp}.sql"
+    backup_path = backup_dir / backup_filename
+
+    # Configurar la variable de entorno PGPASSWORD para autenticación
+    env = os.environ.copy()
+    env['PGPASSWORD'] = db_config['PASSWORD']
+    
+    # Comando pg_dump - Formato SQL plano
+    command = [
+        'pg_dump',
+        '-h', db_config['HOST'],
+        '-p', str(db_config['PORT']),
+        '-U', db_config['USER'],
+        '--format=plain',  # Formato SQL plano (legible)
+        '--encoding=UTF8',  # Asegurar codificación UTF-8
+        '--file=' + str(backup_path),
+        db_config['NAME']
+    ]
+    return backup_filename, backup_path, command, env
+
+
 @login_required
 @require_http_methods(["GET"])
 def descargar_base_datos(request):
@@ -120,42 +255,11 @@ def descargar_base_datos(request):
         messages.error(request, "Permiso denegado.")
         return redirect('inventario:dashboard') 
         
-    # 2. Obtener configuración de la base de datos desde settings
-    db_config = settings.DATABASES['default']
-    db_name = db_config['NAME']
-    db_user = db_config['USER']
-    db_password = db_config['PASSWORD']
-    db_host = db_config['HOST']
-    db_port = db_config['PORT']
-    
-    # 3. Crear carpeta de respaldo
-    backup_dir = settings.BASE_DIR.parent / "Base de Datos - Inventario" 
-    if not os.path.exists(backup_dir):
-        os.makedirs(backup_dir)
-        
-    # 4. Generar nombre del archivo de respaldo
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_filename = f"inventario_db_backup_{timestamp}.sql"
-    backup_path = backup_dir / backup_filename
+    # 2-4. Preparar carpeta, nombre del archivo y comando pg_dump
+    backup_filename, backup_path, command, env = _preparar_respaldo()
     
     # 5. Ejecutar pg_dump para crear el respaldo
     try:
-        # Configurar la variable de entorno PGPASSWORD para autenticación
-        env = os.environ.copy()
-        env['PGPASSWORD'] = db_password
-        
-        # Comando pg_dump - Formato SQL plano
-        command = [
-            'pg_dump',
-            '-h', db_host,
-            '-p', str(db_port),
-            '-U', db_user,
-            '--format=plain',  # Formato SQL plano (legible)
-            '--encoding=UTF8',  # Asegurar codificación UTF-8
-            '--file=' + str(backup_path),
-            db_name
-        ]
-        
         # Ejecutar el comando
         result = subprocess.run(
             command,
@@ -293,7 +397,11 @@ class CargarBDView(LoginRequiredMixin, UserPassesTestMixin, View):
                     messages.error(request, f"Error al restaurar la base de datos: {result.stderr}")
                     return render(request, 'exportacion/cargar_bd.html', {'form': form})
                 else:
-                    messages.success(request, "¡Base de datos restaurada exitosamente! Por favor, reinicie el servidor si es necesario.")
+                    # Todos los datos cambiaron: invalida ETags, filtros y el estado del dashboard
+                    # cacheados (la caché es compartida, reiniciar el servidor no la vacía)
+                    incrementar_version_datos()
+                    incrementar_version_catalogos()
+                    messages.success(request, "¡Base de datos restaurada exitosamente!")
                 
                 return redirect('exportacion:gestion_bd')
 
@@ -317,4 +425,129 @@ class CargarBDView(LoginRequiredMixin, UserPassesTestMixin, View):
         
         else:
             messages.error(request, "Error de validación del formulario. Asegúrese de seleccionar un archivo .sql válido.")
-            return render(request, 'exportacion/cargar_bd.html', {'form': form})
\ No newline at end of file
+            return render(request, 'exportacion/cargar_bd.html', {'form': form})
+
+
+# ==============================================================================
+# 3. Vistas Asíncronas de Exportación (modo ASGI)
+# ==============================================================================
+# Se usan en lugar de las anteriores cuando settings.MODO_ASGI está activo
+# (ver exportacion/urls.py). La generación de Excel/PDF/etiquetas (CPU) y la
+# lectura de sus elementos se hacen en un hilo aparte para no bloquear el
+# event loop mientras otros clientes esperan.
+
+def _elementos_exportacion(request):
+    return elementos_solicitados(request).select_related('tipo_dispositivo', 'estado', 'usuario_registro')
+
+
+@login_required
+async def opciones_exportacion_async(request):
+    """
+    Versión asíncrona de opciones_exportacion.
+    """
+    formato = request.GET.get('formato')
+    if formato is None:
+        return await sync_to_async(render)(request, 'exportacion/opciones_exportacion.html', contexto_opciones())
+
+    if not await elementos_solicitados(request).aexists():
+        messages.warning(request, "No hay elementos en el inventario para exportar.")
+        return await sync_to_async(render)(request, 'exportacion/opciones_exportacion.html', contexto_opciones())
+
+    vistas = {
+        'excel': exportar_inventario_excel_async,
+        'pdf': exportar_inventario_pdf_async,
+        'json': exportar_inventario_json_async,
+        'etiquetas': exportar_inventario_etiquetas_async,
+    }
+    if formato in vistas:
+        return await vistas[formato](request)
+
+    messages.error(request, "Formato de exportación no válido.")
+    return await sync_to_async(render)(request, 'exportacion/opciones_exportacion.html', contexto_opciones())
+
+
+async def _exportar_en_hilo(request, exportador, descripcion, elementos):
+    """
+    Ejecuta exportador(elementos) en el hilo síncrono de la petición: recorre
+    el QuerySet ahí (por bloques, sin cargar todas las filas en una lista) con
+    la conexión de ese hilo, que Django cierra al terminar la petición.
+    """
+    try:
+        return await sync_to_async(exportador)(elementos)
+    except Exception as e:
+        messages.error(request, f"Error al generar el archivo {descripcion}: {e}")
+        return redirect('exportacion:opciones_exportacion')
+
+
+@login_required
+@require_http_methods(["GET"])
+@medir_exportacion('excel')
+async def exportar_inventario_excel_async(request):
+    """Versión asíncrona de exportar_inventario_excel."""
+    return await _exportar_en_hilo(request, motor('excel'), 'Excel', _elementos_exportacion(request))
+
+
+@login_required
+@require_http_methods(["GET"])
+@medir_exportacion('pdf')
+async def exportar_inventario_pdf_async(request):
+    """Versión asíncrona de exportar_inventario_pdf."""
+    return await _exportar_en_hilo(request, motor('pdf'), 'PDF', _elementos_exportacion(request))
+
+
+@login_required
+@require_http_methods(["GET"])
+@medir_exportacion('etiquetas')
+async def exportar_inventario_etiquetas_async(request):
+    """Versión asíncrona de exportar_inventario_etiquetas (el PDF se arma en un hilo)."""
+    opciones = opciones_etiquetas(request)
+    return await _exportar_en_hilo(
+        request, lambda elementos: motor('etiquetas')(elementos, **opciones), 'de etiquetas',
+        elementos_solicitados(request),  # Sin select_related: etiquetas.py lee solo CAMPOS_ETIQUETA
+    )
+
+
+@login_required
+@require_http_methods(["GET"])
+@medir_exportacion('json')
+async def exportar_inventario_json_async(request):
+    """Versión asíncrona de exportar_inventario_json (streaming con aiterator)."""
+    return motor('json')(elementos_solicitados(request), asincrono=True)
+
+
+@login_required
+@require_http_methods(["GET"])
+async def descargar_base_datos_async(request):
+    """
+    Versión asíncrona de descargar_base_datos: pg_dump se ejecuta como
+    subproceso asíncrono, sin ocupar un hilo mientras termina.
+    """
+    user = await request.auser()
+    if not user.is_staff and not user.is_superuser:
+        messages.error(request, "Permiso denegado.")
+        return redirect('inventario:dashboard')
+
+    backup_filename, backup_path, command, env = _preparar_respaldo()
+
+    try:
+        proceso = await asyncio.create_subprocess_exec(
+            *command,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proceso.communicate()
+        if proceso.returncode != 0:
+            messages.error(request, f"Error al crear el respaldo: {stderr.decode(errors='replace')}")
+            return redirect('exportacion:gestion_bd')
+    except FileNotFoundError:
+        messages.error(request, "pg_dump no encontrado. Asegúrese de que PostgreSQL esté instalado y en el PATH del sistema.")
+        return redirect('exportacion:gestion_bd')
+    except Exception as e:
+        messages.error(request, f"Error al crear la copia de respaldo: {e}")
+        return redirect('exportacion:gestion_bd')
+
+    response = FileResponse(open(backup_path, 'rb'), content_type='application/octet-stream')
+    response['Content-Disposition'] = f'attachment; filename="{backup_filename}"'
+    messages.success(request, f"Respaldo '{backup_filename}' creado exitosamente.")
+    return response
@@ -1,6 +1,19 @@
 # inventario/admin.py
-from django.contrib import admin
-from .models import TipoDispositivo, EstadoElemento, Elemento
+import hashlib
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .catalogos import MODELOS_CATALOGO, CatalogoChoiceField, catalogo
+from .archivo import restaurar
+from .models import TipoDispositivo, EstadoElemento, Elemento, ElementoArchivado, Localizacion
+from .signals import version_datos
+from .ubicaciones import filtrar_subarbol
 
 # =============================
 #   TITULOS PERSONALIZADOS DJANGO ADMIN
@@ -11,7 +24,93 @@ admin.site.site_title = "Panel IT-CEDHU"
 admin.site.index_title = "Gestión Administrativa"
 
 # ==============================================================================
-# 1. Administración del Modelo Elemento (Principal)
+# 1. Utilidades para listas grandes
+# ==============================================================================
+
+def conteo_estimado(modelo, alias='default'):
+    """
+    Número aproximado de filas según las estadísticas de PostgreSQL (pg_class),
+    sin recorrer la tabla. Devuelve None si no hay estadísticas (tabla sin ANALYZE).
+    """
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [modelo._meta.db_table],
+        )
+        fila = cursor.fetchone()
+    return fila[0] if fila and fila[0] >= 0 else None
+
+
+class PaginadorEstimado(Paginator):
+    """
+    En PostgreSQL, si la lista no tiene filtros ni búsqueda y la tabla supera
+    ADMIN_CONTEO_ESTIMADO_DESDE filas, usa el conteo estimado en lugar de COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        consulta = self.object_list
+        if connections[consulta.db].vendor == 'postgresql' and not consulta.query.where:
+            estimado = conteo_estimado(consulta.model, consulta.db)
+            if estimado is not None and estimado >= settings.ADMIN_CONTEO_ESTIMADO_DESDE:
+                return estimado
+        return super().count
+
+
+class FiltroValoresCacheado(admin.AllValuesFieldListFilter):
+    """
+    Igual que el filtro por valores de Django, pero la lista de valores (un
+    SELECT DISTINCT sobre toda la tabla) se guarda en caché. La clave incluye
+    la versión de los datos, así que se renueva al guardar o borrar elementos.
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        clave = f'admin:filtro:{model._meta.label_lower}:{field_path}:{version_datos()}'
+        consulta = self.lookup_choices
+        self.lookup_choices = cache.get_or_set(clave, lambda: list(consulta), settings.ADMIN_FILTROS_CACHE)
+
+
+class FiltroCatalogo(admin.RelatedFieldListFilter):
+    """Filtro por tipo o estado con las opciones del catálogo en memoria."""
+
+    def field_choices(self, field, request, model_admin):
+        return list(catalogo(field.related_model))
+
+
+class FiltroUbicacion(admin.SimpleListFilter):
+    """
+    Filtro lateral por ubicación que se recorre nivel a nivel (sede → edificio
+    → piso → sala). Elegir un nivel filtra todo su subárbol por prefijo de
+    ruta; las opciones de cada nivel se guardan en caché por versión de datos.
+    """
+    title = 'ubicación'
+    parameter_name = 'ubicacion'
+
+    def lookups(self, request, model_admin):
+        ruta = self.value() or ''
+        clave = f'admin:filtro:ubicacion:{hashlib.md5(ruta.encode()).hexdigest()}:{version_datos()}'
+        return cache.get_or_set(clave, lambda: self._opciones(ruta), settings.ADMIN_FILTROS_CACHE)
+
+    @staticmethod
+    def _opciones(ruta):
+        # Ancestros del nivel elegido (para poder volver atrás) y sus hijos directos
+        prefijos = [ruta[:i + 1] for i, c in enumerate(ruta) if c == '/']
+        ancestros = Localizacion.objects.filter(ruta__in=prefijos)
+        hijos = Localizacion.objects.filter(padre__ruta=ruta) if ruta else Localizacion.objects.filter(padre=None)
+        return [
+            (u.ruta, f"{'· ' * u.profundidad}{u.nombre}")
+            for u in (ancestros | hijos).order_by('ruta').only('ruta', 'nombre', 'profundidad')
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return filtrar_subarbol(queryset, self.value())
+        return queryset
+
+
+# ==============================================================================
+# 2. Administración del Modelo Elemento (Principal)
 # ==============================================================================
 
 class ElementoAdmin(admin.ModelAdmin):
@@ -30,13 +129,26 @@ class ElementoAdmin(admin.ModelAdmin):
         'fecha_adquisicion',
     )
     
+    # Relaciones que se cargan con la lista (evita una consulta por fila)
+    list_select_related = ('tipo_dispositivo', 'estado', 'usuario_registro')
+
     # Campos que permiten hacer clic para ir a la página de edición
     list_display_links = ('serial', 'nombre_completo')
     
-    # Filtros laterales
-    list_filter = ('estado', 'tipo_dispositivo', 'marca', 'localizacion', 'fecha_adquisicion')
+    # Filtros laterales (catálogos en memoria; marca y ubicaciones con sus valores en caché)
+    list_filter = (
+        ('estado', FiltroCatalogo),
+        ('tipo_dispositivo', FiltroCatalogo),
+        ('marca', FiltroValoresCacheado),
+        FiltroUbicacion,
+        'fecha_adquisicion',
+    )
+
+    # Con tablas grandes: sin el segundo COUNT(*) del total y con conteo estimado
+    show_full_result_count = False
+    paginator = PaginadorEstimado
     
-    # Campos de búsqueda
+    # Campos de búsqueda (en PostgreSQL usan índices trigram, ver migración 0004)
     search_fields = ('serial', 'marca', 'modelo', 'descripcion', 'localizacion')
     
     # Ordenamiento por defecto
@@ -48,7 +160,7 @@ class ElementoAdmin(admin.ModelAdmin):
             'fields': (('tipo_dispositivo', 'marca', 'modelo'), 'serial', 'descripcion', ('precio', 'fecha_adquisicion'))
         }),
         ('UBICACIÓN Y ESTADO', {
-            'fields': (('localizacion', 'estado'), 'imagen')
+            'fields': (('ubicacion', 'estado'), 'imagen')
         }),
         ('AUDITORÍA', {
             'fields': ('usuario_registro', 'fecha_registro', 'fecha_actualizacion'),
@@ -56,16 +168,29 @@ class ElementoAdmin(admin.ModelAdmin):
         }),
     )
 
+    # La ubicación se elige buscando en la jerarquía (el texto 'localizacion' se deriva de ella)
+    autocomplete_fields = ('ubicacion',)
+
     # Campos de solo lectura
     readonly_fields = ('usuario_registro', 'fecha_registro', 'fecha_actualizacion')
     
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.related_model in MODELOS_CATALOGO:
+            kwargs.setdefault('form_class', CatalogoChoiceField)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
     def save_model(self, request, obj, form, change):
         """Sobrescribe el método save_model para asignar el usuario que registra/modifica."""
         # Solo asigna el usuario de registro si el objeto es nuevo (no 'change')
         if not change:
             obj.usuario_registro = request.user
+        obj._usuario_cambio = request.user  # Para el historial
         super().save_model(request, obj, form, change)
 
+    def delete_model(self, request, obj):
+        obj._usuario_cambio = request.user  # Para el historial
+        super().delete_model(request, obj)
+
     def nombre_completo(self, obj):
         """Método helper para mostrar Marca y Modelo en la lista."""
         return f"{obj.marca} {obj.modelo}"
@@ -73,12 +198,72 @@ class ElementoAdmin(admin.ModelAdmin):
 
 
 # ==============================================================================
-# 2. Registros de Catálogos (Modelos simples)
+# 3. Registros de Catálogos (Modelos simples)
 # ==============================================================================
 
 # Registra los modelos con sus configuraciones por defecto (solo se añade la búsqueda)
 admin.site.register(TipoDispositivo, admin.ModelAdmin)
 admin.site.register(EstadoElemento, admin.ModelAdmin)
 
+
+@admin.register(Localizacion)
+class LocalizacionAdmin(admin.ModelAdmin):
+    """
+    Jerarquía de ubicaciones. Las nuevas se crean también al escribir una
+    localización en un elemento; nombre y nivel superior no se editan porque
+    forman la ruta de todo el subárbol.
+    """
+    list_display = ('nombre_completo', 'tipo', 'profundidad')
+    list_filter = ('tipo', 'profundidad')
+    search_fields = ('nombre_completo',)
+    autocomplete_fields = ('padre',)
+    fields = ('nombre', 'padre', 'tipo', 'nombre_completo', 'ruta')
+    readonly_fields = ('nombre_completo', 'ruta')
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None:
+            return ('nombre', 'padre', *self.readonly_fields)
+        return self.readonly_fields
+
 # Registra el modelo principal con su clase de administración personalizada
-admin.site.register(Elemento, ElementoAdmin)
\ No newline at end of file
+admin.site.register(Elemento, ElementoAdmin)
+
+
+# ==============================================================================
+# 4. Archivo de Elementos dados de Baja (ver inventario/archivo.py)
+# ==============================================================================
+
+@admin.register(ElementoArchivado)
+class ElementoArchivadoAdmin(admin.ModelAdmin):
+    """
+    Consulta del archivo. Los elementos llegan aquí con el comando
+    'archivar_bajas' y solo salen restaurándolos al inventario.
+    """
+    list_display = ('id', 'serial', 'tipo_dispositivo', 'marca', 'modelo', 'localizacion', 'fecha_archivado')
+    list_select_related = ('tipo_dispositivo',)
+    list_filter = (('tipo_dispositivo', FiltroCatalogo), 'fecha_archivado')
+    search_fields = ('=id', 'serial', 'marca', 'modelo', 'localizacion')
+    date_hierarchy = 'fecha_archivado'
+    show_full_result_count = False
+    actions = ['restaurar_seleccionados']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def has_restaurar_permission(self, request):
+        return request.user.has_perm('inventario.add_elemento')
+
+    @admin.action(description='Restaurar al inventario', permissions=['restaurar'])
+    def restaurar_seleccionados(self, request, queryset):
+        try:
+            restaurados = restaurar(list(queryset.values_list('pk', flat=True)), usuario=request.user)
+        except ValidationError as error:
+            self.message_user(request, error.messages[0], messages.ERROR)
+        else:
+            self.message_user(request, f'{restaurados} elementos restaurados al inventario.', messages.SUCCESS)
@@ -12,4 +12,8 @@ class InventarioConfig(AppConfig):
     name = 'inventario'
     
     # Nombre visible en el panel de administración de Django
-    verbose_name = 'Gestión de Inventario Tecnológico'
\ No newline at end of file
+    verbose_name = 'Gestión de Inventario Tecnológico'
+
+    def ready(self):
+        # Registra las señales que invalidan la caché por versión de datos
+        from . import signals  # noqa: F401
@@ -0,0 +1,150 @@
+# inventario/archivo.py
+"""
+Archivo de los elementos dados de baja.
+
+Los elementos en estado "Baja" sin cambios desde hace ARCHIVO_MESES meses se
+mueven de la tabla de trabajo (Elemento) a ElementoArchivado, así la lista,
+los filtros, el dashboard y la sincronización solo recorren lo que sigue en
+uso. Se hace por lotes (comando 'archivar_bajas'):
+
+- Cada lote es una transacción: se bloquean los elementos, se vuelve a
+  comprobar que siguen de baja y sin cambios, se copian al archivo con su
+  mismo id, se registra el archivado en el historial (accion 'A', con todos
+  los valores, como una eliminación), se borran de Elemento y se descuentan
+  de los contadores.
+- Si el proceso se interrumpe, los lotes confirmados ya están archivados y
+  los demás siguen intactos: volver a ejecutarlo continúa donde quedó.
+- El borrado es un DELETE directo, sin señales por fila: la eliminación no
+  debe quedar en el historial como 'E' y la versión de los datos se
+  incrementa una vez por lote. Las tablas que apuntan al elemento
+  (historial, movimientos, lecturas de auditoría) no tienen restricción en
+  la BD y conservan el id, que ahora está en el archivo.
+
+La sincronización trata el archivado como una eliminación y la lista solo
+busca en el archivo si se pide (?archivados=on). restaurar() devuelve
+elementos archivados al inventario con sus valores originales.
+"""
+import calendar
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.utils import timezone
+
+from .models import ContadorInventario, Elemento, ElementoArchivado, HistorialElemento
+from .signals import incrementar_version_datos
+
+ESTADO_BAJA = 'baja'
+# Campos que se copian entre Elemento y ElementoArchivado (por attname)
+CAMPOS_ARCHIVO = tuple(
+    campo.attname for campo in ElementoArchivado._meta.concrete_fields if campo.name != 'fecha_archivado'
+)
+
+Accion = HistorialElemento.Accion
+
+
+def restar_meses(fecha, meses):
+    """La misma fecha 'meses' meses antes (el 31/03 menos un mes es el 28 o 29/02)."""
+    mes = fecha.month - 1 - meses
+    anio, mes = fecha.year + mes // 12, mes % 12 + 1
+    return fecha.replace(year=anio, month=mes, day=min(fecha.day, calendar.monthrange(anio, mes)[1]))
+
+
+def candidatos(meses, ahora=None):
+    """Elementos de baja sin cambios desde hace más de 'meses' meses."""
+    limite = restar_meses(ahora or timezone.now(), meses)
+    return Elemento.objects.filter(estado__nombre__iexact=ESTADO_BAJA, fecha_actualizacion__lt=limite)
+
+
+def archivar_lote(ids, meses, usuario=None):
+    """
+    Archiva los elementos de 'ids' que sigan siendo candidatos al bloquearlos.
+    Devuelve cuántos se archivaron.
+    """
+    alias = router.db_for_write(Elemento)
+    with transaction.atomic(using=alias):
+        # of=('self',): se bloquean los elementos, no la fila del estado "Baja" que une la consulta
+        valores = list(
+            candidatos(meses)
+            .using(alias)
+            .select_for_update(of=('self',))
+            .filter(pk__in=ids)
+            .order_by('pk')
+            .values(*CAMPOS_ARCHIVO)
+        )
+        if not valores:
+            return 0
+        ahora = timezone.now()
+        usuario_id = usuario.pk if usuario is not None else None
+        archivados = ElementoArchivado.objects.using(alias).bulk_create(
+            [ElementoArchivado(**fila, fecha_archivado=ahora) for fila in valores]
+        )
+        HistorialElemento.objects.using(alias).bulk_create([
+            registro
+            for fila in valores
+            for registro in HistorialElemento.registros_archivado(fila, Accion.ARCHIVADO, usuario_id, ahora)
+        ])
+        Elemento.objects.using(alias).filter(pk__in=[fila['id'] for fila in valores])._raw_delete(alias)
+        ContadorInventario.sumar_elementos(archivados, signo=-1)
+        transaction.on_commit(incrementar_version_datos, using=alias)
+    return len(valores)
+
+
+def archivar_bajas(meses, lote=500, pausa=0, usuario=None):
+    """
+    Archiva por lotes todos los candidatos. Generador: entrega
+    (archivados_en_el_lote, ultimo_id_revisado) después de confirmar cada lote.
+    """
+    ultimo = 0
+    while True:
+        ids = list(
+            candidatos(meses).filter(pk__gt=ultimo).order_by('pk').values_list('pk', flat=True)[:lote]
+        )
+        if not ids:
+            return
+        ultimo = ids[-1]
+        yield archivar_lote(ids, meses, usuario), ultimo
+        if pausa:
+            time.sleep(pausa)  # Deja respirar a la BD (y a la réplica) entre lotes
+
+
+def restaurar(ids, usuario=None):
+    """
+    Devuelve al inventario los elementos archivados de 'ids' con su id y sus
+    valores (siguen de baja). Falla si el serial de alguno ya está en uso.
+    Devuelve cuántos se restauraron.
+    """
+    alias = router.db_for_write(Elemento)
+    with transaction.atomic(using=alias):
+        valores = list(
+            ElementoArchivado.objects.using(alias)
+            .select_for_update()
+            .filter(pk__in=ids)
+            .order_by('pk')
+            .values(*CAMPOS_ARCHIVO)
+        )
+        if not valores:
+            return 0
+        seriales = [fila['serial'] for fila in valores if fila['serial']]
+        ocupados = sorted(Elemento.objects.using(alias).filter(serial__in=seriales).values_list('serial', flat=True))
+        if ocupados:
+            raise ValidationError(f'Los seriales {", ".join(ocupados)} ya están en uso en el inventario.')
+
+        # bulk_create no llama a save() (ni a su historial) y marca ambas fechas
+        # como actuales: fecha_actualizacion = ahora hace que la sincronización
+        # lo vuelva a enviar, fecha_registro se repone a continuación
+        elementos = Elemento.objects.using(alias).bulk_create([Elemento(**fila) for fila in valores])
+        for elemento, fila in zip(elementos, valores):
+            elemento.fecha_registro = fila['fecha_registro']
+        Elemento.objects.using(alias).bulk_update(elementos, ['fecha_registro'])
+        ContadorInventario.sumar_elementos(elementos)
+
+        usuario_id = usuario.pk if usuario is not None else None
+        HistorialElemento.objects.using(alias).bulk_create([
+            registro
+            for fila in valores
+            for registro in HistorialElemento.registros_archivado(fila, Accion.RESTAURACION, usuario_id)
+        ])
+        ElementoArchivado.objects.using(alias).filter(pk__in=[fila['id'] for fila in valores]).delete()
+        transaction.on_commit(incrementar_version_datos, using=alias)
+    return len(valores)
@@ -0,0 +1,142 @@
+# inventario/auditoria.py
+"""
+Auditorías físicas con lector de códigos de barras.
+
+El auditor abre una SesionAuditoria sobre una localización y va enviando los
+seriales leídos por lotes. Cada lote cuesta dos consultas, sin importar su
+tamaño: un 'serial IN (...)' sobre el índice único de Elemento.serial y un
+INSERT de las lecturas nuevas (las repetidas se ignoran en la BD).
+
+La conciliación se calcula en la BD con operaciones de conjuntos entre los
+elementos leídos y los registrados en el subárbol de la localización:
+
+    encontrados     = registrados ∩ leídos
+    faltantes       = registrados − leídos
+    fuera de lugar  = leídos − registrados   (el elemento figura en otra ubicación)
+    desconocidas    = lecturas sin elemento  (el serial no existe en el inventario)
+
+Solo cuentan los elementos con serial: los que manejan cantidad no se escanean.
+"""
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Elemento, LecturaAuditoria, Localizacion
+from .utils import normalizar_serial
+
+# Seriales por lote (el 'IN (...)' queda lejos del límite de parámetros de SQLite)
+LOTE_MAXIMO = 500
+
+ENCONTRADO = 'encontrado'
+FUERA_DE_LUGAR = 'fuera_de_lugar'
+DESCONOCIDO = 'desconocido'
+
+
+def normalizar_seriales(seriales):
+    """Seriales normalizados como en ElementoForm, sin vacíos ni repetidos (en orden de lectura)."""
+    return list(dict.fromkeys(filter(None, map(normalizar_serial, seriales))))
+
+
+def _leidos(sesion):
+    """pk de los elementos leídos en la sesión (subconsulta)."""
+    return sesion.lecturas.exclude(elemento=None).values('elemento_id')
+
+
+def _en_ubicacion(sesion):
+    """Condición: elemento con serial registrado en el subárbol de la sesión."""
+    subarbol = Localizacion.objects.filter(ruta__startswith=sesion.ubicacion.ruta).values('pk')
+    return Q(maneja_cantidad=False, ubicacion__in=subarbol)
+
+
+# ==============================================================================
+# 1. Registro de lecturas
+# ==============================================================================
+
+def registrar_lecturas(sesion, seriales):
+    """
+    Registra un lote de seriales leídos y devuelve, para cada serial distinto,
+    {'serial', 'estado', 'elemento'} con estado ENCONTRADO, FUERA_DE_LUGAR o
+    DESCONOCIDO ('elemento' es None en los desconocidos).
+    """
+    if not sesion.abierta:
+        raise ValidationError('La sesión de auditoría está cerrada.')
+    seriales = normalizar_seriales(seriales)
+    if len(seriales) > LOTE_MAXIMO:
+        raise ValidationError(f'Envíe como máximo {LOTE_MAXIMO} seriales por lote.')
+    if not seriales:
+        return []
+
+    ruta = sesion.ubicacion.ruta
+    elementos = {
+        fila['serial']: fila
+        for fila in Elemento.objects.filter(serial__in=seriales).values(
+            'pk', 'serial', 'marca', 'modelo', 'localizacion', 'ubicacion__ruta'
+        )
+    }
+
+    ahora = timezone.now()
+    LecturaAuditoria.objects.bulk_create(
+        [
+            LecturaAuditoria(
+                sesion=sesion,
+                serial=serial,
+                elemento_id=elementos[serial]['pk'] if serial in elementos else None,
+                fecha=ahora,
+            )
+            for serial in seriales
+        ],
+        ignore_conflicts=True,  # Ya leído en esta sesión (restricción única sesión + serial)
+    )
+
+    resultado = []
+    for serial in seriales:
+        fila = elementos.get(serial)
+        if fila is None:
+            estado = DESCONOCIDO
+        elif (fila['ubicacion__ruta'] or '').startswith(ruta):
+            estado = ENCONTRADO
+        else:
+            estado = FUERA_DE_LUGAR
+        resultado.append({'serial': serial, 'estado': estado, 'elemento': fila})
+    return resultado
+
+
+def cerrar_sesion(sesion):
+    if sesion.abierta:
+        sesion.fecha_cierre = timezone.now()
+        sesion.save(update_fields=['fecha_cierre'])
+
+
+# ==============================================================================
+# 2. Conciliación
+# ==============================================================================
+
+def resumen_conciliacion(sesion):
+    """
+    Totales de la conciliación en dos consultas: una agregación condicional
+    sobre (registrados ∪ leídos) y otra sobre las lecturas.
+    """
+    en_ubicacion = _en_ubicacion(sesion)
+    leido = Q(pk__in=_leidos(sesion))
+    resumen = Elemento.objects.filter(en_ubicacion | leido).aggregate(
+        encontrados=Count('pk', filter=en_ubicacion & leido),
+        faltantes=Count('pk', filter=en_ubicacion & ~leido),
+        fuera_de_lugar=Count('pk', filter=leido & ~en_ubicacion),
+    )
+    resumen.update(sesion.lecturas.aggregate(
+        lecturas=Count('pk'),
+        desconocidas=Count('pk', filter=Q(elemento=None)),
+    ))
+    return resumen
+
+
+def conciliacion(sesion):
+    """QuerySets (sin evaluar) de cada grupo de la conciliación."""
+    en_ubicacion = _en_ubicacion(sesion)
+    leidos = _leidos(sesion)
+    return {
+        'encontrados': Elemento.objects.filter(en_ubicacion, pk__in=leidos),
+        'faltantes': Elemento.objects.filter(en_ubicacion).exclude(pk__in=leidos),
+        'fuera_de_lugar': Elemento.objects.filter(pk__in=leidos).exclude(en_ubicacion),
+        'desconocidas': sesion.lecturas.filter(elemento=None),
+    }
@@ -0,0 +1,90 @@
+# inventario/catalogos.py
+"""
+Catálogos (TipoDispositivo y EstadoElemento) en la memoria del proceso.
+
+Son tablas pequeñas que cambian muy de vez en cuando, pero cada formulario,
+filtro o exportación las consultaba. Aquí se cargan una vez por proceso y se
+sirven desde memoria mientras no cambie version_catalogos() (en la caché
+compartida, así que guardar un tipo o estado invalida todos los procesos).
+
+Uso:
+    from inventario.catalogos import catalogo, nombre_catalogo
+
+    catalogo(TipoDispositivo)                  # ((pk, nombre), ...) en el orden del modelo
+    nombre_catalogo(EstadoElemento, 3)         # 'En Uso' (sin JOIN ni consulta)
+
+    tipo_dispositivo = CatalogoChoiceField(queryset=TipoDispositivo.objects.all())
+"""
+from django import forms
+from django.forms.models import ModelChoiceIteratorValue
+
+from .models import EstadoElemento, TipoDispositivo
+from .signals import version_catalogos
+
+MODELOS_CATALOGO = (TipoDispositivo, EstadoElemento)
+
+# label del modelo -> (versión, filas, {pk: nombre})
+_catalogos = {}
+
+
+# ==============================================================================
+# 1. Lectura de los catálogos
+# ==============================================================================
+
+def _cargar(modelo):
+    version = version_catalogos()
+    guardado = _catalogos.get(modelo._meta.label)
+    if guardado is None or guardado[0] != version:
+        filas = tuple(modelo.objects.values_list('pk', 'nombre'))
+        guardado = (version, filas, dict(filas))
+        _catalogos[modelo._meta.label] = guardado
+    return guardado
+
+
+def catalogo(modelo):
+    """Filas (pk, nombre) del catálogo, en el orden del modelo (Meta.ordering)."""
+    return _cargar(modelo)[1]
+
+
+def nombres_catalogo(modelo):
+    """Diccionario {pk: nombre} del catálogo."""
+    return _cargar(modelo)[2]
+
+
+def nombre_catalogo(modelo, pk, defecto=None):
+    return nombres_catalogo(modelo).get(pk, defecto)
+
+
+def precargar_catalogos():
+    """Carga todos los catálogos (ej. al medir consultas en estado estable)."""
+    for modelo in MODELOS_CATALOGO:
+        _cargar(modelo)
+
+
+# ==============================================================================
+# 2. Campos de formulario
+# ==============================================================================
+
+class IteradorCatalogo(forms.models.ModelChoiceIterator):
+    """Opciones de un ModelChoiceField tomadas del catálogo en memoria."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for pk, nombre in catalogo(self.queryset.model):
+            yield (ModelChoiceIteratorValue(pk, None), nombre)
+
+    def __len__(self):
+        return len(catalogo(self.queryset.model)) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(catalogo(self.queryset.model))
+
+
+class CatalogoChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField que dibuja sus opciones sin consultar la BD. Lista el
+    catálogo completo (no aplica filtros del queryset); al validar sigue
+    buscando el valor elegido en el queryset.
+    """
+    iterator = IteradorCatalogo
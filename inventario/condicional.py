@@ -0,0 +1,89 @@
+# inventario/condicional.py
+"""
+Respuestas condicionales (ETag / If-None-Match) para las páginas de consulta.
+
+Si el navegador ya tiene la página y nada de lo que muestra cambió, se
+responde 304 sin consultar los datos ni renderizar la plantilla:
+
+- Detalle de un elemento: la ETag sale de su fecha_actualizacion (una
+  consulta por clave primaria) y de version_catalogos() (los nombres del
+  tipo y del estado).
+- Lista y filtros: la ETag sale de version_datos() y de los parámetros de la
+  URL; la versión vive en la caché, así que no se consulta la BD.
+
+Las páginas llevan además el usuario (menú) y el token CSRF (formulario de
+cierre de sesión), que entran en la ETag. Sin cookie CSRF o con mensajes
+pendientes no hay ETag: la página tiene que renderizarse.
+
+Cache-Control: private, no-cache hace que el navegador revalide siempre y que
+ningún proxy intermedio guarde la página de un usuario.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.messages import get_messages
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import Elemento
+from .signals import version_catalogos, version_datos
+
+
+def _etag(request, *partes):
+    if len(get_messages(request)):  # len() no marca los mensajes como leídos
+        return None
+    if 'CSRF_COOKIE' not in request.META:
+        return None  # Primera visita: la página fija la cookie CSRF al renderizarse
+    usuario = request.user
+    partes += (
+        usuario.pk, usuario.nombre, usuario.apellido, usuario.is_staff,
+        request.META['CSRF_COOKIE'],
+    )
+    # Resumen: la ETag no debe exponer el secreto CSRF
+    return hashlib.md5(repr(partes).encode(), usedforsecurity=False).hexdigest()
+
+
+def etag_elemento(request, pk, **kwargs):
+    """ETag del detalle de un elemento; None si no existe (la vista dará 404)."""
+    fecha = (
+        Elemento.objects.filter(pk=pk).order_by().values_list('fecha_actualizacion', flat=True).first()
+    )
+    if fecha is None:
+        return None
+    return _etag(request, 'elemento', pk, fecha.isoformat(), version_catalogos())
+
+
+def etag_lista(request, *args, **kwargs):
+    """
+    ETag de la lista de elementos con sus filtros y página (sin consultar la BD).
+    Una página armada mientras otra petición guardaba (antes de su COMMIT) no
+    se queda con la ETag: la versión cambia otra vez al confirmar (signals.py).
+    """
+    return _etag(request, 'lista', version_datos(), sorted(request.GET.lists()))
+
+
+def _privada(response):
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def condicional(etag_func):
+    """
+    Como django.views.decorators.http.condition(etag_func=...), añadiendo
+    Cache-Control: private, no-cache (también al 304). Sirve para vistas
+    síncronas y asíncronas, y con method_decorator en las basadas en clases.
+    """
+    def decorador(vista):
+        vista_condicional = condition(etag_func=etag_func)(vista)
+
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envoltura(request, *args, **kwargs):
+                return _privada(await vista_condicional(request, *args, **kwargs))
+        else:
+            @wraps(vista)
+            def envoltura(request, *args, **kwargs):
+                return _privada(vista_condicional(request, *args, **kwargs))
+        return envoltura
+    return decorador
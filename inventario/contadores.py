@@ -0,0 +1,86 @@
+# inventario/contadores.py
+"""
+Verificación de los contadores de inventario (ContadorInventario).
+
+Los contadores se mantienen con deltas en cada guardado, eliminación,
+movimiento de stock o archivado. Si algo los descuadra (un UPDATE manual en
+la BD, una carga masiva que no los sumó), diferencias_contadores() los
+compara con lo que hay en el inventario, recalculado en una sola consulta
+agregada, y reparar=True aplica la diferencia a cada fila.
+
+La corrección también es un delta (registros = registros + diferencia), con
+las filas de contadores bloqueadas mientras se calcula: un guardado que
+ocurra al mismo tiempo espera y suma su cambio sobre el valor corregido.
+
+Las actualizaciones masivas de elementos (QuerySet.update(), que no pasa por
+save()) se hacen con actualizar_elementos() para que no los descuadren.
+"""
+from django.db import router, transaction
+
+from .models import ContadorInventario, Elemento, agregado_contadores
+from .signals import incrementar_version_datos
+
+
+def diferencias_contadores(reparar=False):
+    """
+    Combinaciones (tipo, estado, ubicación) cuyos contadores no coinciden con
+    el inventario: [(clave, (registros, unidades) guardados, (registros, unidades) reales)].
+    Con reparar=True las corrige y elimina las filas que quedaron en cero.
+    """
+    alias = router.db_for_write(ContadorInventario)
+    with transaction.atomic(using=alias):
+        contadores = ContadorInventario.objects.using(alias).order_by()
+        if reparar:
+            contadores = contadores.select_for_update()
+        guardados = {
+            (fila.tipo_dispositivo_id, fila.estado_id, fila.ubicacion_id): (fila.registros, fila.unidades)
+            for fila in contadores
+        }
+        reales = {
+            (fila['tipo_dispositivo_id'], fila['estado_id'], fila['ubicacion_id']): (fila['registros'], fila['unidades'])
+            for fila in agregado_contadores(Elemento.objects.using(alias))
+        }
+
+        diferencias = []
+        for clave in guardados.keys() | reales.keys():
+            guardado, real = guardados.get(clave, (0, 0)), reales.get(clave, (0, 0))
+            if guardado != real:
+                diferencias.append((clave, guardado, real))
+        diferencias.sort(key=lambda d: (d[0][0], d[0][1], d[0][2] or 0))
+
+        if reparar and diferencias:
+            ContadorInventario.aplicar({
+                clave: [real[0] - guardado[0], real[1] - guardado[1]]
+                for clave, guardado, real in diferencias
+            })
+            ContadorInventario.objects.using(alias).filter(registros=0, unidades=0).delete()
+            transaction.on_commit(incrementar_version_datos, using=alias)
+    return diferencias
+
+
+def actualizar_elementos(elementos, **cambios):
+    """
+    elementos.update(**cambios) en una transacción que también suma el cambio
+    a los contadores (agregado de las filas antes y después del UPDATE, con
+    las filas bloqueadas) e invalida la caché del inventario al confirmar.
+    Devuelve el número de elementos actualizados.
+    """
+    alias = router.db_for_write(Elemento)
+    with transaction.atomic(using=alias):
+        pks = list(elementos.using(alias).select_for_update().order_by('pk').values_list('pk', flat=True))
+        if not pks:
+            return 0
+        filas = Elemento.objects.using(alias).filter(pk__in=pks)
+
+        antes = list(agregado_contadores(filas))
+        actualizados = filas.update(**cambios)
+        deltas = {}
+        for signo, agregado in ((-1, antes), (1, agregado_contadores(filas))):
+            for fila in agregado:
+                clave = (fila['tipo_dispositivo_id'], fila['estado_id'], fila['ubicacion_id'])
+                delta = deltas.setdefault(clave, [0, 0])
+                delta[0] += signo * fila['registros']
+                delta[1] += signo * fila['unidades']
+        ContadorInventario.aplicar(deltas)
+        transaction.on_commit(incrementar_version_datos, using=alias)
+    return actualizados
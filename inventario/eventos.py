@@ -0,0 +1,111 @@
+# inventario/eventos.py
+"""
+Avisos en vivo para el dashboard (Server-Sent Events).
+
+Los cambios de Elemento (ver signals.py) se publican, ya confirmados, en un
+canal dentro del proceso; cada navegador con el dashboard abierto tiene una
+suscripción (una asyncio.Queue en el event loop del servidor ASGI) y recibe
+la fila creada/modificada/eliminada sin recargar la página. Los contadores se
+recalculan una vez por versión de los datos para todos los clientes
+(views.estado_dashboard), no una vez por cliente.
+
+El canal no cruza procesos: lo que cambie otro proceso (otro worker, el admin
+bajo WSGI, un comando, un update() masivo) se detecta porque cambia
+version_datos() en la caché compartida, que el flujo revisa en cada latido.
+"""
+import asyncio
+import json
+import threading
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+
+# Eventos pendientes por cliente; si un cliente no lee y se llena, se resincroniza completo
+CAPACIDAD_COLA = 100
+# Con más cambios juntos que esto se envía el estado completo en lugar de fila por fila
+MAX_LOTE = 20
+# Segundos que se esperan tras un cambio para enviar juntos los de una ráfaga
+AGRUPAR = 0.25
+# Segundos entre latidos (mantienen viva la conexión y revisan version_datos())
+LATIDO = 15
+# Espera antes de reconectar (ms). Bajo WSGI cada respuesta se cierra enseguida
+# y el navegador vuelve a preguntar: es un sondeo, no una conexión abierta.
+REINTENTO_ASGI = 3000
+REINTENTO_WSGI = 30000
+
+
+def mensaje_sse(evento, datos, id_evento=None):
+    """Un mensaje en formato text/event-stream."""
+    lineas = [f'event: {evento}']
+    if id_evento is not None:
+        lineas.append(f'id: {id_evento}')
+    lineas.append('data: ' + json.dumps(datos, cls=DjangoJSONEncoder, ensure_ascii=False))
+    return '\n'.join(lineas) + '\n\n'
+
+
+def fila_dashboard(elemento):
+    """Datos de un elemento para la tabla de "últimos registros" (sin consultar el tipo)."""
+    from .catalogos import nombre_catalogo
+    from .models import TipoDispositivo
+
+    return {
+        'id': elemento.pk,
+        'serial': elemento.serial,
+        'tipo': nombre_catalogo(TipoDispositivo, elemento.tipo_dispositivo_id, ''),
+        'marca': elemento.marca,
+        'modelo': elemento.modelo,
+        'localizacion': elemento.localizacion,
+        'fecha_registro': elemento.fecha_registro.strftime('%Y-%m-%d') if elemento.fecha_registro else '',
+        'url': reverse('inventario:ver_elemento', args=[elemento.pk]),
+    }
+
+
+class Suscripcion:
+    """Cola de eventos de un cliente, ligada al event loop que la lee."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.cola = asyncio.Queue(maxsize=CAPACIDAD_COLA)
+        self.desbordada = False
+
+    def entregar(self, evento):
+        # Se ejecuta en el event loop (ver CanalEventos.publicar)
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.desbordada = True
+
+
+class CanalEventos:
+    """Publicación/suscripción dentro del proceso; se publica desde cualquier hilo."""
+
+    def __init__(self):
+        self._suscripciones = set()
+        self._candado = threading.Lock()
+
+    @property
+    def activo(self):
+        return bool(self._suscripciones)
+
+    def suscribir(self):
+        """Nueva suscripción (llamar desde el event loop que la va a leer)."""
+        suscripcion = Suscripcion()
+        with self._candado:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._candado:
+            self._suscripciones.discard(suscripcion)
+
+    def publicar(self, evento, datos):
+        with self._candado:
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion.entregar, (evento, datos))
+            except RuntimeError:  # El event loop ya se cerró
+                self.cancelar(suscripcion)
+
+
+canal = CanalEventos()
@@ -3,7 +3,24 @@ import django_filters
 # Importar forms para usar los Widgets estándar de Django
 from django import forms # <-- Nueva importación
 from django.db import models # <-- Ya estaba importado, pero lo mantenemos
-from .models import Elemento, TipoDispositivo, EstadoElemento
+from django_filters.fields import ModelChoiceField, ModelChoiceIterator
+from .catalogos import IteradorCatalogo
+from .models import Elemento, ElementoArchivado, TipoDispositivo, EstadoElemento
+from .ubicaciones import filtrar_subarbol
+
+
+class IteradorCatalogoFiltro(ModelChoiceIterator, IteradorCatalogo):
+    """Opciones desde el catálogo en memoria, con la opción 'nulo' de django-filter."""
+
+
+class CatalogoFilterField(ModelChoiceField):
+    iterator = IteradorCatalogoFiltro
+
+
+class CatalogoFilter(django_filters.ModelChoiceFilter):
+    """Filtro por tipo o estado que no consulta el catálogo al dibujarse."""
+    field_class = CatalogoFilterField
+
 
 class ElementoFilter(django_filters.FilterSet):
     """
@@ -18,6 +35,18 @@ class ElementoFilter(django_filters.FilterSet):
         widget=forms.TextInput(attrs={'placeholder': 'Serial, Marca, Modelo o Ubicación'}) 
     )
     
+    # Catálogos (opciones servidas desde memoria, ver inventario/catalogos.py)
+    tipo_dispositivo = CatalogoFilter(queryset=TipoDispositivo.objects.all())
+    estado = CatalogoFilter(queryset=EstadoElemento.objects.all())
+
+    # Ubicación con todo lo que cuelga de ella (prefijo de la ruta materializada)
+    # (?ubicacion=Sede Norte - Piso 2 o su ruta 'sede norte/piso 2/')
+    ubicacion = django_filters.CharFilter(
+        method='filtrar_ubicacion',
+        label='Ubicación (incluye sub-ubicaciones)',
+        widget=forms.TextInput(attrs={'placeholder': 'Ej. Sede Norte - Piso 2'}),
+    )
+
     # Filtro por rango de fechas de adquisición
     fecha_desde = django_filters.DateFilter(
         field_name='fecha_adquisicion', 
@@ -34,6 +63,14 @@ class ElementoFilter(django_filters.FilterSet):
         widget=forms.DateInput(attrs={'type': 'date'})
     )
 
+    # Buscar también en el archivo de bajas (ver inventario/archivo.py). No filtra
+    # esta lista: las vistas muestran aparte los archivados con los mismos filtros.
+    archivados = django_filters.BooleanFilter(
+        method='incluir_archivados',
+        label='Incluir elementos archivados',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+
     class Meta:
         model = Elemento
         fields = [
@@ -43,6 +80,12 @@ class ElementoFilter(django_filters.FilterSet):
             'localizacion',
         ]
         
+    def incluir_archivados(self, queryset, name, value):
+        return queryset
+
+    def filtrar_ubicacion(self, queryset, name, value):
+        return filtrar_subarbol(queryset, value) if value else queryset
+
     def filter_global_search(self, queryset, name, value):
         """
         Método de filtrado personalizado para realizar una búsqueda global.
@@ -55,4 +98,22 @@ class ElementoFilter(django_filters.FilterSet):
             models.Q(marca__icontains=value) |
             models.Q(modelo__icontains=value) |
             models.Q(localizacion__icontains=value)
-        ).distinct()
\ No newline at end of file
+        )  # Sin distinct(): todos los campos son de Elemento, no hay filas repetidas
+
+
+class ElementoArchivadoFilter(ElementoFilter):
+    """Los mismos filtros de la lista, sobre ElementoArchivado."""
+
+    class Meta(ElementoFilter.Meta):
+        model = ElementoArchivado
+
+
+def archivados_filtrados(filterset):
+    """
+    Elementos archivados con los filtros de 'filterset' (un ElementoFilter ya
+    validado), o None si no se pidió incluirlos.
+    """
+    if not getattr(filterset.form, 'cleaned_data', {}).get('archivados'):
+        return None
+    queryset = ElementoArchivado.objects.select_related('tipo_dispositivo', 'estado')
+    return ElementoArchivadoFilter(filterset.data, queryset=queryset).qs
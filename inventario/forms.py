@@ -1,12 +1,18 @@
 # inventario/forms.py
 from django import forms
-from .models import Elemento
+from .catalogos import CatalogoChoiceField
+from .models import Elemento, Localizacion, MovimientoStock
+from .ubicaciones import ruta_ubicacion
+from .utils import normalizar_serial
 
 class ElementoForm(forms.ModelForm):
     """
     Formulario para la creación y edición de elementos del inventario.
     Ahora soporta elementos con serial único o por cantidad.
     """
+    # Versión del elemento al abrir el formulario (bloqueo optimista, ver Elemento.save)
+    version = forms.IntegerField(required=False, min_value=1, widget=forms.HiddenInput)
+
     class Meta:
         model = Elemento
         fields = [
@@ -23,6 +29,12 @@ class ElementoForm(forms.ModelForm):
             'precio',
             'imagen',
         ]
+
+        # Tipos y estados se dibujan desde el catálogo en memoria (inventario/catalogos.py)
+        field_classes = {
+            'tipo_dispositivo': CatalogoChoiceField,
+            'estado': CatalogoChoiceField,
+        }
         
         widgets = {
             'fecha_adquisicion': forms.DateInput(attrs={
@@ -69,6 +81,16 @@ class ElementoForm(forms.ModelForm):
         self.fields['cantidad'].widget.attrs.update({
             'data-field': 'cantidad-field'
         })
+
+        if self.instance.pk:
+            self.fields['version'].initial = self.instance.version
+
+        # En un elemento por cantidad ya registrado, la cantidad solo cambia con
+        # movimientos de stock (inventario/stock.py), nunca como valor absoluto.
+        self.cantidad_protegida = bool(self.instance.pk and self.instance.maneja_cantidad)
+        if self.cantidad_protegida:
+            self.fields['cantidad'].disabled = True
+            self.fields['cantidad'].help_text = 'Use "Movimiento de stock" para registrar entradas, salidas o transferencias.'
         
     def clean(self):
         cleaned_data = super().clean()
@@ -92,8 +114,8 @@ class ElementoForm(forms.ModelForm):
             # Limpiar serial
             cleaned_data['serial'] = None
             
-            # Debe tener cantidad válida
-            if not cantidad or cantidad < 1:
+            # Debe tener cantidad válida (si está protegida puede haber quedado en 0 por salidas)
+            if not self.cantidad_protegida and (not cantidad or cantidad < 1):
                 self.add_error('cantidad', 'Debe ingresar una cantidad válida (mínimo 1).')
         
         return cleaned_data
@@ -102,9 +124,81 @@ class ElementoForm(forms.ModelForm):
         """
         Validación y normalización del número de serie.
         """
-        serial = self.cleaned_data.get('serial')
-        if serial:
-            serial = serial.upper().strip()
-            # Solo retornar si tiene contenido real
-            return serial if serial else None
-        return None
\ No newline at end of file
+        # Misma normalización que las lecturas de auditoría (inventario/auditoria.py)
+        return normalizar_serial(self.cleaned_data.get('serial'))
+
+    def save(self, commit=True):
+        elemento = super().save(commit=False)
+        # Si otro usuario guardó desde que se abrió el formulario, Elemento.save
+        # lanza ConflictoEdicion en lugar de sobrescribir sus cambios
+        elemento._version_esperada = self.cleaned_data.get('version')
+        if commit and self.cantidad_protegida and elemento.maneja_cantidad:
+            # No se escribe 'cantidad': así no se pisa un movimiento de stock
+            # aplicado mientras el formulario estaba abierto.
+            campos = [
+                f.name for f in Elemento._meta.concrete_fields
+                if not f.primary_key and f.name != 'cantidad'
+            ]
+            elemento.save(update_fields=campos)
+            self._save_m2m()
+        elif commit:
+            elemento.save()
+            self._save_m2m()
+        return elemento
+
+
+class MovimientoStockForm(forms.Form):
+    """Entrada, salida o transferencia de unidades de un elemento por cantidad."""
+    tipo = forms.ChoiceField(
+        choices=MovimientoStock.Tipo.choices,
+        label='Tipo de Movimiento',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    cantidad = forms.IntegerField(
+        min_value=1,
+        label='Cantidad',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
+    )
+    destino = forms.CharField(
+        max_length=150,
+        required=False,
+        label='Localización de Destino',
+        help_text='Solo para transferencias.',
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+    nota = forms.CharField(
+        max_length=255,
+        required=False,
+        label='Nota',
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ej. Entrega a Sala de Juntas'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('tipo') == MovimientoStock.Tipo.TRANSFERENCIA and not cleaned_data.get('destino', '').strip():
+            self.add_error('destino', 'Indique la localización de destino de la transferencia.')
+        return cleaned_data
+
+
+class SesionAuditoriaForm(forms.Form):
+    """Inicio de una auditoría física sobre una localización existente."""
+    ubicacion = forms.CharField(
+        max_length=150,
+        label='Localización a Auditar',
+        help_text='Se auditan también las localizaciones que cuelgan de ella.',
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ej. Sede Principal - Piso 3'}),
+    )
+    nota = forms.CharField(
+        max_length=255,
+        required=False,
+        label='Nota',
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+
+    def clean_ubicacion(self):
+        # Solo localizaciones registradas: auditar no debe crear niveles nuevos
+        texto = self.cleaned_data['ubicacion']
+        ubicacion = Localizacion.objects.filter(ruta=ruta_ubicacion(texto)).first()
+        if ubicacion is None:
+            raise forms.ValidationError(f'No existe la localización "{texto}".')
+        return ubicacion
@@ -0,0 +1,101 @@
+# inventario/historial.py
+"""
+Consultas sobre el historial de cambios de los elementos (HistorialElemento).
+
+- historial_elemento(pk):      cambios de un elemento, del más antiguo al más reciente.
+- inventario_a_fecha(fecha):   estado del inventario en una fecha pasada.
+
+Para reconstruir el estado en la fecha D no se reproducen todos los cambios:
+se parte de los valores actuales y, para cada campo modificado DESPUÉS de D,
+se toma el 'valor_anterior' del primer cambio posterior a D. Solo se leen las
+filas del historial con fecha > D (un recorrido por rango del índice de fecha),
+así que consultar fechas recientes es barato aunque el historial sea grande.
+
+Los elementos que ya existían antes de activar el historial no tienen fila de
+creación: se consideran existentes desde su fecha_registro.
+
+El archivado (inventario/archivo.py) cuenta como una eliminación y la
+restauración como una creación: un elemento archivado en la fecha D no
+estaba en el inventario activo.
+"""
+from django.db import connection
+
+from .models import CAMPOS_HISTORIAL, Elemento, HistorialElemento
+
+Accion = HistorialElemento.Accion
+# Acciones con las que un elemento entra al inventario activo o sale de él
+ALTAS = {Accion.CREACION, Accion.RESTAURACION}
+SALIDAS = {Accion.ELIMINACION, Accion.ARCHIVADO}
+
+
+def historial_elemento(elemento_id):
+    """Cambios de un elemento (también si ya fue eliminado), en orden cronológico."""
+    return (
+        HistorialElemento.objects
+        .filter(elemento_id=elemento_id)
+        .select_related('usuario')
+        .order_by('fecha', 'id')
+    )
+
+
+def primeros_cambios_desde(fecha):
+    """
+    Primer cambio de cada (elemento, campo) posterior a 'fecha'.
+    En PostgreSQL usa DISTINCT ON; en otros motores se filtra en Python.
+    """
+    cambios = (
+        HistorialElemento.objects
+        .filter(fecha__gt=fecha)
+        .order_by('elemento_id', 'campo', 'fecha', 'id')
+        .values_list('elemento_id', 'campo', 'accion', 'valor_anterior')
+    )
+    if connection.vendor == 'postgresql':
+        return list(cambios.distinct('elemento_id', 'campo'))
+
+    primeros, vistos = [], set()
+    for fila in cambios.iterator():
+        if fila[:2] not in vistos:
+            vistos.add(fila[:2])
+            primeros.append(fila)
+    return primeros
+
+
+def _convertir(campo, texto):
+    """Texto del historial -> valor Python del campo (ej. '12.50' -> Decimal)."""
+    if texto is None:
+        return None
+    return Elemento._meta.get_field(campo.removesuffix('_id')).to_python(texto)
+
+
+def inventario_a_fecha(fecha):
+    """
+    Estado de cada elemento que existía en 'fecha', como diccionarios
+    {'id': ..., 'marca': ..., 'estado_id': ..., ...} ordenados por id.
+    """
+    anteriores = {}
+    for elemento_id, campo, accion, valor_anterior in primeros_cambios_desde(fecha):
+        anteriores.setdefault(elemento_id, {})[campo] = (accion, valor_anterior)
+
+    estado = {}
+    # Elementos que siguen existiendo y ya estaban registrados en esa fecha
+    vigentes = Elemento.objects.filter(fecha_registro__lte=fecha).values('id', *CAMPOS_HISTORIAL).order_by()
+    for valores in vigentes.iterator():
+        cambios = anteriores.pop(valores['id'], {})
+        if any(accion in ALTAS for accion, _ in cambios.values()):
+            continue  # Creado (o restaurado del archivo) después de la fecha
+        for campo, (_accion, valor_anterior) in cambios.items():
+            valores[campo] = _convertir(campo, valor_anterior)
+        estado[valores['id']] = valores
+
+    # Elementos eliminados o archivados después de la fecha (quedan solo en el historial)
+    for elemento_id, cambios in anteriores.items():
+        acciones = {accion for accion, _ in cambios.values()}
+        if acciones & ALTAS or not acciones & SALIDAS:
+            continue  # Creado o restaurado después de la fecha, o sin datos para reconstruirlo
+        valores = {'id': elemento_id}
+        for campo in CAMPOS_HISTORIAL:
+            if campo in cambios:
+                valores[campo] = _convertir(campo, cambios[campo][1])
+        estado[elemento_id] = valores
+
+    return [estado[pk] for pk in sorted(estado)]
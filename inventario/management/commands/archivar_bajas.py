@@ -0,0 +1,64 @@
+# inventario/management/commands/archivar_bajas.py
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.archivo import archivar_bajas, candidatos, restaurar
+
+
+class Command(BaseCommand):
+    """
+    Mueve al archivo (ElementoArchivado) los elementos de baja sin cambios
+    desde hace más de --meses meses, por lotes de una transacción cada uno
+    (ver inventario/archivo.py). Se puede interrumpir y volver a ejecutar:
+    continúa con lo que falte.
+
+    Uso:
+        python manage.py archivar_bajas --simular
+        python manage.py archivar_bajas --meses 24 --lote 1000 --pausa 0.5
+        python manage.py archivar_bajas --restaurar 15 16 17
+    """
+    help = 'Archiva los elementos dados de baja hace tiempo (o restaura elementos archivados).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses', type=int, default=settings.ARCHIVO_MESES,
+            help=f'Meses sin cambios para archivar un elemento de baja (por defecto {settings.ARCHIVO_MESES}).',
+        )
+        parser.add_argument('--lote', type=int, default=500, help='Elementos por transacción.')
+        parser.add_argument('--pausa', type=float, default=0, help='Segundos de espera entre lotes.')
+        parser.add_argument('--simular', action='store_true', help='Solo cuenta los elementos que se archivarían.')
+        parser.add_argument(
+            '--restaurar', type=int, nargs='+', metavar='ID',
+            help='Devuelve al inventario los elementos archivados con esos ids.',
+        )
+
+    def handle(self, *args, **options):
+        if options['restaurar']:
+            try:
+                restaurados = restaurar(options['restaurar'])
+            except ValidationError as error:
+                raise CommandError(error.messages[0])
+            self.stdout.write(self.style.SUCCESS(f'{restaurados} elementos restaurados al inventario.'))
+            return
+
+        if options['meses'] < 0 or options['lote'] < 1:
+            raise CommandError('--meses no puede ser negativo y --lote debe ser al menos 1.')
+
+        if options['simular']:
+            total = candidatos(options['meses']).count()
+            self.stdout.write(f"{total} elementos de baja sin cambios desde hace más de {options['meses']} meses.")
+            return
+
+        inicio = time.perf_counter()
+        total = lotes = 0
+        for archivados, ultimo in archivar_bajas(options['meses'], options['lote'], options['pausa']):
+            total += archivados
+            lotes += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Lote {lotes}: {archivados} archivados (hasta el id {ultimo}).')
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} elementos archivados en {lotes} lotes ({time.perf_counter() - inicio:.1f} s).'
+        ))
@@ -0,0 +1,93 @@
+# inventario/management/commands/benchmark_conexiones.py
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import ConnectionHandler
+
+
+class Command(BaseCommand):
+    """
+    Mide la latencia por petición de la base de datos con tres configuraciones:
+
+    - sin_persistencia: CONN_MAX_AGE = 0 (una conexión TCP + autenticación por petición)
+    - persistente:      CONN_MAX_AGE > 0 con health checks
+    - pool:             pool de psycopg 3 (solo si psycopg_pool está instalado)
+
+    Cada "petición" reproduce lo que hace Django en request_started/request_finished
+    (close_if_unusable_or_obsolete) alrededor de una consulta típica.
+
+    Uso:
+        python manage.py benchmark_conexiones --peticiones 500
+    """
+    help = 'Compara la latencia por petición con y sin conexiones persistentes/pool contra PostgreSQL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=200, help='Peticiones simuladas por configuración.')
+        parser.add_argument(
+            '--consulta',
+            default='SELECT id, serial FROM inventario_elemento ORDER BY id LIMIT 1',
+            help='Consulta SQL que se ejecuta en cada petición.',
+        )
+
+    def handle(self, *args, **options):
+        base = dict(settings.DATABASES['default'])
+        if base['ENGINE'] != 'django.db.backends.postgresql':
+            raise CommandError('Este benchmark está pensado para PostgreSQL (DATABASES["default"]).')
+
+        base['OPTIONS'] = {k: v for k, v in base.get('OPTIONS', {}).items() if k != 'pool'}
+        configuraciones = {
+            'sin_persistencia': {**base, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+            'persistente': {**base, 'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True},
+        }
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            self.stdout.write(self.style.WARNING('psycopg_pool no está instalado: se omite la configuración "pool".'))
+        else:
+            configuraciones['pool'] = {
+                **base,
+                'CONN_MAX_AGE': 0,
+                'OPTIONS': {**base['OPTIONS'], 'pool': {'min_size': 1, 'max_size': 4}},
+            }
+
+        # ConnectionHandler exige un alias 'default'; se usa uno independiente
+        # para no tocar las conexiones reales del proceso.
+        handler = ConnectionHandler({'default': configuraciones['sin_persistencia'], **configuraciones})
+        self.stdout.write(f"{'configuración':<18}{'media ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+        for alias in configuraciones:
+            conexion = handler[alias]
+            try:
+                tiempos = self._medir(conexion, options['consulta'], options['peticiones'])
+            finally:
+                conexion.close()
+                if hasattr(conexion, 'close_pool'):
+                    conexion.close_pool()
+
+            percentiles = statistics.quantiles(tiempos, n=100)
+            self.stdout.write(
+                f'{alias:<18}{statistics.mean(tiempos):>10.2f}{statistics.median(tiempos):>10.2f}'
+                f'{percentiles[94]:>10.2f}{percentiles[98]:>10.2f}'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark finalizado.'))
+
+    @staticmethod
+    def _medir(conexion, consulta, peticiones):
+        # Calentamiento (primera conexión / llenado del pool)
+        with conexion.cursor() as cursor:
+            cursor.execute(consulta)
+        conexion.close_if_unusable_or_obsolete()
+
+        tiempos = []
+        for _ in range(peticiones):
+            inicio = time.perf_counter()
+            conexion.close_if_unusable_or_obsolete()  # request_started
+            with conexion.cursor() as cursor:
+                cursor.execute(consulta)
+                cursor.fetchall()
+            conexion.close_if_unusable_or_obsolete()  # request_finished
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return tiempos
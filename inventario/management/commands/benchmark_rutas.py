@@ -0,0 +1,208 @@
+# inventario/management/commands/benchmark_rutas.py
+import json
+import math
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from inventario.models import ORDEN_INDICE, Elemento
+from inventario.views import ListaInventarioView
+from inventario_tecnologico.metricas import ContadorConsultas
+
+from .generar_datos import DOMINIO_SINTETICO
+
+EMAIL_BENCHMARK = f'benchmark@{DOMINIO_SINTETICO}'
+PASSWORD_BENCHMARK = 'benchmark123'
+
+
+class Command(BaseCommand):
+    """
+    Mide las rutas más usadas del inventario con el cliente de pruebas de Django
+    (en el mismo proceso, sin red): dashboard, lista (primera página, página
+    profunda y búsquedas), detalle, exportaciones Excel/PDF e inicio de sesión.
+
+    Por cada ruta guarda media, p50, p95, mínimo, máximo y número de consultas
+    SQL en un archivo JSON. Con --comparar se contrasta contra un resultado
+    anterior y el comando termina con error si alguna ruta empeora más que --umbral.
+
+    Uso:
+        python manage.py generar_datos --elementos 100000
+        python manage.py benchmark_rutas --salida base.json
+        python manage.py benchmark_rutas --salida nuevo.json --comparar base.json --umbral 0.2
+    """
+    help = 'Ejecuta el benchmark de las rutas principales y opcionalmente lo compara con uno anterior.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=10, help='Mediciones por ruta.')
+        parser.add_argument(
+            '--repeticiones-exportacion', type=int, default=2,
+            help='Mediciones de las exportaciones (son mucho más lentas).',
+        )
+        parser.add_argument('--rutas', nargs='*', help='Solo medir estas rutas (por nombre).')
+        parser.add_argument('--salida', default='benchmark.json', help='Archivo JSON de resultados.')
+        parser.add_argument('--comparar', help='Archivo JSON de referencia.')
+        parser.add_argument(
+            '--umbral', type=float, default=0.2,
+            help='Regresión tolerada sobre el p50 de referencia (0.2 = 20%%).',
+        )
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla para elegir elementos y páginas.')
+
+    def handle(self, *args, **options):
+        total = Elemento.objects.count()
+        if not total:
+            raise CommandError('No hay elementos. Ejecute primero "python manage.py generar_datos".')
+
+        self.rng = random.Random(options['semilla'])
+        self.cliente = self._cliente_autenticado()
+
+        rutas = self._rutas(total)
+        if options['rutas']:
+            desconocidas = set(options['rutas']) - set(rutas)
+            if desconocidas:
+                raise CommandError(f"Rutas desconocidas: {', '.join(sorted(desconocidas))}")
+            rutas = {nombre: rutas[nombre] for nombre in options['rutas']}
+
+        resultados = {}
+        self.stdout.write(f"{'ruta':<22}{'media ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'consultas':>10}")
+        for nombre, (peticion, exportacion) in rutas.items():
+            repeticiones = options['repeticiones_exportacion'] if exportacion else options['repeticiones']
+            resultados[nombre] = self._medir(peticion, repeticiones)
+            r = resultados[nombre]
+            self.stdout.write(
+                f"{nombre:<22}{r['media_ms']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+                f"{r['consultas']:>10}"
+            )
+
+        informe = {
+            'fecha': timezone.now().isoformat(),
+            'motor': connection.vendor,
+            'elementos': total,
+            'repeticiones': options['repeticiones'],
+            'rutas': resultados,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+        if options['comparar']:
+            self._comparar(resultados, options['comparar'], options['umbral'])
+
+    # --------------------------------------------------------------------------
+    # Preparación
+    # --------------------------------------------------------------------------
+
+    def _cliente_autenticado(self):
+        Usuario = get_user_model()
+        usuario = Usuario.objects.filter(email=EMAIL_BENCHMARK).first()
+        if usuario is None:
+            usuario = Usuario.objects.create_user(
+                EMAIL_BENCHMARK, PASSWORD_BENCHMARK,
+                nombre='Benchmark', apellido='Rutas', is_approved=True,
+            )
+
+        # El cliente de pruebas usa 'testserver'; se reemplaza por un host permitido
+        hosts = [h for h in settings.ALLOWED_HOSTS if h and not h.startswith(('.', '*'))]
+        cliente = Client(SERVER_NAME=hosts[0] if hosts else 'localhost')
+        cliente.force_login(usuario)
+        return cliente
+
+    def _rutas(self, total):
+        """nombre -> (función que hace una petición, es_exportacion)."""
+        paginas = max(1, math.ceil(total / ListaInventarioView.paginate_by))
+        lista = reverse('inventario:lista_inventario')
+        muestra = Elemento.objects.exclude(serial=None).order_by(*ORDEN_INDICE).values_list('marca', 'serial').first()
+        marca, serial = muestra if muestra else ('', '')
+        pk_min = Elemento.objects.order_by('pk').values_list('pk', flat=True).first()
+        pk_max = Elemento.objects.order_by('-pk').values_list('pk', flat=True).first()
+
+        def detalle():
+            # Primer pk existente a partir de uno aleatorio (puede haber huecos)
+            inicio = self.rng.randint(pk_min, pk_max)
+            pk = Elemento.objects.filter(pk__gte=inicio).order_by('pk').values_list('pk', flat=True).first()
+            return self.cliente.get(reverse('inventario:ver_elemento', args=[pk]))
+
+        def login():
+            cliente = Client(SERVER_NAME=self.cliente.defaults['SERVER_NAME'])
+            return cliente.post(
+                reverse('usuarios:login'), {'username': EMAIL_BENCHMARK, 'password': PASSWORD_BENCHMARK},
+            )
+
+        return {
+            'dashboard': (lambda: self.cliente.get(reverse('inventario:dashboard')), False),
+            'lista_primera_pagina': (lambda: self.cliente.get(lista), False),
+            'lista_pagina_media': (lambda: self.cliente.get(lista, {'page': max(1, paginas // 2)}), False),
+            'lista_ultima_pagina': (lambda: self.cliente.get(lista, {'page': paginas}), False),
+            'lista_busqueda_marca': (lambda: self.cliente.get(lista, {'q': marca}), False),
+            'lista_busqueda_serial': (lambda: self.cliente.get(lista, {'q': serial}), False),
+            'detalle': (detalle, False),
+            'exportar_excel': (lambda: self.cliente.get(reverse('exportacion:exportar_excel')), True),
+            'exportar_pdf': (lambda: self.cliente.get(reverse('exportacion:exportar_pdf')), True),
+            'login': (login, False),
+        }
+
+    # --------------------------------------------------------------------------
+    # Medición y comparación
+    # --------------------------------------------------------------------------
+
+    @staticmethod
+    def _medir(peticion, repeticiones):
+        peticion()  # Calentamiento (cachés, plantillas compiladas, conexión)
+
+        tiempos = []
+        consultas = 0
+        for _ in range(max(1, repeticiones)):
+            contador = ContadorConsultas()
+            inicio = time.perf_counter()
+            with connection.execute_wrapper(contador):
+                response = peticion()
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas = max(consultas, contador.cantidad)
+            if response.status_code >= 400:
+                raise CommandError(f'La petición respondió {response.status_code}.')
+
+        return {
+            'media_ms': round(statistics.mean(tiempos), 2),
+            'p50_ms': round(statistics.median(tiempos), 2),
+            'p95_ms': round(sorted(tiempos)[max(0, math.ceil(len(tiempos) * 0.95) - 1)], 2),
+            'min_ms': round(min(tiempos), 2),
+            'max_ms': round(max(tiempos), 2),
+            'consultas': consultas,
+            'repeticiones': len(tiempos),
+        }
+
+    def _comparar(self, resultados, archivo_referencia, umbral):
+        try:
+            with open(archivo_referencia, encoding='utf-8') as archivo:
+                referencia = json.load(archivo)['rutas']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'No se pudo leer la referencia "{archivo_referencia}": {e}')
+
+        regresiones = []
+        self.stdout.write(f"\n{'ruta':<22}{'ref p50':>10}{'p50':>10}{'cambio':>10}")
+        for nombre, actual in resultados.items():
+            if nombre not in referencia:
+                continue
+            base = referencia[nombre]['p50_ms']
+            cambio = (actual['p50_ms'] - base) / base if base else 0.0
+            linea = f"{nombre:<22}{base:>10.1f}{actual['p50_ms']:>10.1f}{cambio:>+10.0%}"
+            if cambio > umbral:
+                regresiones.append(nombre)
+                self.stdout.write(self.style.ERROR(linea))
+            else:
+                self.stdout.write(linea)
+
+        if regresiones:
+            raise CommandError(
+                f"Regresión de más del {umbral:.0%} en: {', '.join(regresiones)}"
+            )
+        self.stdout.write(self.style.SUCCESS(f'Sin regresiones por encima del {umbral:.0%}.'))
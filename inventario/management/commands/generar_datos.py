@@ -0,0 +1,238 @@
+# inventario/management/commands/generar_datos.py
+import datetime
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from inventario.models import ContadorInventario, Elemento, EstadoElemento, Localizacion, TipoDispositivo
+from inventario.signals import incrementar_version_datos
+
+# Dominio de los usuarios sintéticos: permite identificar (y borrar) los datos generados
+DOMINIO_SINTETICO = 'datos-sinteticos.local'
+
+# Fecha por defecto desde la que se reparten hacia atrás las fechas de los
+# elementos (--fecha). Fija para que la misma --semilla dé los mismos datos
+# cualquier día que se ejecute.
+FECHA_REFERENCIA = datetime.date(2026, 1, 1)
+
+# ==============================================================================
+# 1. Distribuciones (pesos relativos)
+# ==============================================================================
+
+# tipo -> (peso, marcas, rango de precio, maneja cantidad)
+TIPOS = {
+    'Laptop': (25, ['Lenovo', 'HP', 'Dell', 'Asus', 'Apple', 'Acer'], (1800000, 7500000), False),
+    'Computador de Escritorio': (15, ['HP', 'Dell', 'Lenovo', 'Janus'], (1500000, 5000000), False),
+    'Monitor': (18, ['Samsung', 'LG', 'Dell', 'HP', 'AOC'], (400000, 1800000), False),
+    'Impresora': (5, ['Epson', 'HP', 'Brother', 'Kyocera'], (500000, 4000000), False),
+    'Servidor': (2, ['Dell', 'HP', 'Lenovo'], (12000000, 60000000), False),
+    'Switch': (3, ['Cisco', 'TP-Link', 'Ubiquiti', 'HP Aruba'], (300000, 9000000), False),
+    'Access Point': (3, ['Ubiquiti', 'TP-Link', 'Cisco'], (250000, 1500000), False),
+    'Proyector': (2, ['Epson', 'BenQ', 'ViewSonic'], (1200000, 4500000), False),
+    'Tablet': (4, ['Samsung', 'Apple', 'Lenovo'], (700000, 4000000), False),
+    'Teléfono IP': (5, ['Grandstream', 'Yealink', 'Cisco'], (150000, 900000), False),
+    'UPS': (2, ['APC', 'CDP', 'Eaton'], (300000, 6000000), False),
+    'Mouse': (6, ['Logitech', 'Genius', 'HP', 'Microsoft'], (20000, 150000), True),
+    'Teclado': (5, ['Logitech', 'Genius', 'HP', 'Microsoft'], (30000, 250000), True),
+    'Cable HDMI': (3, ['Genérico', 'Ugreen', 'Belkin'], (10000, 60000), True),
+    'Adaptador': (2, ['Genérico', 'Ugreen', 'Anker'], (15000, 120000), True),
+}
+
+ESTADOS = {
+    'En Uso': 70,
+    'Almacén': 12,
+    'En Reparacion': 8,
+    'Fuera de Servicio': 5,
+    'Baja': 5,
+}
+
+SEDES = ['Sede Principal', 'Sede Norte', 'Sede Sur', 'Bodega Central', 'Sede Rural']
+PESOS_SEDES = [50, 20, 15, 10, 5]
+AREAS = ['Sistemas', 'Contabilidad', 'Dirección', 'Psicología', 'Trabajo Social', 'Recepción', 'Archivo', 'Auditorio']
+
+NOMBRES = ['Ana', 'Carlos', 'Diana', 'Felipe', 'Juliana', 'Andrés', 'Laura', 'Mateo', 'Sofía', 'Camilo']
+APELLIDOS = ['Gómez', 'Rodríguez', 'Martínez', 'López', 'García', 'Hernández', 'Pérez', 'Sánchez']
+
+
+@contextmanager
+def fechas_manuales():
+    """Desactiva auto_now/auto_now_add para poder repartir las fechas en el tiempo."""
+    registro = Elemento._meta.get_field('fecha_registro')
+    actualizacion = Elemento._meta.get_field('fecha_actualizacion')
+    registro.auto_now_add = actualizacion.auto_now = False
+    try:
+        yield
+    finally:
+        registro.auto_now_add = actualizacion.auto_now = True
+
+
+# ==============================================================================
+# 2. Comando
+# ==============================================================================
+
+class Command(BaseCommand):
+    """
+    Genera un inventario sintético reproducible (misma --semilla y --fecha =
+    mismos datos) para pruebas de carga: de 10.000 a 1.000.000 de elementos con
+    bulk_create. Las fechas de adquisición, registro y actualización caen en
+    los 8 años anteriores a --fecha.
+
+    Los usuarios se crean como usuarioN@datos-sinteticos.local (aprobados, con la
+    contraseña de --password) y son los que registran los elementos; --limpiar
+    borra solo lo que pertenece a esos usuarios.
+
+    Uso:
+        python manage.py generar_datos --elementos 100000 --semilla 7
+        python manage.py generar_datos --fecha 2026-10-01
+        python manage.py generar_datos --limpiar
+    """
+    help = 'Genera datos sintéticos de inventario (catálogos, usuarios y elementos) para benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--elementos', type=int, default=10000, help='Cantidad de elementos a generar.')
+        parser.add_argument('--usuarios', type=int, default=25, help='Cantidad de usuarios sintéticos.')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio.')
+        parser.add_argument(
+            '--fecha', type=datetime.date.fromisoformat, default=FECHA_REFERENCIA,
+            help=f'Fecha de referencia AAAA-MM-DD: ninguna fecha generada es posterior (por defecto {FECHA_REFERENCIA}).',
+        )
+        parser.add_argument('--lote', type=int, default=5000, help='Tamaño de cada bulk_create.')
+        parser.add_argument('--password', default='benchmark123', help='Contraseña de los usuarios sintéticos.')
+        parser.add_argument('--limpiar', action='store_true', help='Borra los datos sintéticos existentes antes de generar.')
+
+    def handle(self, *args, **options):
+        Usuario = get_user_model()
+        sinteticos = Usuario.objects.filter(email__endswith='@' + DOMINIO_SINTETICO)
+
+        if options['limpiar']:
+            borrados = self._borrar_elementos(sinteticos, options['lote'])
+            sinteticos.delete()
+            self.stdout.write(f'Datos sintéticos anteriores eliminados ({borrados} registros).')
+            if options['elementos'] <= 0:
+                return
+        elif sinteticos.exists():
+            raise CommandError('Ya existen datos sintéticos. Use --limpiar para regenerarlos.')
+
+        if options['usuarios'] < 1:
+            raise CommandError('Se necesita al menos un usuario sintético.')
+
+        rng = random.Random(options['semilla'])
+        tipos, estados = self._catalogos()
+        usuarios = self._usuarios(options['usuarios'], options['password'], rng)
+        self._elementos(
+            options['elementos'], options['lote'], options['semilla'], options['fecha'], rng, tipos, estados, usuarios,
+        )
+        # bulk_create no envía post_save: se invalida la caché a mano
+        incrementar_version_datos()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generados {options['elementos']} elementos y {len(usuarios)} usuarios (semilla {options['semilla']})."
+        ))
+
+    @staticmethod
+    def _borrar_elementos(usuarios, lote):
+        """Borra por lotes: delete() carga los objetos para enviar las señales."""
+        elementos = Elemento.objects.filter(usuario_registro__in=usuarios).order_by('pk')
+        borrados = 0
+        while True:
+            pks = list(elementos.values_list('pk', flat=True)[:lote])
+            if not pks:
+                return borrados
+            with transaction.atomic():
+                borrados += Elemento.objects.filter(pk__in=pks).delete()[1].get('inventario.Elemento', 0)
+
+    def _catalogos(self):
+        tipos = {nombre: TipoDispositivo.objects.get_or_create(nombre=nombre)[0] for nombre in TIPOS}
+        estados = {nombre: EstadoElemento.objects.get_or_create(nombre=nombre)[0] for nombre in ESTADOS}
+        return tipos, estados
+
+    def _usuarios(self, cantidad, password, rng):
+        Usuario = get_user_model()
+        # Un solo hash para todos: hashear 'cantidad' veces tardaría minutos
+        password_hash = make_password(password)
+        usuarios = [
+            Usuario(
+                email=f'usuario{n}@{DOMINIO_SINTETICO}',
+                nombre=rng.choice(NOMBRES),
+                apellido=rng.choice(APELLIDOS),
+                password=password_hash,
+                is_approved=True,
+                is_staff=(n == 0),
+            )
+            for n in range(cantidad)
+        ]
+        Usuario.objects.bulk_create(usuarios)
+        return list(Usuario.objects.filter(email__endswith='@' + DOMINIO_SINTETICO).order_by('pk'))
+
+    def _elementos(self, cantidad, lote, semilla, fecha, rng, tipos, estados, usuarios):
+        nombres_tipos = list(TIPOS)
+        pesos_tipos = [TIPOS[n][0] for n in nombres_tipos]
+        nombres_estados = list(ESTADOS)
+        pesos_estados = list(ESTADOS.values())
+        # Pocos usuarios registran la mayoría de los elementos
+        pesos_usuarios = [1 / (i + 1) for i in range(len(usuarios))]
+
+        # bulk_create no pasa por Elemento.save(): la jerarquía de localizaciones
+        # se resuelve aquí (una vez por texto distinto)
+        ubicaciones = {}
+
+        def ubicacion(texto):
+            if texto not in ubicaciones:
+                ubicaciones[texto] = Localizacion.desde_texto(texto)
+            return ubicaciones[texto]
+
+        # Fin de la jornada del día de referencia (no del momento en que se ejecuta)
+        hoy = timezone.make_aware(datetime.datetime.combine(fecha, datetime.time(18)))
+        creados = 0
+        with fechas_manuales():
+            while creados < cantidad:
+                bloque = []
+                for indice in range(creados, min(creados + lote, cantidad)):
+                    nombre_tipo = rng.choices(nombres_tipos, pesos_tipos)[0]
+                    _peso, marcas, (precio_min, precio_max), maneja_cantidad = TIPOS[nombre_tipo]
+                    marca = rng.choice(marcas)
+
+                    adquisicion = hoy.date() - datetime.timedelta(days=rng.randint(0, 365 * 8))
+                    registro = timezone.make_aware(
+                        datetime.datetime.combine(adquisicion, datetime.time(8))
+                    ) + datetime.timedelta(days=rng.randint(0, 30), minutes=rng.randint(0, 600))
+                    registro = min(registro, hoy)
+                    actualizacion = min(registro + datetime.timedelta(days=rng.expovariate(1 / 60)), hoy)
+                    lugar = ubicacion(
+                        f'{rng.choices(SEDES, PESOS_SEDES)[0]} - Piso {rng.randint(1, 5)} - {rng.choice(AREAS)}'
+                    )
+
+                    bloque.append(Elemento(
+                        maneja_cantidad=maneja_cantidad,
+                        cantidad=rng.randint(1, 200) if maneja_cantidad else 1,
+                        tipo_dispositivo=tipos[nombre_tipo],
+                        marca=marca,
+                        modelo=f'{marca[:3].upper()}-{rng.randint(100, 9999)}',
+                        serial=None if maneja_cantidad else f'SIN-{semilla}-{indice:07d}',
+                        localizacion=lugar.nombre_completo,
+                        ubicacion=lugar,
+                        estado=estados[rng.choices(nombres_estados, pesos_estados)[0]],
+                        descripcion=rng.choice(['', '', 'Equipo asignado por contrato.', 'Revisado en el último inventario.']),
+                        fecha_adquisicion=adquisicion,
+                        precio=(
+                            None if rng.random() < 0.1
+                            else Decimal(rng.randrange(precio_min, precio_max, 1000))
+                        ),
+                        usuario_registro=rng.choices(usuarios, pesos_usuarios)[0],
+                        fecha_registro=registro,
+                        fecha_actualizacion=actualizacion,
+                    ))
+
+                # bulk_create no llama a save()/full_clean(): los datos ya respetan
+                # las reglas de Elemento.clean() (serial único o cantidad >= 1).
+                with transaction.atomic():
+                    Elemento.objects.bulk_create(bloque, batch_size=lote)
+                    ContadorInventario.sumar_elementos(bloque)
+                creados += len(bloque)
+                self.stdout.write(f'  {creados}/{cantidad} elementos...')
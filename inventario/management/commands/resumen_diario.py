@@ -0,0 +1,43 @@
+# inventario/management/commands/resumen_diario.py
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventario.resumenes import guardar_resumenes
+
+
+class Command(BaseCommand):
+    """
+    Guarda el resumen diario del inventario (registros y unidades por tipo,
+    estado y ubicación) que usan las tendencias del dashboard. Programarlo
+    una vez al día; con --desde o --dias reconstruye también los días
+    anteriores a partir de las fechas de los elementos y del historial (ver
+    inventario/resumenes.py).
+
+    Uso:
+        python manage.py resumen_diario
+        python manage.py resumen_diario --dias 365
+        python manage.py resumen_diario --desde 2024-01-01 --reemplazar
+    """
+    help = 'Guarda el resumen diario del inventario (y reconstruye los días anteriores que falten).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=datetime.date.fromisoformat, metavar='AAAA-MM-DD',
+                            help='Reconstruye los resúmenes desde esa fecha.')
+        parser.add_argument('--dias', type=int, help='Reconstruye los resúmenes de los últimos N días.')
+        parser.add_argument('--reemplazar', action='store_true',
+                            help='Vuelve a calcular también los días que ya tienen resumen.')
+
+    def handle(self, *args, **options):
+        desde = options['desde']
+        if options['dias'] is not None:
+            if options['dias'] < 0:
+                raise CommandError('--dias no puede ser negativo.')
+            desde_dias = timezone.localdate() - datetime.timedelta(days=options['dias'])
+            desde = min(desde, desde_dias) if desde else desde_dias
+
+        guardados = guardar_resumenes(desde, reemplazar=options['reemplazar'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(guardados)} días guardados ({min(guardados)} a {max(guardados)}).'
+        ))
@@ -0,0 +1,141 @@
+# inventario/management/commands/tiempo_arranque.py
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Se ejecuta en un proceso nuevo: importa la aplicación como lo hace el servidor
+# y carga las URLs (la primera petición importa así todas las vistas)
+SCRIPT = """
+import json, time
+inicio = time.perf_counter()
+from inventario_tecnologico.{modulo} import application
+aplicacion = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+fin = time.perf_counter()
+print(json.dumps({{'aplicacion': aplicacion - inicio, 'urls': fin - aplicacion}}))
+"""
+
+# Línea de 'python -X importtime': "import time:   self [us] | cumulative | módulo" (sangría = nivel)
+_LINEA_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+
+class Command(BaseCommand):
+    """
+    Mide el arranque en frío de un worker: cuánto tarda un proceso nuevo en
+    importar la aplicación WSGI (o ASGI) y resolver las URLs, y qué módulos se
+    llevan ese tiempo (con 'python -X importtime').
+
+    El tiempo total es el de procesos completos (intérprete incluido) sin
+    -X importtime, que agrega su propio costo; el desglose sale de una
+    ejecución aparte con -X importtime. Sirve para detectar librerías pesadas
+    que se importan al arrancar aunque casi ninguna petición las use (ver
+    exportacion/motores.py).
+
+    Uso:
+        python manage.py tiempo_arranque
+        python manage.py tiempo_arranque --asgi --top 30 --paquetes
+    """
+    help = 'Mide el tiempo de arranque de un worker y el tiempo de importación por módulo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asgi', action='store_true', help='Medir la aplicación ASGI en lugar de la WSGI.')
+        parser.add_argument('--repeticiones', type=int, default=3, help='Procesos medidos para el tiempo total.')
+        parser.add_argument('--top', type=int, default=20, help='Módulos más lentos a mostrar.')
+        parser.add_argument(
+            '--paquetes', action='store_true',
+            help='Agrupar por paquete de primer nivel (django, reportlab, openpyxl...).',
+        )
+        parser.add_argument('--json', action='store_true', help='Resultado en JSON.')
+
+    def handle(self, *args, **options):
+        comando = [sys.executable, '-c', SCRIPT.format(modulo='asgi' if options['asgi'] else 'wsgi')]
+        entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+
+        procesos, fases = [], []
+        for _ in range(max(options['repeticiones'], 1)):
+            inicio = time.perf_counter()
+            resultado = self._ejecutar(comando, entorno)
+            procesos.append(time.perf_counter() - inicio)
+            fases.append(json.loads(resultado.stdout.strip().splitlines()[-1]))
+
+        resultado = self._ejecutar([sys.executable, '-X', 'importtime'] + comando[1:], entorno)
+        modulos = self._importaciones(resultado.stderr)
+        if options['paquetes']:
+            ranking = self._por_paquete(modulos)
+        else:
+            ranking = sorted(modulos, key=lambda m: m['acumulado_ms'], reverse=True)
+        ranking = ranking[:options['top']]
+
+        resumen = {
+            'aplicacion': 'asgi' if options['asgi'] else 'wsgi',
+            'proceso_ms': round(statistics.median(procesos) * 1000, 1),
+            'aplicacion_ms': round(statistics.median(f['aplicacion'] for f in fases) * 1000, 1),
+            'urls_ms': round(statistics.median(f['urls'] for f in fases) * 1000, 1),
+            'modulos_importados': len(modulos),
+            'importaciones': ranking,
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(resumen, indent=2, ensure_ascii=False))
+            return
+
+        self.stdout.write(
+            f"Arranque en frío ({resumen['aplicacion']}, mediana de {len(procesos)}): "
+            f"{resumen['proceso_ms']:.0f} ms el proceso completo, "
+            f"{resumen['aplicacion_ms']:.0f} ms la aplicación y {resumen['urls_ms']:.0f} ms las URLs "
+            f"({resumen['modulos_importados']} módulos)."
+        )
+        if options['paquetes']:
+            self.stdout.write(f"\n{'ms':>10}{'módulos':>9}  paquete")
+            for fila in ranking:
+                self.stdout.write(f"{fila['propio_ms']:>10.1f}{fila['modulos']:>9}  {fila['nombre']}")
+            return
+        self.stdout.write(f"\n{'propio ms':>10}{'acumulado ms':>14}  módulo")
+        for fila in ranking:
+            nombre = '  ' * fila['nivel'] + fila['nombre']
+            self.stdout.write(f"{fila['propio_ms']:>10.1f}{fila['acumulado_ms']:>14.1f}  {nombre}")
+
+    @staticmethod
+    def _ejecutar(comando, entorno):
+        resultado = subprocess.run(comando, env=entorno, capture_output=True, text=True, cwd=settings.BASE_DIR)
+        if resultado.returncode != 0:
+            raise CommandError(f'No se pudo importar la aplicación:\n{resultado.stderr[-2000:]}')
+        return resultado
+
+    @staticmethod
+    def _importaciones(salida):
+        """Módulos con su tiempo propio y acumulado (ms) y su nivel de anidamiento."""
+        modulos = []
+        for linea in salida.splitlines():
+            coincidencia = _LINEA_IMPORTTIME.match(linea)
+            if coincidencia:
+                propio, acumulado, sangria, nombre = coincidencia.groups()
+                modulos.append({
+                    'nombre': nombre,
+                    'nivel': (len(sangria) - 1) // 2,
+                    'propio_ms': int(propio) / 1000,
+                    'acumulado_ms': int(acumulado) / 1000,
+                })
+        return modulos
+
+    @staticmethod
+    def _por_paquete(modulos):
+        """Suma de los tiempos propios de los módulos de cada paquete de primer nivel."""
+        paquetes = defaultdict(lambda: {'propio_ms': 0.0, 'modulos': 0})
+        for modulo in modulos:
+            paquete = paquetes[modulo['nombre'].split('.', 1)[0]]
+            paquete['propio_ms'] += modulo['propio_ms']
+            paquete['modulos'] += 1
+        filas = [
+            {'nombre': nombre, 'propio_ms': round(datos['propio_ms'], 1), 'modulos': datos['modulos']}
+            for nombre, datos in paquetes.items()
+        ]
+        return sorted(filas, key=lambda fila: fila['propio_ms'], reverse=True)
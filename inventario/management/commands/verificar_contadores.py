@@ -0,0 +1,43 @@
+# inventario/management/commands/verificar_contadores.py
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.contadores import diferencias_contadores
+from inventario.models import EstadoElemento, Localizacion, TipoDispositivo
+
+
+class Command(BaseCommand):
+    """
+    Recalcula los contadores de inventario (registros y unidades por tipo,
+    estado y ubicación) con una consulta agregada sobre los elementos y
+    corrige los que no coinciden (ver inventario/contadores.py).
+
+    Uso:
+        python manage.py verificar_contadores
+        python manage.py verificar_contadores --simular --estricto
+    """
+    help = 'Verifica los contadores de inventario contra los elementos y corrige las diferencias.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true', help='Solo reporta las diferencias, sin corregirlas.')
+        parser.add_argument('--estricto', action='store_true', help='Termina con error si hay diferencias.')
+
+    def handle(self, *args, **options):
+        diferencias = diferencias_contadores(reparar=not options['simular'])
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('Los contadores coinciden con el inventario.'))
+            return
+
+        tipos = TipoDispositivo.objects.in_bulk({clave[0] for clave, _, _ in diferencias})
+        estados = EstadoElemento.objects.in_bulk({clave[1] for clave, _, _ in diferencias})
+        ubicaciones = Localizacion.objects.in_bulk({clave[2] for clave, _, _ in diferencias if clave[2]})
+        for (tipo, estado, ubicacion), guardado, real in diferencias:
+            self.stdout.write(
+                f'{tipos.get(tipo, tipo)} / {estados.get(estado, estado)} / {ubicaciones.get(ubicacion, "Sin ubicación")}: '
+                f'{guardado[0]} registros y {guardado[1]} unidades, deberían ser {real[0]} y {real[1]}.'
+            )
+
+        accion = 'encontradas' if options['simular'] else 'corregidas'
+        mensaje = f'{len(diferencias)} diferencias {accion}.'
+        if options['estricto']:
+            raise CommandError(mensaje)
+        self.stdout.write(self.style.WARNING(mensaje))
@@ -0,0 +1,123 @@
+# inventario/management/commands/verificar_indices.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Value
+
+from inventario.filters import ElementoFilter
+from inventario.models import ORDEN_INDICE, ContadorInventario, Elemento, EstadoElemento
+from inventario.views import ultimos_registros, resumen_dashboard
+
+# Tablas propias cuyo recorrido secuencial se reporta
+PREFIJO_TABLAS = 'inventario_'
+
+# Con menos filas el planificador prefiere recorrer la tabla aunque exista el índice
+FILAS_MINIMAS = 10000
+
+
+class Command(BaseCommand):
+    """
+    Ejecuta EXPLAIN sobre las consultas más usadas del inventario (lista, filtros,
+    búsqueda, dashboard, detalle, admin) y reporta cuáles siguen recorriendo
+    una tabla completa (Seq Scan en PostgreSQL, SCAN en SQLite).
+
+    Conviene ejecutarlo con datos de volumen real:
+        python manage.py generar_datos --elementos 200000
+        python manage.py verificar_indices --analizar --estricto
+    """
+    help = 'Reporta las consultas principales que no usan índices (EXPLAIN).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analizar', action='store_true', help='Ejecuta ANALYZE antes de medir (estadísticas al día).')
+        parser.add_argument('--estricto', action='store_true', help='Termina con error si hay recorridos no esperados.')
+        parser.add_argument('--plan', action='store_true', help='Muestra el plan completo de cada consulta.')
+
+    def handle(self, *args, **options):
+        total = Elemento.objects.count()
+        if total < FILAS_MINIMAS:
+            self.stdout.write(self.style.WARNING(
+                f'Solo hay {total} elementos: con tan pocas filas el planificador puede ignorar los índices. '
+                'Genere más datos con "python manage.py generar_datos".'
+            ))
+
+        if options['analizar']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        inesperados = []
+        for nombre, consulta, recorrido_esperado in self._consultas():
+            plan = consulta.explain(format='json') if connection.vendor == 'postgresql' else consulta.explain()
+            tablas = self._tablas_recorridas(plan)
+
+            if not tablas:
+                self.stdout.write(self.style.SUCCESS(f'  OK        {nombre}'))
+            elif recorrido_esperado:
+                self.stdout.write(f"  ESPERADO  {nombre} (recorre {', '.join(tablas)})")
+            else:
+                inesperados.append(nombre)
+                self.stdout.write(self.style.ERROR(f"  RECORRE   {nombre} ({', '.join(tablas)})"))
+
+            if options['plan']:
+                self.stdout.write(plan)
+
+        if inesperados and options['estricto']:
+            raise CommandError(f"Consultas sin índice: {', '.join(inesperados)}")
+        self.stdout.write(f'{len(inesperados)} consulta(s) con recorrido secuencial no esperado.')
+
+    @staticmethod
+    def _consultas():
+        """(nombre, queryset, recorrido esperado) de las rutas calientes."""
+        muestra = Elemento.objects.exclude(serial=None).order_by('pk').first()
+        if muestra is None:
+            raise CommandError('No hay elementos con serial. Ejecute primero "python manage.py generar_datos".')
+        estado = EstadoElemento.objects.order_by('pk').first()
+        base = Elemento.objects.select_related('tipo_dispositivo', 'estado')
+
+        def lista(**parametros):
+            return ElementoFilter(parametros, queryset=base).qs[:15]
+
+        return [
+            ('lista: primera página', lista(), False),
+            ('lista: filtro por estado', lista(estado=estado.pk), False),
+            ('lista: filtro por marca', lista(marca=muestra.marca), False),
+            ('lista: filtro por localización', lista(localizacion=muestra.localizacion), False),
+            ('lista: rango de fechas', lista(
+                fecha_desde=muestra.fecha_adquisicion.isoformat(),
+                fecha_hasta=muestra.fecha_adquisicion.isoformat(),
+            ), False),
+            ('lista: búsqueda por serial', lista(q=muestra.serial), False),
+            ('lista: subárbol de ubicación', lista(ubicacion=muestra.localizacion), False),
+            ('detalle', Elemento.objects.filter(pk=muestra.pk), False),
+            ('dashboard: últimos registros', ultimos_registros(), False),
+            ('sincronización: cambios desde un cursor', Elemento.objects.filter(
+                fecha_actualizacion__gt=muestra.fecha_actualizacion,
+            ).order_by('fecha_actualizacion', 'pk')[:500], False),
+            ('elementos por cantidad', Elemento.objects.filter(maneja_cantidad=True).order_by(*ORDEN_INDICE)[:50], False),
+            ('admin: valores del filtro marca', Elemento.objects.order_by('marca').values_list('marca').distinct(), False),
+            # El resumen suma la tabla de contadores (una fila por tipo/estado/ubicación): recorrerla es lo correcto
+            ('dashboard: resumen', ContadorInventario.objects.order_by().annotate(grupo=Value(1)).values('grupo')
+             .annotate(**resumen_dashboard()), True),
+        ]
+
+    @staticmethod
+    def _tablas_recorridas(plan):
+        """Tablas de la app que el plan recorre completas."""
+        tablas = set()
+        if connection.vendor == 'postgresql':
+            def visitar(nodo):
+                if nodo.get('Node Type') == 'Seq Scan' and nodo.get('Relation Name', '').startswith(PREFIJO_TABLAS):
+                    tablas.add(nodo['Relation Name'])
+                for hijo in nodo.get('Plans', []):
+                    visitar(hijo)
+            for raiz in json.loads(plan):
+                visitar(raiz['Plan'])
+        else:
+            # SQLite: "SCAN tabla" sin índice; "SEARCH" o "USING ... INDEX" sí lo usan
+            for linea in plan.splitlines():
+                partes = linea.split('SCAN ', 1)
+                if len(partes) == 2 and 'INDEX' not in partes[1]:
+                    tabla = partes[1].split()[0]
+                    if tabla.startswith(PREFIJO_TABLAS):
+                        tablas.add(tabla)
+        return sorted(tablas)
@@ -0,0 +1,39 @@
+# Índices trigram (pg_trgm) para las búsquedas con icontains del admin y de la lista.
+#
+# Django traduce icontains en PostgreSQL a UPPER("campo"::text) LIKE UPPER('%valor%'),
+# por eso los índices se crean sobre esa misma expresión. En otros motores
+# (ej. SQLite en desarrollo) la migración no hace nada.
+
+from django.db import migrations
+
+CAMPOS_BUSQUEDA = ('serial', 'marca', 'modelo', 'localizacion', 'descripcion')
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # pg_trgm es una extensión "trusted" desde PostgreSQL 13 (no requiere superusuario)
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for campo in CAMPOS_BUSQUEDA:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS inventario_elemento_{campo}_trgm '
+            f'ON inventario_elemento USING gin (UPPER({campo}::text) gin_trgm_ops)'
+        )
+
+
+def borrar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for campo in CAMPOS_BUSQUEDA:
+        schema_editor.execute(f'DROP INDEX IF EXISTS inventario_elemento_{campo}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_elemento_cantidad_elemento_maneja_cantidad_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_indices_trigram_busqueda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='elemento',
+            options={'ordering': ['tipo_dispositivo_id', 'marca', 'modelo', 'id'], 'verbose_name': 'Elemento de Inventario', 'verbose_name_plural': 'Elementos de Inventario'},
+        ),
+        migrations.AddIndex(
+            model_name='elemento',
+            index=models.Index(fields=['tipo_dispositivo', 'marca', 'modelo', 'id'], name='elemento_orden_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='elemento',
+            index=models.Index(fields=['-fecha_registro'], name='elemento_fecha_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='elemento',
+            index=models.Index(fields=['marca'], name='elemento_marca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='elemento',
+            index=models.Index(fields=['localizacion'], name='elemento_localizacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='elemento',
+            index=models.Index(fields=['fecha_adquisicion'], name='elemento_fecha_adq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='elemento',
+            index=models.Index(condition=models.Q(('maneja_cantidad', True)), fields=['tipo_dispositivo', 'marca'], name='elemento_por_cantidad_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='elemento',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('maneja_cantidad', True), ('serial__isnull', True)), models.Q(('maneja_cantidad', False), ('serial__isnull', False), models.Q(('serial', ''), _negated=True)), _connector='OR'), name='elemento_serial_segun_cantidad'),
+        ),
+        migrations.AddConstraint(
+            model_name='elemento',
+            constraint=models.CheckConstraint(condition=models.Q(('maneja_cantidad', True), ('cantidad', 1), _connector='OR'), name='elemento_cantidad_sin_serial'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def crear_indice_fecha(apps, schema_editor):
+    # BRIN en PostgreSQL: las filas se agregan en orden de fecha, así que un
+    # índice de bloques ocupa muy poco y sirve para los rangos "fecha > D".
+    # En otros motores se usa un índice normal.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX historial_fecha_brin ON inventario_historialelemento USING brin (fecha)'
+        )
+    else:
+        schema_editor.execute(
+            'CREATE INDEX historial_fecha_brin ON inventario_historialelemento (fecha)'
+        )
+
+
+def borrar_indice_fecha(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS historial_fecha_brin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0005_indices_y_restricciones_elemento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorialElemento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('elemento_id', models.BigIntegerField(verbose_name='ID del Elemento')),
+                ('accion', models.CharField(choices=[('C', 'Creación'), ('M', 'Modificación'), ('E', 'Eliminación')], max_length=1, verbose_name='Acción')),
+                ('campo', models.CharField(max_length=50, verbose_name='Campo')),
+                ('valor_anterior', models.TextField(blank=True, null=True, verbose_name='Valor Anterior')),
+                ('valor_nuevo', models.TextField(blank=True, null=True, verbose_name='Valor Nuevo')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Cambio de Elemento',
+                'verbose_name_plural': 'Historial de Elementos',
+                'ordering': ['elemento_id', 'fecha', 'id'],
+                'indexes': [models.Index(fields=['elemento_id', 'fecha'], name='historial_elemento_fecha_idx')],
+            },
+        ),
+        migrations.RunPython(crear_indice_fecha, borrar_indice_fecha),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:34
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0006_historialelemento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('E', 'Entrada'), ('S', 'Salida'), ('T', 'Transferencia')], max_length=1, verbose_name='Tipo de Movimiento')),
+                ('cantidad', models.IntegerField(verbose_name='Cantidad (+/-)')),
+                ('saldo', models.PositiveIntegerField(verbose_name='Saldo Resultante')),
+                ('localizacion', models.CharField(max_length=150, verbose_name='Localización')),
+                ('contraparte', models.CharField(blank=True, help_text='Localización de la otra parte en una transferencia.', max_length=150, verbose_name='Origen / Destino')),
+                ('lote', models.UUIDField(help_text='Agrupa los movimientos aplicados juntos.', verbose_name='Lote')),
+                ('nota', models.CharField(blank=True, max_length=255, verbose_name='Nota')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('elemento', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movimientos', to='inventario.elemento', verbose_name='Elemento')),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Stock',
+                'verbose_name_plural': 'Movimientos de Stock',
+                'ordering': ['-fecha', '-id'],
+                'indexes': [models.Index(fields=['elemento', '-fecha'], name='movimiento_elemento_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0007_movimientostock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='elemento',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Versión'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0008_version_elemento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Localizacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('tipo', models.CharField(choices=[('S', 'Sede'), ('E', 'Edificio'), ('P', 'Piso'), ('A', 'Sala / Área')], max_length=1, verbose_name='Tipo')),
+                ('ruta', models.CharField(editable=False, max_length=255, unique=True)),
+                ('profundidad', models.PositiveSmallIntegerField(default=0, editable=False)),
+                ('nombre_completo', models.CharField(editable=False, max_length=150, verbose_name='Localización')),
+                ('padre', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='hijos', to='inventario.localizacion', verbose_name='Pertenece a')),
+            ],
+            options={
+                'verbose_name': 'Localización',
+                'verbose_name_plural': 'Localizaciones',
+                'ordering': ['ruta'],
+            },
+        ),
+        migrations.AddField(
+            model_name='elemento',
+            name='ubicacion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='elementos', to='inventario.localizacion', verbose_name='Ubicación'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Construye la jerarquía de localizaciones a partir del texto libre de
+# Elemento.localizacion y asigna a cada elemento su ubicación.
+#
+# Cada texto distinto se divide en niveles ('Sede Norte - Piso 2 - Sistemas')
+# y se compara sin mayúsculas, tildes ni espacios repetidos, así que las
+# variantes de escritura quedan unidas. Los textos se procesan del más usado al
+# menos usado: la escritura más frecuente es la que da nombre a cada nivel, y
+# el texto de los elementos se reemplaza por ese nombre normalizado.
+
+from django.core.exceptions import ValidationError
+from django.db import migrations
+from django.db.models import Count
+
+from inventario.ubicaciones import resolver_ubicacion
+
+
+def normalizar_localizaciones(apps, schema_editor):
+    Elemento = apps.get_model('inventario', 'Elemento')
+    Localizacion = apps.get_model('inventario', 'Localizacion')
+
+    textos = (
+        Elemento.objects
+        .filter(ubicacion=None)
+        .values('localizacion')
+        .annotate(total=Count('pk'))
+        .order_by('-total', 'localizacion')
+    )
+    for fila in list(textos):
+        try:
+            ubicacion = resolver_ubicacion(Localizacion, fila['localizacion'])
+        except ValidationError:
+            continue  # Demasiado largo una vez normalizado: se deja como texto
+        if ubicacion is None:
+            continue
+        Elemento.objects.filter(ubicacion=None, localizacion=fila['localizacion']).update(
+            ubicacion=ubicacion,
+            localizacion=ubicacion.nombre_completo,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0009_localizacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_localizaciones, migrations.RunPython.noop),
+    ]
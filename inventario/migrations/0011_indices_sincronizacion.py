@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0010_normalizar_localizaciones'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='elemento',
+            index=models.Index(fields=['fecha_actualizacion', 'id'], name='elemento_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialelemento',
+            index=models.Index(condition=models.Q(('accion', 'E')), fields=['fecha', 'elemento_id'], name='historial_eliminacion_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0011_indices_sincronizacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SesionAuditoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nota', models.CharField(blank=True, max_length=255, verbose_name='Nota')),
+                ('fecha_inicio', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Inicio')),
+                ('fecha_cierre', models.DateTimeField(blank=True, null=True, verbose_name='Cierre')),
+                ('ubicacion', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='auditorias', to='inventario.localizacion', verbose_name='Ubicación Auditada')),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Auditor')),
+            ],
+            options={
+                'verbose_name': 'Sesión de Auditoría',
+                'verbose_name_plural': 'Sesiones de Auditoría',
+                'ordering': ['-fecha_inicio', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LecturaAuditoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('serial', models.CharField(max_length=150, verbose_name='Serial Leído')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Lectura')),
+                ('elemento', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventario.elemento', verbose_name='Elemento')),
+                ('sesion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lecturas', to='inventario.sesionauditoria', verbose_name='Sesión')),
+            ],
+            options={
+                'verbose_name': 'Lectura de Auditoría',
+                'verbose_name_plural': 'Lecturas de Auditoría',
+                'ordering': ['-fecha', '-id'],
+                'indexes': [models.Index(fields=['sesion', 'elemento'], name='lectura_sesion_elemento_idx')],
+                'constraints': [models.UniqueConstraint(fields=('sesion', 'serial'), name='lectura_sesion_serial_unica')],
+            },
+        ),
+    ]
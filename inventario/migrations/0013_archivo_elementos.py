@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:26
+
+import django.db.models.deletion
+import django.utils.timezone
+import inventario.utils
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0012_auditoria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ElementoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('maneja_cantidad', models.BooleanField(default=False, verbose_name='¿Maneja Cantidad?')),
+                ('cantidad', models.PositiveIntegerField(default=1, verbose_name='Cantidad')),
+                ('marca', models.CharField(max_length=100, verbose_name='Marca')),
+                ('modelo', models.CharField(max_length=100, verbose_name='Modelo')),
+                ('serial', models.CharField(blank=True, db_index=True, max_length=150, null=True, verbose_name='Número de Serie / Etiqueta de Activo')),
+                ('localizacion', models.CharField(max_length=150, verbose_name='Localización / Ubicación Física')),
+                ('descripcion', models.TextField(blank=True, verbose_name='Especificaciones / Notas')),
+                ('fecha_adquisicion', models.DateField(verbose_name='Fecha de Adquisición')),
+                ('precio', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Costo Adquisición')),
+                ('imagen', models.ImageField(blank=True, null=True, upload_to=inventario.utils.limpiar_nombre_archivo, verbose_name='Foto del Elemento')),
+                ('fecha_registro', models.DateTimeField(verbose_name='Fecha de Registro')),
+                ('fecha_actualizacion', models.DateTimeField(verbose_name='Última Actualización')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Versión')),
+                ('fecha_archivado', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha de Archivado')),
+            ],
+            options={
+                'verbose_name': 'Elemento Archivado',
+                'verbose_name_plural': 'Elementos Archivados',
+                'ordering': ['-fecha_archivado', '-id'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='historialelemento',
+            name='historial_eliminacion_idx',
+        ),
+        migrations.AlterField(
+            model_name='historialelemento',
+            name='accion',
+            field=models.CharField(choices=[('C', 'Creación'), ('M', 'Modificación'), ('E', 'Eliminación'), ('A', 'Archivado'), ('R', 'Restauración')], max_length=1, verbose_name='Acción'),
+        ),
+        migrations.AddIndex(
+            model_name='historialelemento',
+            index=models.Index(condition=models.Q(('accion__in', ['E', 'A'])), fields=['fecha', 'elemento_id'], name='historial_eliminacion_idx'),
+        ),
+        migrations.AddField(
+            model_name='elementoarchivado',
+            name='estado',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='inventario.estadoelemento', verbose_name='Estado'),
+        ),
+        migrations.AddField(
+            model_name='elementoarchivado',
+            name='tipo_dispositivo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='inventario.tipodispositivo', verbose_name='Tipo de Dispositivo'),
+        ),
+        migrations.AddField(
+            model_name='elementoarchivado',
+            name='ubicacion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='inventario.localizacion', verbose_name='Ubicación'),
+        ),
+        migrations.AddField(
+            model_name='elementoarchivado',
+            name='usuario_registro',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Registrado Por'),
+        ),
+    ]
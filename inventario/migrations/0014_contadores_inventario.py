@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from inventario.models import agregado_contadores
+
+
+def calcular_contadores(apps, schema_editor):
+    # Estado inicial de los contadores: una consulta agregada sobre el inventario
+    Elemento = apps.get_model('inventario', 'Elemento')
+    ContadorInventario = apps.get_model('inventario', 'ContadorInventario')
+    ContadorInventario.objects.bulk_create(
+        [ContadorInventario(**fila) for fila in agregado_contadores(Elemento.objects.all())],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0013_archivo_elementos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registros', models.IntegerField(default=0, verbose_name='Registros')),
+                ('unidades', models.IntegerField(default=0, verbose_name='Unidades')),
+                ('estado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventario.estadoelemento', verbose_name='Estado')),
+                ('tipo_dispositivo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventario.tipodispositivo', verbose_name='Tipo de Dispositivo')),
+                ('ubicacion', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventario.localizacion', verbose_name='Ubicación')),
+            ],
+            options={
+                'verbose_name': 'Contador de Inventario',
+                'verbose_name_plural': 'Contadores de Inventario',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('ubicacion__isnull', False)), fields=('tipo_dispositivo', 'estado', 'ubicacion'), name='contador_clave_unica'), models.UniqueConstraint(condition=models.Q(('ubicacion__isnull', True)), fields=('tipo_dispositivo', 'estado'), name='contador_clave_sin_ubicacion_unica')],
+            },
+        ),
+        migrations.RunPython(calcular_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0014_contadores_inventario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('registros', models.IntegerField(verbose_name='Registros')),
+                ('unidades', models.IntegerField(verbose_name='Unidades')),
+                ('estado', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventario.estadoelemento', verbose_name='Estado')),
+                ('tipo_dispositivo', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventario.tipodispositivo', verbose_name='Tipo de Dispositivo')),
+                ('ubicacion', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventario.localizacion', verbose_name='Ubicación')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario',
+                'verbose_name_plural': 'Resúmenes Diarios',
+                'ordering': ['fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='resumen_dia_fecha_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('ubicacion__isnull', False)), fields=('fecha', 'tipo_dispositivo', 'estado', 'ubicacion'), name='resumen_dia_clave_unica'), models.UniqueConstraint(condition=models.Q(('ubicacion__isnull', True)), fields=('fecha', 'tipo_dispositivo', 'estado'), name='resumen_dia_sin_ubicacion_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0015_resumenes_diarios'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='elemento',
+            options={'ordering': ['tipo_dispositivo', 'marca', 'modelo'], 'verbose_name': 'Elemento de Inventario', 'verbose_name_plural': 'Elementos de Inventario'},
+        ),
+    ]
@@ -1,9 +1,38 @@
 # inventario/models.py
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from .ubicaciones import SEPARADOR_NOMBRE, clave_ubicacion, resolver_ubicacion
 from .utils import limpiar_nombre_archivo
 
+# Campos de Elemento (por attname) que se guardan en el historial de cambios
+CAMPOS_HISTORIAL = (
+    'maneja_cantidad', 'cantidad', 'tipo_dispositivo_id', 'marca', 'modelo', 'serial',
+    'localizacion', 'ubicacion_id', 'estado_id', 'descripcion', 'fecha_adquisicion', 'precio', 'imagen',
+)
+
+# Orden que recorre el índice elemento_orden_idx sin unir la tabla de tipos:
+# para las consultas internas que necesitan un orden estable pero no lo
+# muestran (el usuario ve Meta.ordering, por nombre del tipo)
+ORDEN_INDICE = ('tipo_dispositivo_id', 'marca', 'modelo', 'id')
+
+
+def valor_historial(valor):
+    """Representación en texto de un valor para el historial (None se conserva)."""
+    return None if valor is None else str(valor)
+
+
+class ConflictoEdicion(Exception):
+    """
+    El elemento fue modificado por otro usuario después de que se abriera el
+    formulario de edición (la versión guardada ya no es la esperada).
+    """
+    def __init__(self, elemento):
+        super().__init__(f'El elemento {elemento.pk} fue modificado por otro usuario.')
+        self.elemento = elemento
+
+
 # ==============================================================================
 # 1. Modelos de Catálogo (Foreign Keys)
 # ==============================================================================
@@ -34,6 +63,75 @@ class EstadoElemento(models.Model):
     def __str__(self):
         return self.nombre
 
+
+class Localizacion(models.Model):
+    """
+    Nivel de la jerarquía de ubicaciones: Sede → Edificio → Piso → Sala.
+    Ver inventario/ubicaciones.py (ruta materializada y normalización).
+    """
+    class Tipo(models.TextChoices):
+        SEDE = 'S', 'Sede'
+        EDIFICIO = 'E', 'Edificio'
+        PISO = 'P', 'Piso'
+        AREA = 'A', 'Sala / Área'
+
+    nombre = models.CharField(max_length=100, verbose_name="Nombre")
+    tipo = models.CharField(max_length=1, choices=Tipo.choices, verbose_name="Tipo")
+    padre = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='hijos',
+        verbose_name="Pertenece a"
+    )
+    # Claves normalizadas desde la raíz, ej. 'sede principal/piso 3/': el subárbol es un prefijo
+    ruta = models.CharField(max_length=255, unique=True, editable=False)
+    profundidad = models.PositiveSmallIntegerField(default=0, editable=False)
+    # 'Sede Principal - Piso 3 - Sistemas' (el texto que se guarda en Elemento.localizacion)
+    nombre_completo = models.CharField(max_length=150, editable=False, verbose_name="Localización")
+
+    class Meta:
+        verbose_name = 'Localización'
+        verbose_name_plural = 'Localizaciones'
+        ordering = ['ruta']
+
+    def __str__(self):
+        return self.nombre_completo
+
+    def _completar(self):
+        """Ruta, profundidad y nombre completo a partir del padre (ej. al crearla en el admin)."""
+        self.nombre = ' '.join(self.nombre.split())
+        self.profundidad = self.padre.profundidad + 1 if self.padre else 0
+        self.ruta = (self.padre.ruta if self.padre else '') + clave_ubicacion(self.nombre) + '/'
+        self.nombre_completo = (
+            f'{self.padre.nombre_completo}{SEPARADOR_NOMBRE}{self.nombre}' if self.padre else self.nombre
+        )
+
+    def clean(self):
+        super().clean()
+        if not self.ruta and self.nombre:
+            self._completar()
+            if Localizacion.objects.filter(ruta=self.ruta).exists():
+                raise ValidationError({'nombre': f'Ya existe la localización "{self.nombre_completo}".'})
+            if len(self.nombre_completo) > 150:
+                raise ValidationError({'nombre': 'El nombre completo de la localización es demasiado largo.'})
+
+    def save(self, *args, **kwargs):
+        if not self.ruta:
+            self._completar()
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def desde_texto(cls, texto):
+        """Localización del texto libre (creando los niveles que falten)."""
+        return resolver_ubicacion(cls, texto)
+
+    def subarbol(self):
+        """Esta localización y todas las que cuelgan de ella."""
+        return Localizacion.objects.filter(ruta__startswith=self.ruta)
+
+
 # ==============================================================================
 # 2. Modelo Principal del Inventario
 # ==============================================================================
@@ -73,6 +171,15 @@ class Elemento(models.Model):
     
     # 📍 Localización y Estado
     localizacion = models.CharField(max_length=150, verbose_name="Localización / Ubicación Física")
+    # Nivel de la jerarquía que corresponde a 'localizacion' (se sincronizan en save())
+    ubicacion = models.ForeignKey(
+        Localizacion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='elementos',
+        verbose_name="Ubicación"
+    )
     estado = models.ForeignKey(
         EstadoElemento, 
         on_delete=models.PROTECT, 
@@ -108,11 +215,47 @@ class Elemento(models.Model):
     )
     fecha_registro = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
+    # Bloqueo optimista: aumenta con cada edición (ver save())
+    version = models.PositiveIntegerField(default=1, editable=False, verbose_name="Versión")
 
     class Meta:
         verbose_name = 'Elemento de Inventario'
         verbose_name_plural = 'Elementos de Inventario'
+        # Por el nombre del tipo (lo que ve el usuario en la lista y las exportaciones).
+        # Las consultas internas que no muestran el orden usan ORDEN_INDICE.
         ordering = ['tipo_dispositivo', 'marca', 'modelo']
+        indexes = [
+            # ORDEN_INDICE
+            models.Index(fields=['tipo_dispositivo', 'marca', 'modelo', 'id'], name='elemento_orden_idx'),
+            # "Últimos registros" del dashboard
+            models.Index(fields=['-fecha_registro'], name='elemento_fecha_registro_idx'),
+            # Cursor de la sincronización incremental (exportacion/sincronizacion.py)
+            models.Index(fields=['fecha_actualizacion', 'id'], name='elemento_sync_idx'),
+            # Filtros de la lista y del admin
+            models.Index(fields=['marca'], name='elemento_marca_idx'),
+            models.Index(fields=['localizacion'], name='elemento_localizacion_idx'),
+            models.Index(fields=['fecha_adquisicion'], name='elemento_fecha_adq_idx'),
+            # Solo los elementos por cantidad (una fracción pequeña de la tabla)
+            models.Index(
+                fields=['tipo_dispositivo', 'marca'],
+                condition=models.Q(maneja_cantidad=True),
+                name='elemento_por_cantidad_idx',
+            ),
+        ]
+        constraints = [
+            # Las mismas reglas de clean(), ahora también en la base de datos
+            models.CheckConstraint(
+                condition=(
+                    models.Q(maneja_cantidad=True, serial__isnull=True)
+                    | (models.Q(maneja_cantidad=False, serial__isnull=False) & ~models.Q(serial=''))
+                ),
+                name='elemento_serial_segun_cantidad',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(maneja_cantidad=True) | models.Q(cantidad=1),
+                name='elemento_cantidad_sin_serial',
+            ),
+        ]
 
     def clean(self):
         """Validación personalizada para asegurar integridad de datos"""
@@ -131,8 +274,9 @@ class Elemento(models.Model):
                 'maneja_cantidad': 'Desmarque esta opción si desea asignar un serial único.'
             })
         
-        # Si maneja cantidad, debe tener al menos 1 unidad
-        if self.maneja_cantidad and self.cantidad < 1:
+        # Si maneja cantidad, debe registrarse con al menos 1 unidad (después
+        # puede quedar en 0 por las salidas de stock, ver inventario/stock.py)
+        if self.maneja_cantidad and self._state.adding and self.cantidad < 1:
             raise ValidationError({
                 'cantidad': 'La cantidad debe ser al menos 1.'
             })
@@ -147,10 +291,659 @@ class Elemento(models.Model):
             self.cantidad = 1
             
         self.full_clean()  # Ejecutar validaciones
-        super().save(*args, **kwargs)
+
+        # Cada edición cambia la versión, lo que invalida los formularios
+        # abiertos con la anterior. Si se indicó '_version_esperada' (la versión
+        # que se editó), solo se guarda si nadie lo modificó desde entonces.
+        es_nuevo = self._state.adding
+        version_esperada = getattr(self, '_version_esperada', None)
+        if not es_nuevo and kwargs.get('update_fields') is not None and 'version' not in kwargs['update_fields']:
+            kwargs['update_fields'] = [*kwargs['update_fields'], 'version']
+
+        # El elemento, su historial y los contadores se guardan juntos o no se guarda nada
+        alias = kwargs.get('using') or router.db_for_write(Elemento, instance=self)
+        with transaction.atomic(using=alias):
+            # Después de validar y dentro de la transacción: si el guardado
+            # falla no quedan localizaciones creadas para un elemento que no existe
+            self._sincronizar_ubicacion()
+            anterior = None
+            if not es_nuevo:
+                # Una sola consulta bloquea la fila hasta el COMMIT y lee su versión
+                # y lo que cuentan los contadores tal como están en la BD: from_db
+                # puede ser viejo (admin, comandos, stock; actualizar_elementos no
+                # cambia la versión) y se descontaría de otro contador.
+                guardada = (
+                    Elemento.objects.using(alias).select_for_update()
+                    .filter(pk=self.pk).values('version', *CAMPOS_CONTADOR).first()
+                )
+                if version_esperada is not None and (guardada is None or guardada['version'] != version_esperada):
+                    raise ConflictoEdicion(self)  # Otro usuario guardó antes
+                if guardada is not None:
+                    # Se incrementa la versión de la BD, no la leída, para no
+                    # repetir una que ya tiene un formulario abierto
+                    self.version = guardada['version'] + 1
+                    anterior = ContadorInventario.clave_unidades(guardada)
+            super().save(*args, **kwargs)
+            HistorialElemento.registrar_guardado(self, es_nuevo, kwargs.get('update_fields'))
+            ContadorInventario.registrar_guardado(self, anterior, kwargs.get('update_fields'))
+        self._valores_originales = self.valores_historial()
+        self._version_esperada = None
+
+    def _sincronizar_ubicacion(self):
+        """
+        Mantiene juntos el texto 'localizacion' y la 'ubicacion' de la jerarquía:
+        si se eligió otra ubicación el texto pasa a ser su nombre completo; si se
+        escribió otro texto se busca (o crea) su ubicación y el texto queda
+        normalizado ('sede principal -piso 3' -> 'Sede Principal - Piso 3').
+        """
+        originales = getattr(self, '_valores_originales', {})
+        ubicacion_cambiada = originales.get('ubicacion_id') != valor_historial(self.ubicacion_id)
+        texto_cambiado = originales.get('localizacion') != self.localizacion
+
+        if self.ubicacion_id and ubicacion_cambiada and not (texto_cambiado and originales):
+            self.localizacion = self.ubicacion.nombre_completo
+        elif texto_cambiado or not self.ubicacion_id:
+            ubicacion = Localizacion.desde_texto(self.localizacion)
+            if ubicacion is not None:
+                self.ubicacion, self.localizacion = ubicacion, ubicacion.nombre_completo
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Guarda los valores leídos de la BD para calcular los cambios al guardar."""
+        instancia = super().from_db(db, field_names, values)
+        instancia._valores_originales = instancia.valores_historial()
+        return instancia
+
+    def valores_historial(self):
+        """Valores actuales (en texto) de los campos con historial que estén cargados."""
+        return {
+            campo: valor_historial(getattr(self, campo))
+            for campo in CAMPOS_HISTORIAL
+            if campo in self.__dict__
+        }
 
     def __str__(self):
         if self.maneja_cantidad:
             return f"[{self.cantidad} uds.] {self.tipo_dispositivo} - {self.marca} {self.modelo}"
         else:
-            return f"[{self.serial}] {self.tipo_dispositivo} - {self.marca} {self.modelo}"
\ No newline at end of file
+            return f"[{self.serial}] {self.tipo_dispositivo} - {self.marca} {self.modelo}"
+
+
+# ==============================================================================
+# 3. Historial de Cambios (solo se agregan filas)
+# ==============================================================================
+
+class HistorialElemento(models.Model):
+    """
+    Una fila por campo modificado de un Elemento. Todas las filas de un mismo
+    guardado se insertan con un único INSERT, en la misma transacción.
+
+    - Creación:     valor_anterior = None, valor_nuevo = valor inicial.
+    - Modificación: solo los campos que cambiaron.
+    - Eliminación:  valor_anterior = último valor, valor_nuevo = None (todos los campos).
+    - Archivado:    como la eliminación; el elemento pasa a ElementoArchivado.
+    - Restauración: como la creación; el elemento vuelve desde el archivo.
+
+    'elemento_id' no es una ForeignKey para que el historial sobreviva a la
+    eliminación del elemento. Las consultas están en inventario/historial.py.
+    """
+
+    class Accion(models.TextChoices):
+        CREACION = 'C', 'Creación'
+        MODIFICACION = 'M', 'Modificación'
+        ELIMINACION = 'E', 'Eliminación'
+        ARCHIVADO = 'A', 'Archivado'
+        RESTAURACION = 'R', 'Restauración'
+
+    elemento_id = models.BigIntegerField(verbose_name="ID del Elemento")
+    accion = models.CharField(max_length=1, choices=Accion.choices, verbose_name="Acción")
+    campo = models.CharField(max_length=50, verbose_name="Campo")
+    valor_anterior = models.TextField(null=True, blank=True, verbose_name="Valor Anterior")
+    valor_nuevo = models.TextField(null=True, blank=True, verbose_name="Valor Nuevo")
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name="Usuario",
+    )
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="Fecha")
+
+    class Meta:
+        verbose_name = 'Cambio de Elemento'
+        verbose_name_plural = 'Historial de Elementos'
+        ordering = ['elemento_id', 'fecha', 'id']
+        indexes = [
+            # Historial de un elemento. El índice por 'fecha' (BRIN en PostgreSQL)
+            # se crea en la migración 0006 según el motor.
+            models.Index(fields=['elemento_id', 'fecha'], name='historial_elemento_fecha_idx'),
+            # Eliminaciones y archivados para la sincronización incremental (solo esas filas)
+            models.Index(
+                fields=['fecha', 'elemento_id'],
+                condition=models.Q(accion__in=['E', 'A']),
+                name='historial_eliminacion_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_accion_display()} #{self.elemento_id} {self.campo}: {self.valor_anterior} → {self.valor_nuevo}"
+
+    @classmethod
+    def registrar_guardado(cls, elemento, es_nuevo, update_fields=None):
+        """Inserta las diferencias entre los valores originales y los actuales."""
+        actuales = elemento.valores_historial()
+        if es_nuevo:
+            accion, anteriores = cls.Accion.CREACION, {}
+        else:
+            accion, anteriores = cls.Accion.MODIFICACION, getattr(elemento, '_valores_originales', {})
+            # Sin valores originales (campo diferido) no se puede saber si cambió
+            actuales = {campo: valor for campo, valor in actuales.items() if campo in anteriores}
+
+        if update_fields is not None:
+            guardados = {Elemento._meta.get_field(nombre).attname for nombre in update_fields}
+            actuales = {campo: valor for campo, valor in actuales.items() if campo in guardados}
+
+        cls._insertar(elemento, accion, [
+            (campo, anteriores.get(campo), valor)
+            for campo, valor in actuales.items()
+            if es_nuevo or anteriores.get(campo) != valor
+        ])
+
+    @classmethod
+    def registrar_eliminacion(cls, elemento):
+        """Guarda el último valor de cada campo (permite reconstruir el elemento)."""
+        valores = {**elemento.valores_historial(), **getattr(elemento, '_valores_originales', {})}
+        cls._insertar(elemento, cls.Accion.ELIMINACION, [
+            (campo, valor, None) for campo, valor in valores.items()
+        ])
+
+    @classmethod
+    def registros_archivado(cls, valores, accion, usuario_id=None, fecha=None):
+        """
+        Filas (sin guardar) del archivado o la restauración de un elemento, a
+        partir de sus valores {'id': ..., 'marca': ..., ...}. El archivado se
+        registra como una eliminación; la restauración, como una creación.
+        """
+        fecha = fecha or timezone.now()
+        filas = []
+        for campo in CAMPOS_HISTORIAL:
+            valor = valor_historial(valores[campo])
+            anterior, nuevo = (valor, None) if accion == cls.Accion.ARCHIVADO else (None, valor)
+            filas.append(cls(
+                elemento_id=valores['id'], accion=accion, campo=campo,
+                valor_anterior=anterior, valor_nuevo=nuevo, usuario_id=usuario_id, fecha=fecha,
+            ))
+        return filas
+
+    @classmethod
+    def _insertar(cls, elemento, accion, cambios):
+        if not cambios:
+            return
+        # Las vistas indican quién hizo el cambio con elemento._usuario_cambio
+        usuario = getattr(elemento, '_usuario_cambio', None)
+        if usuario is not None:
+            usuario_id = usuario.pk if usuario.is_authenticated else None
+        else:
+            usuario_id = elemento.usuario_registro_id if accion == cls.Accion.CREACION else None
+        fecha = timezone.now()
+        cls.objects.bulk_create([
+            cls(
+                elemento_id=elemento.pk,
+                accion=accion,
+                campo=campo,
+                valor_anterior=anterior,
+                valor_nuevo=nuevo,
+                usuario_id=usuario_id,
+                fecha=fecha,
+            )
+            for campo, anterior, nuevo in cambios
+        ])
+
+
+# ==============================================================================
+# 4. Movimientos de Stock (elementos por cantidad)
+# ==============================================================================
+
+class MovimientoStock(models.Model):
+    """
+    Libro de movimientos de los elementos que manejan cantidad. Cada fila es un
+    cambio de 'cantidad' (positivo o negativo) con el saldo resultante.
+
+    Una transferencia genera dos filas con el mismo 'lote': la salida en el
+    elemento de origen y la entrada en el de destino. Los movimientos se
+    aplican con las funciones de inventario/stock.py, nunca editando la cantidad.
+    """
+
+    class Tipo(models.TextChoices):
+        ENTRADA = 'E', 'Entrada'
+        SALIDA = 'S', 'Salida'
+        TRANSFERENCIA = 'T', 'Transferencia'
+
+    # Sin restricción en la BD (db_constraint=False): el movimiento se conserva
+    # aunque se elimine el elemento, igual que el historial.
+    elemento = models.ForeignKey(
+        Elemento,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='movimientos',
+        verbose_name="Elemento",
+    )
+    tipo = models.CharField(max_length=1, choices=Tipo.choices, verbose_name="Tipo de Movimiento")
+    cantidad = models.IntegerField(verbose_name="Cantidad (+/-)")
+    saldo = models.PositiveIntegerField(verbose_name="Saldo Resultante")
+    localizacion = models.CharField(max_length=150, verbose_name="Localización")
+    contraparte = models.CharField(
+        max_length=150,
+        blank=True,
+        verbose_name="Origen / Destino",
+        help_text="Localización de la otra parte en una transferencia.",
+    )
+    lote = models.UUIDField(verbose_name="Lote", help_text="Agrupa los movimientos aplicados juntos.")
+    nota = models.CharField(max_length=255, blank=True, verbose_name="Nota")
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name="Usuario",
+    )
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="Fecha")
+
+    class Meta:
+        verbose_name = 'Movimiento de Stock'
+        verbose_name_plural = 'Movimientos de Stock'
+        ordering = ['-fecha', '-id']
+        indexes = [
+            models.Index(fields=['elemento', '-fecha'], name='movimiento_elemento_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.cantidad:+d} → {self.saldo} ({self.localizacion})"
+
+
+# ==============================================================================
+# 5. Auditorías Físicas (lectura de códigos de barras)
+# ==============================================================================
+
+class SesionAuditoria(models.Model):
+    """
+    Recorrido de auditoría de una localización: se leen los seriales de lo que
+    hay físicamente y se concilian contra lo registrado en su subárbol
+    (ver inventario/auditoria.py).
+    """
+    ubicacion = models.ForeignKey(
+        Localizacion,
+        on_delete=models.PROTECT,
+        related_name='auditorias',
+        verbose_name="Ubicación Auditada",
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name="Auditor",
+    )
+    nota = models.CharField(max_length=255, blank=True, verbose_name="Nota")
+    fecha_inicio = models.DateTimeField(default=timezone.now, verbose_name="Inicio")
+    fecha_cierre = models.DateTimeField(null=True, blank=True, verbose_name="Cierre")
+
+    class Meta:
+        verbose_name = 'Sesión de Auditoría'
+        verbose_name_plural = 'Sesiones de Auditoría'
+        ordering = ['-fecha_inicio', '-id']
+
+    def __str__(self):
+        return f"Auditoría de {self.ubicacion} ({self.fecha_inicio:%d/%m/%Y})"
+
+    @property
+    def abierta(self):
+        return self.fecha_cierre is None
+
+
+class LecturaAuditoria(models.Model):
+    """
+    Serial leído en una sesión de auditoría. Cada serial cuenta una vez por
+    sesión (volver a escanearlo no agrega filas). 'elemento' queda vacío si el
+    serial no existe en el inventario.
+    """
+    sesion = models.ForeignKey(
+        SesionAuditoria,
+        on_delete=models.CASCADE,
+        related_name='lecturas',
+        verbose_name="Sesión",
+    )
+    serial = models.CharField(max_length=150, verbose_name="Serial Leído")
+    # Sin restricción en la BD, igual que el historial: la lectura se conserva
+    # aunque el elemento se elimine después.
+    elemento = models.ForeignKey(
+        Elemento,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+',
+        verbose_name="Elemento",
+    )
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Lectura")
+
+    class Meta:
+        verbose_name = 'Lectura de Auditoría'
+        verbose_name_plural = 'Lecturas de Auditoría'
+        ordering = ['-fecha', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['sesion', 'serial'], name='lectura_sesion_serial_unica'),
+        ]
+        indexes = [
+            # Conciliación: elementos leídos en la sesión
+            models.Index(fields=['sesion', 'elemento'], name='lectura_sesion_elemento_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.serial} ({self.sesion_id})"
+
+
+# ==============================================================================
+# 6. Archivo de Elementos dados de Baja
+# ==============================================================================
+
+class ElementoArchivado(models.Model):
+    """
+    Elemento en estado "Baja" sacado de la tabla de trabajo (ver
+    inventario/archivo.py). Conserva el id y los valores que tenía, así que
+    el historial, los movimientos de stock y las lecturas de auditoría que lo
+    referencian siguen apuntando al mismo id, y puede restaurarse tal cual.
+
+    Los catálogos, la ubicación y el usuario siguen siendo ForeignKey: no se
+    puede eliminar un tipo o un estado que un elemento archivado usa.
+    """
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")
+    maneja_cantidad = models.BooleanField(default=False, verbose_name="¿Maneja Cantidad?")
+    cantidad = models.PositiveIntegerField(default=1, verbose_name="Cantidad")
+    tipo_dispositivo = models.ForeignKey(
+        TipoDispositivo,
+        on_delete=models.PROTECT,
+        related_name='+',
+        verbose_name="Tipo de Dispositivo"
+    )
+    marca = models.CharField(max_length=100, verbose_name="Marca")
+    modelo = models.CharField(max_length=100, verbose_name="Modelo")
+    # Sin unique: el serial puede volver a usarse en el inventario activo
+    serial = models.CharField(
+        max_length=150,
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Número de Serie / Etiqueta de Activo"
+    )
+    localizacion = models.CharField(max_length=150, verbose_name="Localización / Ubicación Física")
+    ubicacion = models.ForeignKey(
+        Localizacion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Ubicación"
+    )
+    estado = models.ForeignKey(
+        EstadoElemento,
+        on_delete=models.PROTECT,
+        related_name='+',
+        verbose_name="Estado"
+    )
+    descripcion = models.TextField(blank=True, verbose_name="Especificaciones / Notas")
+    fecha_adquisicion = models.DateField(verbose_name="Fecha de Adquisición")
+    precio = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Costo Adquisición")
+    imagen = models.ImageField(upload_to=limpiar_nombre_archivo, blank=True, null=True, verbose_name="Foto del Elemento")
+    usuario_registro = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name="Registrado Por"
+    )
+    # Copiadas del elemento (sin auto_now: se conservan las originales)
+    fecha_registro = models.DateTimeField(verbose_name="Fecha de Registro")
+    fecha_actualizacion = models.DateTimeField(verbose_name="Última Actualización")
+    version = models.PositiveIntegerField(default=1, verbose_name="Versión")
+    fecha_archivado = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="Fecha de Archivado")
+
+    class Meta:
+        verbose_name = 'Elemento Archivado'
+        verbose_name_plural = 'Elementos Archivados'
+        ordering = ['-fecha_archivado', '-id']
+
+    def __str__(self):
+        if self.maneja_cantidad:
+            return f"[{self.cantidad} uds.] {self.marca} {self.modelo} (archivado)"
+        return f"[{self.serial}] {self.marca} {self.modelo} (archivado)"
+
+
+# ==============================================================================
+# 7. Contadores por Tipo, Estado y Ubicación
+# ==============================================================================
+
+# Campos de Elemento que definen su fila de contadores y cuántas unidades suma
+CAMPOS_CONTADOR = ('tipo_dispositivo_id', 'estado_id', 'ubicacion_id', 'maneja_cantidad', 'cantidad')
+
+
+class ContadorInventario(models.Model):
+    """
+    Registros y unidades por (tipo, estado, ubicación): los elementos por
+    cantidad suman sus unidades, los de serial cuentan como 1. El dashboard
+    lee esta tabla (una fila por combinación usada) en lugar de recorrer el
+    inventario.
+
+    Se actualiza en la misma transacción que el cambio: Elemento.save(), la
+    eliminación (señal post_delete), los movimientos de stock y el archivo.
+    Lo que no pasa por save() también debe sumarse: un update() sobre
+    elementos se hace con contadores.actualizar_elementos(), un bulk_create
+    con sumar_elementos(), y aplicar() recibe deltas ya calculados. El
+    comando 'verificar_contadores' los recalcula y corrige.
+    """
+    tipo_dispositivo = models.ForeignKey(
+        TipoDispositivo,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Tipo de Dispositivo"
+    )
+    estado = models.ForeignKey(
+        EstadoElemento,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Estado"
+    )
+    ubicacion = models.ForeignKey(
+        Localizacion,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+        verbose_name="Ubicación"
+    )
+    # IntegerField (no Positive): un contador descuadrado se corrige, no impide guardar
+    registros = models.IntegerField(default=0, verbose_name="Registros")
+    unidades = models.IntegerField(default=0, verbose_name="Unidades")
+
+    class Meta:
+        verbose_name = 'Contador de Inventario'
+        verbose_name_plural = 'Contadores de Inventario'
+        constraints = [
+            # Una fila por combinación, con y sin ubicación (NULL no choca en un UNIQUE)
+            models.UniqueConstraint(
+                fields=['tipo_dispositivo', 'estado', 'ubicacion'],
+                condition=models.Q(ubicacion__isnull=False),
+                name='contador_clave_unica',
+            ),
+            models.UniqueConstraint(
+                fields=['tipo_dispositivo', 'estado'],
+                condition=models.Q(ubicacion__isnull=True),
+                name='contador_clave_sin_ubicacion_unica',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo_dispositivo_id}/{self.estado_id}/{self.ubicacion_id}: {self.registros} ({self.unidades} uds.)"
+
+    @staticmethod
+    def clave_unidades(valores):
+        """((tipo, estado, ubicación), unidades) de un elemento a partir de sus valores."""
+        clave = (valores['tipo_dispositivo_id'], valores['estado_id'], valores['ubicacion_id'])
+        return clave, valores['cantidad'] if valores['maneja_cantidad'] else 1
+
+    @classmethod
+    def clave_guardada(cls, elemento, releer=False):
+        """
+        clave_unidades() del elemento tal como está en la BD: sale de los
+        valores leídos (from_db) o, si falta alguno o releer=True, de una consulta.
+        """
+        originales = {} if releer else getattr(elemento, '_valores_originales', {})
+        if all(campo in originales for campo in CAMPOS_CONTADOR):
+            valores = {
+                campo: Elemento._meta.get_field(campo.removesuffix('_id')).to_python(originales[campo])
+                for campo in CAMPOS_CONTADOR
+            }
+        else:
+            valores = Elemento.objects.filter(pk=elemento.pk).values(*CAMPOS_CONTADOR).first()
+        return cls.clave_unidades(valores) if valores else None
+
+    @classmethod
+    def registrar_guardado(cls, elemento, anterior, update_fields=None):
+        """Pasa el elemento de la fila 'anterior' (None si es nuevo) a la que le corresponde ahora."""
+        guardados = update_fields and {Elemento._meta.get_field(nombre).attname for nombre in update_fields}
+        if guardados and not guardados.issuperset(CAMPOS_CONTADOR):
+            # Guardado parcial: lo que no se guardó sigue en la BD con su valor anterior
+            clave, unidades = cls.clave_guardada(elemento, releer=True)
+        else:
+            clave, unidades = cls.clave_unidades({campo: getattr(elemento, campo) for campo in CAMPOS_CONTADOR})
+
+        deltas = {clave: [1, unidades]}
+        if anterior is not None:
+            clave_anterior, unidades_anteriores = anterior
+            delta = deltas.setdefault(clave_anterior, [0, 0])
+            delta[0] -= 1
+            delta[1] -= unidades_anteriores
+        cls.aplicar(deltas)
+
+    @classmethod
+    def registrar_eliminacion(cls, elemento):
+        """Descuenta un elemento eliminado (con los valores que tenía en la BD)."""
+        clave, unidades = cls.clave_guardada(elemento) or cls.clave_unidades(
+            {campo: getattr(elemento, campo) for campo in CAMPOS_CONTADOR}
+        )
+        cls.aplicar({clave: [-1, -unidades]})
+
+    @classmethod
+    def sumar_elementos(cls, elementos, signo=1):
+        """Suma (o resta, signo=-1) elementos ya cargados, ej. después de un bulk_create."""
+        deltas = {}
+        for elemento in elementos:
+            clave, unidades = cls.clave_unidades({campo: getattr(elemento, campo) for campo in CAMPOS_CONTADOR})
+            delta = deltas.setdefault(clave, [0, 0])
+            delta[0] += signo
+            delta[1] += signo * unidades
+        cls.aplicar(deltas)
+
+    @classmethod
+    def aplicar(cls, deltas):
+        """
+        Aplica {(tipo, estado, ubicación): [registros, unidades]} con
+        UPDATE ... SET registros = registros + n, seguro con escrituras
+        concurrentes. Las claves van siempre en el mismo orden para que dos
+        transacciones no se bloqueen mutuamente; la fila se crea con el
+        primer elemento de la combinación.
+        """
+        for clave in sorted(deltas, key=lambda c: (c[0], c[1], c[2] or 0)):
+            registros, unidades = deltas[clave]
+            if not registros and not unidades:
+                continue
+            filtro = dict(zip(('tipo_dispositivo_id', 'estado_id', 'ubicacion_id'), clave))
+            cambios = {'registros': models.F('registros') + registros, 'unidades': models.F('unidades') + unidades}
+            if cls.objects.filter(**filtro).update(**cambios):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(**filtro, registros=registros, unidades=unidades)
+            except IntegrityError:  # Otra transacción la creó al mismo tiempo
+                cls.objects.filter(**filtro).update(**cambios)
+
+
+def agregado_contadores(elementos):
+    """
+    Registros y unidades de un QuerySet de Elemento por (tipo, estado,
+    ubicación), en una sola consulta agregada: lo que deberían tener los contadores.
+    """
+    return (
+        elementos.order_by()
+        .values('tipo_dispositivo_id', 'estado_id', 'ubicacion_id')
+        .annotate(
+            registros=models.Count('pk'),
+            unidades=models.Sum(models.Case(
+                models.When(maneja_cantidad=True, then=models.F('cantidad')), default=models.Value(1),
+            )),
+        )
+    )
+
+
+# ==============================================================================
+# 8. Resúmenes Diarios (tendencias del dashboard)
+# ==============================================================================
+
+class ResumenDiario(models.Model):
+    """
+    Foto del inventario al final de un día: registros y unidades por (tipo,
+    estado, ubicación), como ContadorInventario. Las genera el comando
+    'resumen_diario' (ver inventario/resumenes.py) y el dashboard dibuja las
+    tendencias con ellas sin recorrer el inventario ni el historial.
+
+    Sin restricciones en la BD, igual que el historial: el resumen de un día
+    pasado se conserva aunque después se elimine un tipo, estado o ubicación.
+    """
+    fecha = models.DateField(verbose_name="Fecha")
+    tipo_dispositivo = models.ForeignKey(
+        TipoDispositivo,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name="Tipo de Dispositivo"
+    )
+    estado = models.ForeignKey(
+        EstadoElemento,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name="Estado"
+    )
+    ubicacion = models.ForeignKey(
+        Localizacion,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+',
+        verbose_name="Ubicación"
+    )
+    registros = models.IntegerField(verbose_name="Registros")
+    unidades = models.IntegerField(verbose_name="Unidades")
+
+    class Meta:
+        verbose_name = 'Resumen Diario'
+        verbose_name_plural = 'Resúmenes Diarios'
+        ordering = ['fecha']
+        indexes = [
+            # Tendencias del dashboard (días de un rango)
+            models.Index(fields=['fecha'], name='resumen_dia_fecha_idx'),
+        ]
+        constraints = [
+            # Una fila por día y combinación, con y sin ubicación
+            models.UniqueConstraint(
+                fields=['fecha', 'tipo_dispositivo', 'estado', 'ubicacion'],
+                condition=models.Q(ubicacion__isnull=False),
+                name='resumen_dia_clave_unica',
+            ),
+            models.UniqueConstraint(
+                fields=['fecha', 'tipo_dispositivo', 'estado'],
+                condition=models.Q(ubicacion__isnull=True),
+                name='resumen_dia_sin_ubicacion_unica',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y} {self.tipo_dispositivo_id}/{self.estado_id}/{self.ubicacion_id}: {self.unidades} uds."
@@ -0,0 +1,219 @@
+# inventario/resumenes.py
+"""
+Resúmenes diarios del inventario (ResumenDiario) para las tendencias del dashboard.
+
+- El resumen de hoy se copia de ContadorInventario: una fila por
+  combinación, sin recorrer el inventario. El comando 'resumen_diario' se
+  programa al final del día (y puede repetirse: reemplaza el de hoy).
+- Los días pasados se reconstruyen de una vez (--desde): se parte del
+  inventario actual y se recorre el historial hacia atrás, deshaciendo sus
+  cambios día por día. Cada cambio mueve un elemento de una combinación a
+  otra, así que los totales se actualizan sin volver a agregar todo el
+  inventario por cada día; el historial se lee en una sola pasada por su
+  índice de fecha.
+
+Al reconstruir, un elemento existe desde su fecha de adquisición o la de
+registro (la más antigua: el equipo ya estaba antes de cargarse al
+sistema); si se deshace un cambio de la fecha de adquisición, la de alta
+se mueve con ella. El archivado y la eliminación se deshacen con los valores
+que guardan en el historial, que no incluyen la fecha de registro: se toma
+del elemento (si volvió al inventario o sigue en el archivo) o de su fila de
+creación en el historial. Una restauración deshecha vuelve a dejar el
+elemento en el archivo (fuera del inventario).
+"""
+import datetime
+from collections import defaultdict
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .historial import ALTAS, SALIDAS
+from .models import CAMPOS_CONTADOR, ContadorInventario, Elemento, ElementoArchivado, HistorialElemento, ResumenDiario
+
+Accion = HistorialElemento.Accion
+UN_DIA = datetime.timedelta(days=1)
+
+
+def inicio_dia(fecha):
+    """Primer instante de 'fecha' en la zona horaria del sitio."""
+    return timezone.make_aware(datetime.datetime.combine(fecha, datetime.time.min))
+
+
+def _convertir(campo, texto):
+    return Elemento._meta.get_field(campo.removesuffix('_id')).to_python(texto)
+
+
+# ==============================================================================
+# 1. Reconstrucción hacia atrás
+# ==============================================================================
+
+class _Inventario:
+    """Elementos presentes con su combinación y los totales por combinación."""
+
+    def __init__(self):
+        self.elementos = {}  # id -> {campo: valor} (CAMPOS_CONTADOR)
+        self.totales = defaultdict(lambda: [0, 0])
+        self.altas = {}  # id -> fecha de alta
+        self.fechas = {}  # id -> (fecha de adquisición, fecha de registro)
+        self.por_alta = defaultdict(list)  # fecha de alta -> ids
+
+    def poner(self, pk, valores, adquisicion, registro):
+        """Agrega (o reemplaza) el elemento; su alta es la más antigua de las fechas conocidas."""
+        alta_anterior = self.altas.get(pk)
+        self.quitar(pk)
+        self.elementos[pk] = valores
+        clave, unidades = ContadorInventario.clave_unidades(valores)
+        self.totales[clave][0] += 1
+        self.totales[clave][1] += unidades
+        alta = min((fecha for fecha in (adquisicion, registro) if fecha), default=datetime.date.min)
+        self.altas[pk], self.fechas[pk] = alta, (adquisicion, registro)
+        if alta != alta_anterior:
+            self.por_alta[alta].append(pk)  # Si no cambió, ya está en su lista
+
+    def quitar(self, pk):
+        valores = self.elementos.pop(pk, None)
+        self.altas.pop(pk, None)
+        self.fechas.pop(pk, None)
+        if valores is not None:
+            clave, unidades = ContadorInventario.clave_unidades(valores)
+            self.totales[clave][0] -= 1
+            self.totales[clave][1] -= unidades
+        return valores
+
+    def cambiar(self, pk, cambios, adquisicion=None):
+        valores = self.elementos.get(pk)
+        if valores is not None:
+            anterior, registro = self.fechas[pk]
+            self.poner(pk, {**valores, **cambios}, adquisicion or anterior, registro)
+
+    def dar_de_baja_altas_posteriores(self, fecha):
+        """Quita los elementos cuya fecha de alta es posterior a 'fecha'."""
+        for alta in [alta for alta in self.por_alta if alta > fecha]:
+            for pk in self.por_alta.pop(alta):
+                if self.altas.get(pk) == alta:  # Si volvió a entrar, puede tener otra fecha de alta
+                    self.quitar(pk)
+
+    def filas(self):
+        return {clave: tuple(total) for clave, total in self.totales.items() if total[0] or total[1]}
+
+
+def reconstruir_dias(desde, hasta):
+    """
+    Genera (fecha, {(tipo, estado, ubicación): (registros, unidades)}) al
+    final de cada día, de 'hasta' hacia atrás hasta 'desde' (ambos antes de hoy).
+    """
+    inventario = _Inventario()
+    actuales = Elemento.objects.order_by().values_list(
+        'pk', *CAMPOS_CONTADOR, 'fecha_adquisicion', 'fecha_registro'
+    )
+    for pk, *valores, adquisicion, registro in actuales.iterator(chunk_size=5000):
+        inventario.poner(pk, dict(zip(CAMPOS_CONTADOR, valores)), adquisicion, timezone.localtime(registro).date())
+    registros = _fechas_registro(desde)
+
+    # Los cambios de cada guardado comparten fecha y se insertan juntos: se agrupan por elemento
+    cambios = (
+        HistorialElemento.objects
+        .filter(fecha__gte=inicio_dia(desde + UN_DIA), campo__in=(*CAMPOS_CONTADOR, 'fecha_adquisicion'))
+        .order_by('-fecha', '-id')
+        .values_list('elemento_id', 'accion', 'fecha', 'campo', 'valor_anterior')
+        .iterator(chunk_size=5000)
+    )
+    grupos = groupby(cambios, key=lambda fila: fila[:3])
+    pendiente = next(grupos, None)
+
+    fecha = hasta
+    while fecha >= desde:
+        limite = inicio_dia(fecha + UN_DIA)
+        while pendiente is not None and pendiente[0][2] >= limite:
+            (pk, accion, _fecha), filas = pendiente
+            _deshacer(inventario, pk, accion, {campo: valor for *_, campo, valor in filas}, registros.get(pk))
+            pendiente = next(grupos, None)
+        inventario.dar_de_baja_altas_posteriores(fecha)
+        yield fecha, inventario.filas()
+        fecha -= UN_DIA
+
+
+def _fechas_registro(desde):
+    """
+    Fecha de registro (día local) de los elementos que salieron del inventario
+    después de 'desde': la del elemento si volvió o sigue en el archivo, o la
+    de su primera fila de creación en el historial (eliminados).
+    """
+    salidas = HistorialElemento.objects.filter(
+        accion__in=SALIDAS, fecha__gte=inicio_dia(desde + UN_DIA)
+    ).values('elemento_id')
+    fechas = dict(
+        HistorialElemento.objects.filter(accion=Accion.CREACION, elemento_id__in=salidas)
+        .order_by().values('elemento_id').annotate(primera=Min('fecha')).values_list('elemento_id', 'primera')
+    )
+    for modelo in (ElementoArchivado, Elemento):
+        fechas.update(modelo.objects.filter(pk__in=salidas).order_by().values_list('pk', 'fecha_registro'))
+    return {pk: timezone.localtime(fecha).date() for pk, fecha in fechas.items()}
+
+
+def _deshacer(inventario, pk, accion, anteriores, registro=None):
+    """Deja al elemento 'pk' como estaba antes de un cambio del historial."""
+    adquisicion = _convertir('fecha_adquisicion', anteriores.get('fecha_adquisicion'))
+    if accion in SALIDAS:
+        # Eliminado o archivado después: antes estaba, con los valores que guardó el historial
+        if all(campo in anteriores for campo in CAMPOS_CONTADOR):
+            valores = {campo: _convertir(campo, anteriores[campo]) for campo in CAMPOS_CONTADOR}
+            inventario.poner(pk, valores, adquisicion, registro)
+    elif accion == Accion.RESTAURACION:
+        inventario.quitar(pk)  # Antes de restaurarse estaba en el archivo
+    elif accion not in ALTAS:
+        inventario.cambiar(pk, {
+            campo: _convertir(campo, valor) for campo, valor in anteriores.items() if campo in CAMPOS_CONTADOR
+        }, adquisicion)
+    # Creación: nada que deshacer; el elemento sale del inventario en su fecha de alta
+
+
+# ==============================================================================
+# 2. Guardado
+# ==============================================================================
+
+def _guardar_dia(fecha, filas):
+    ResumenDiario.objects.filter(fecha=fecha).delete()
+    ResumenDiario.objects.bulk_create([
+        ResumenDiario(
+            fecha=fecha, tipo_dispositivo_id=tipo, estado_id=estado, ubicacion_id=ubicacion,
+            registros=registros, unidades=unidades,
+        )
+        for (tipo, estado, ubicacion), (registros, unidades) in filas.items()
+    ], batch_size=1000)
+
+
+def resumen_de_hoy():
+    """Filas del resumen de hoy, leídas de los contadores."""
+    return {
+        (tipo, estado, ubicacion): (registros, unidades)
+        for tipo, estado, ubicacion, registros, unidades in ContadorInventario.objects.exclude(
+            registros=0, unidades=0
+        ).values_list('tipo_dispositivo_id', 'estado_id', 'ubicacion_id', 'registros', 'unidades')
+    }
+
+
+def guardar_resumenes(desde=None, reemplazar=False):
+    """
+    Guarda el resumen de hoy y, con 'desde', reconstruye los días anteriores
+    que falten (o todos, con reemplazar=True). Devuelve los días guardados.
+    """
+    hoy = timezone.localdate()
+    guardados = []
+    with transaction.atomic():
+        _guardar_dia(hoy, resumen_de_hoy())
+    guardados.append(hoy)
+
+    if desde is not None and desde < hoy:
+        existentes = set() if reemplazar else set(
+            ResumenDiario.objects.filter(fecha__range=(desde, hoy)).values_list('fecha', flat=True).distinct()
+        )
+        for fecha, filas in reconstruir_dias(desde, hoy - UN_DIA):
+            if fecha in existentes:
+                continue
+            with transaction.atomic():
+                _guardar_dia(fecha, filas)
+            guardados.append(fecha)
+    return guardados
@@ -0,0 +1,118 @@
+# inventario/signals.py
+"""
+"Versión" de los datos del inventario, guardada en la caché compartida.
+
+Cambia cada vez que se guarda o elimina un Elemento o un catálogo, así que
+cualquier valor cacheado cuya clave incluya version_datos() queda invalidado
+solo, sin tener que borrar claves una por una.
+
+Los catálogos tienen además su propia versión (version_catalogos), que solo
+cambia al guardar o eliminar un tipo o un estado.
+
+Una versión nueva es un valor único (no version + 1): cache.incr() en
+FileBasedCache lee y escribe el archivo sin bloqueo, así que dos procesos
+que incrementan a la vez pueden dejar un solo cambio. Con un valor único, el
+último en escribir gana y cualquiera de los dos invalida lo cacheado.
+
+Las señales se envían dentro de la transacción del cambio: la versión cambia
+en ese momento y otra vez al confirmar (on_commit), para descartar lo que se
+haya cacheado con los datos anteriores mientras la transacción seguía abierta.
+
+Los cambios de Elemento se publican además en el canal de eventos del
+dashboard (ver eventos.py).
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .eventos import canal, fila_dashboard
+from .models import ContadorInventario, Elemento, EstadoElemento, HistorialElemento, Localizacion, TipoDispositivo
+
+CLAVE_VERSION = 'inventario:version_datos'
+CLAVE_VERSION_CATALOGOS = 'inventario:version_catalogos'
+
+
+def _nueva_version():
+    """Entero único: la hora en ns (ordena las versiones al leerlas) y 32 bits al azar."""
+    return (time.time_ns() << 32) | (uuid.uuid4().int & 0xFFFFFFFF)
+
+
+def _leer_version(clave):
+    version = cache.get(clave)
+    if version is None:
+        cache.add(clave, _nueva_version(), timeout=None)
+        version = cache.get(clave)
+    return version
+
+
+def _incrementar_version(clave):
+    cache.set(clave, _nueva_version(), timeout=None)
+
+
+def version_datos():
+    """Versión actual de los datos (se inicializa con la hora si no existe)."""
+    return _leer_version(CLAVE_VERSION)
+
+
+def incrementar_version_datos():
+    """
+    Invalida los valores cacheados por versión. Llamar también después de
+    operaciones masivas que no disparan señales (bulk_create, update()).
+    """
+    _incrementar_version(CLAVE_VERSION)
+
+
+def version_catalogos():
+    """Versión de los catálogos (tipos y estados), ver inventario/catalogos.py."""
+    return _leer_version(CLAVE_VERSION_CATALOGOS)
+
+
+def incrementar_version_catalogos():
+    _incrementar_version(CLAVE_VERSION_CATALOGOS)
+
+
+@receiver([post_save, post_delete], sender=Elemento)
+@receiver([post_save, post_delete], sender=TipoDispositivo)
+@receiver([post_save, post_delete], sender=EstadoElemento)
+@receiver([post_save, post_delete], sender=Localizacion)
+def datos_modificados(sender, **kwargs):
+    incrementar_version_datos()
+    # Otra vez al confirmar: la señal llega antes del COMMIT (y en Elemento.save
+    # antes del historial y los contadores); lo que otro proceso lea y guarde
+    # en la caché entre tanto queda con la versión nueva y los datos viejos
+    transaction.on_commit(incrementar_version_datos)
+
+
+@receiver([post_save, post_delete], sender=TipoDispositivo)
+@receiver([post_save, post_delete], sender=EstadoElemento)
+def catalogo_modificado(sender, **kwargs):
+    incrementar_version_catalogos()
+    # Otra vez al confirmar, como en datos_modificados
+    transaction.on_commit(incrementar_version_catalogos)
+
+
+@receiver(post_delete, sender=Elemento)
+def registrar_eliminacion(sender, instance, **kwargs):
+    # post_delete se envía dentro de la transacción del borrado (también en
+    # QuerySet.delete() y en la acción "eliminar seleccionados" del admin)
+    HistorialElemento.registrar_eliminacion(instance)
+    ContadorInventario.registrar_eliminacion(instance)
+
+
+@receiver([post_save, post_delete], sender=Elemento)
+def publicar_cambio(sender, instance, created=None, **kwargs):
+    if not canal.activo:
+        return  # Nadie tiene el dashboard abierto en este proceso
+    if created is None:  # post_delete
+        evento = {'accion': 'eliminado', 'id': instance.pk}
+    else:
+        evento = {'accion': 'creado' if created else 'modificado', **fila_dashboard(instance)}
+    # Solo cambios confirmados: un rollback no debe aparecer en pantalla. Los
+    # on_commit corren en orden y datos_modificados (conectado antes) ya
+    # registró el suyo: al publicarse, la versión ya cambió y estado_dashboard()
+    # no reutiliza lo que se cacheó antes del COMMIT
+    transaction.on_commit(lambda: canal.publicar('elemento', evento))
@@ -0,0 +1,230 @@
+# inventario/stock.py
+"""
+Movimientos de stock de los elementos que manejan cantidad.
+
+La cantidad nunca se escribe como valor absoluto: cada movimiento bloquea las
+filas afectadas (select_for_update, siempre en orden de pk para no generar
+bloqueos cruzados), valida que el saldo no quede negativo y aplica
+'cantidad = cantidad + delta' con F(). Por cada lote se ejecutan:
+
+- si hay transferencias, un SELECT ... FOR UPDATE de sus tipos de dispositivo:
+  la búsqueda del elemento de destino y su creación (si no existe) se hacen
+  con el tipo bloqueado, así dos transferencias simultáneas a la misma
+  localización no crean dos elementos equivalentes,
+- un SELECT ... FOR UPDATE con todos los elementos involucrados,
+- un único UPDATE (CASE por elemento) con contadores.actualizar_elementos(),
+  que además suma el cambio a los contadores del dashboard,
+- un INSERT en MovimientoStock (el libro) y otro en HistorialElemento.
+
+Uso:
+    from inventario.stock import Movimiento, aplicar_movimientos, transferir
+
+    transferir(cable, 10, 'Sala 2', usuario=request.user)
+    aplicar_movimientos([
+        Movimiento(cable.pk, MovimientoStock.Tipo.SALIDA, 3),
+        Movimiento(mouse.pk, MovimientoStock.Tipo.ENTRADA, 20),
+    ], usuario=request.user, nota='Ajuste de inventario')
+"""
+import uuid
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .contadores import actualizar_elementos
+from .models import (
+    Elemento, HistorialElemento, Localizacion, MovimientoStock, TipoDispositivo, valor_historial,
+)
+
+Tipo = MovimientoStock.Tipo
+
+# destino solo se usa en las transferencias (localización de destino)
+Movimiento = namedtuple('Movimiento', ['elemento_id', 'tipo', 'cantidad', 'destino'], defaults=[None])
+
+CAMPOS_BLOQUEO = (
+    'id', 'cantidad', 'maneja_cantidad', 'localizacion', 'tipo_dispositivo_id', 'marca', 'modelo',
+    'estado_id', 'ubicacion_id',
+)
+
+
+# ==============================================================================
+# 1. Atajos para un solo movimiento
+# ==============================================================================
+
+def entrada(elemento, cantidad, usuario=None, nota=''):
+    return aplicar_movimientos([Movimiento(elemento.pk, Tipo.ENTRADA, cantidad)], usuario, nota)
+
+
+def salida(elemento, cantidad, usuario=None, nota=''):
+    return aplicar_movimientos([Movimiento(elemento.pk, Tipo.SALIDA, cantidad)], usuario, nota)
+
+
+def transferir(elemento, cantidad, destino, usuario=None, nota=''):
+    """Mueve unidades a otra localización (al elemento equivalente, o a uno nuevo)."""
+    return aplicar_movimientos([Movimiento(elemento.pk, Tipo.TRANSFERENCIA, cantidad, destino)], usuario, nota)
+
+
+# ==============================================================================
+# 2. Aplicación en lote (una transacción)
+# ==============================================================================
+
+def _validar(movimiento):
+    if movimiento.tipo not in Tipo.values:
+        raise ValidationError(f'Tipo de movimiento desconocido: {movimiento.tipo!r}.')
+    if not isinstance(movimiento.cantidad, int) or movimiento.cantidad < 1:
+        raise ValidationError('La cantidad de un movimiento debe ser un entero mayor que cero.')
+    if movimiento.tipo == Tipo.TRANSFERENCIA and not (movimiento.destino or '').strip():
+        raise ValidationError('Las transferencias requieren una localización de destino.')
+
+
+def _normalizar_destino(destino):
+    ubicacion = Localizacion.desde_texto(destino)
+    if ubicacion is None:
+        raise ValidationError('Las transferencias requieren una localización de destino.')
+    return ubicacion.nombre_completo
+
+
+def _buscar_destino(origen, localizacion):
+    """Elemento por cantidad equivalente (tipo, marca y modelo) en la otra localización."""
+    return (
+        Elemento.objects
+        .filter(
+            maneja_cantidad=True,
+            tipo_dispositivo_id=origen['tipo_dispositivo_id'],
+            marca=origen['marca'],
+            modelo=origen['modelo'],
+            localizacion=localizacion,
+        )
+        .exclude(pk=origen['id'])
+        .order_by('pk')
+        .values_list('pk', flat=True)
+        .first()
+    )
+
+
+def aplicar_movimientos(movimientos, usuario=None, nota=''):
+    """
+    Aplica todos los movimientos en una sola transacción: si alguno no es
+    válido (ej. saldo insuficiente) no se aplica ninguno. Devuelve las filas
+    de MovimientoStock creadas.
+    """
+    movimientos = [
+        m._replace(destino=m.destino.strip()) if m.destino else m
+        for m in movimientos
+    ]
+    for movimiento in movimientos:
+        _validar(movimiento)
+    if not movimientos:
+        return []
+
+    usuario_id = usuario.pk if usuario is not None and usuario.is_authenticated else None
+    lote = uuid.uuid4()
+
+    with transaction.atomic():
+        # 0. Destinos con el nombre de la jerarquía ('sede norte -sala 2' -> 'Sede Norte - Sala 2')
+        movimientos = [m._replace(destino=_normalizar_destino(m.destino)) if m.destino else m for m in movimientos]
+
+        # 1. Destinos de las transferencias (antes de bloquear, para bloquear
+        #    origen y destino juntos y en orden de pk)
+        origenes = {
+            fila['id']: fila
+            for fila in Elemento.objects.filter(pk__in={m.elemento_id for m in movimientos}).values(*CAMPOS_BLOQUEO)
+        }
+        transferencias = [m for m in movimientos if m.tipo == Tipo.TRANSFERENCIA and m.elemento_id in origenes]
+        if transferencias:
+            # El tipo queda bloqueado hasta el final: buscar y crear el destino (paso 4) es atómico
+            tipos = {origenes[m.elemento_id]['tipo_dispositivo_id'] for m in transferencias}
+            list(TipoDispositivo.objects.select_for_update().filter(pk__in=tipos).order_by('pk').values_list('pk'))
+        destinos = {}
+        for m in transferencias:
+            destinos[(m.elemento_id, m.destino)] = _buscar_destino(origenes[m.elemento_id], m.destino)
+
+        # 2. Bloqueo de todas las filas involucradas
+        ids = set(origenes) | {pk for pk in destinos.values() if pk}
+        bloqueados = {
+            e.pk: e
+            for e in Elemento.objects.select_for_update().filter(pk__in=ids).order_by('pk').only(*CAMPOS_BLOQUEO)
+        }
+
+        # 3. Cálculo de saldos sobre los valores bloqueados
+        saldos = {pk: e.cantidad for pk, e in bloqueados.items()}
+        iniciales = dict(saldos)
+        filas = []
+        nuevos = {}  # (origen, localización) -> [elemento sin guardar, cantidad]
+
+        def registrar(elemento_id, tipo, delta, localizacion, contraparte=''):
+            filas.append(MovimientoStock(
+                elemento_id=elemento_id, tipo=tipo, cantidad=delta, saldo=saldos[elemento_id],
+                localizacion=localizacion, contraparte=contraparte, lote=lote, nota=nota,
+                usuario_id=usuario_id,
+            ))
+
+        for m in movimientos:
+            elemento = bloqueados.get(m.elemento_id)
+            if elemento is None:
+                raise ValidationError(f'El elemento {m.elemento_id} no existe.')
+            if not elemento.maneja_cantidad:
+                raise ValidationError(f'El elemento {elemento.pk} no maneja cantidad (tiene serial único).')
+
+            delta = m.cantidad if m.tipo == Tipo.ENTRADA else -m.cantidad
+            if saldos[elemento.pk] + delta < 0:
+                raise ValidationError(
+                    f'Stock insuficiente en "{elemento.marca} {elemento.modelo}" ({elemento.localizacion}): '
+                    f'hay {saldos[elemento.pk]} y se intentan retirar {m.cantidad}.'
+                )
+            saldos[elemento.pk] += delta
+            registrar(elemento.pk, m.tipo, delta, elemento.localizacion, m.destino or '')
+
+            if m.tipo == Tipo.TRANSFERENCIA:
+                if m.destino == elemento.localizacion:
+                    raise ValidationError('El destino de la transferencia es la misma localización.')
+                destino_id = destinos[(m.elemento_id, m.destino)]
+                if destino_id:
+                    saldos[destino_id] += m.cantidad
+                    registrar(destino_id, Tipo.TRANSFERENCIA, m.cantidad, m.destino, elemento.localizacion)
+                else:
+                    nuevos.setdefault((elemento.pk, m.destino), [elemento, 0])[1] += m.cantidad
+
+        # 4. Elementos nuevos en las localizaciones de destino (save(): historial de creación)
+        for (origen_id, localizacion), (origen, cantidad) in nuevos.items():
+            completo = Elemento.objects.get(pk=origen_id)
+            nuevo = Elemento(
+                maneja_cantidad=True,
+                cantidad=cantidad,
+                tipo_dispositivo_id=completo.tipo_dispositivo_id,
+                marca=completo.marca,
+                modelo=completo.modelo,
+                localizacion=localizacion,
+                estado_id=completo.estado_id,
+                descripcion=completo.descripcion,
+                fecha_adquisicion=completo.fecha_adquisicion,
+                precio=completo.precio,
+                usuario_registro_id=usuario_id or completo.usuario_registro_id,
+            )
+            nuevo.save()
+            saldos[nuevo.pk] = cantidad
+            registrar(nuevo.pk, Tipo.TRANSFERENCIA, cantidad, localizacion, origen.localizacion)
+
+        # 5. Un solo UPDATE con el delta neto de cada elemento
+        deltas = {pk: saldos[pk] - iniciales[pk] for pk in iniciales if saldos[pk] != iniciales[pk]}
+        if deltas:
+            ahora = timezone.now()
+            actualizar_elementos(
+                Elemento.objects.filter(pk__in=deltas),
+                cantidad=F('cantidad') + Case(*[When(pk=pk, then=Value(d)) for pk, d in deltas.items()]),
+                fecha_actualizacion=ahora,
+            )
+            HistorialElemento.objects.bulk_create([
+                HistorialElemento(
+                    elemento_id=pk, accion=HistorialElemento.Accion.MODIFICACION, campo='cantidad',
+                    valor_anterior=valor_historial(iniciales[pk]), valor_nuevo=valor_historial(saldos[pk]),
+                    usuario_id=usuario_id, fecha=ahora,
+                )
+                for pk in deltas
+            ])
+
+        creados = MovimientoStock.objects.bulk_create(filas)
+
+    return creados
@@ -0,0 +1,197 @@
+# inventario/testing.py
+"""
+Utilidades compartidas por los tests.py de las apps para las pruebas de
+"presupuesto de consultas": cada vista tiene un máximo de consultas SQL que no
+depende de cuántos elementos haya (así un N+1 hace fallar la prueba), y
+modo_asgi para probar las vistas asíncronas. EjecutorPruebas es el
+TEST_RUNNER del proyecto.
+"""
+import datetime
+import importlib
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, TestContextDecorator
+from django.urls import clear_url_caches, reverse
+
+from inventario_tecnologico.metricas import cerrar_registro
+
+from .catalogos import precargar_catalogos
+from .models import ContadorInventario, Elemento, EstadoElemento, TipoDispositivo
+from .signals import incrementar_version_datos
+
+# ==============================================================================
+# 1. Presupuestos por nombre de URL
+# ==============================================================================
+
+# Las vistas con login gastan 2 consultas fijas: sesión y usuario.
+PRESUPUESTO_CONSULTAS = {
+    # inventario
+    'inventario:dashboard': 5,             # + resumen (aggregate) + últimos registros + tendencias (resúmenes diarios)
+    'inventario:lista_inventario': 4,      # + count + página (tipo y estado con select_related)
+    'inventario:ver_elemento': 4,          # + ETag (fecha_actualizacion) + elemento con tipo/estado/usuario
+    # + COUNT + página + valores de los filtros marca (DISTINCT) y ubicación (raíces):
+    # cada medición cambia la versión de los datos, así que sus valores no están en la caché
+    'admin:inventario_elemento_changelist': 6,
+    # exportacion
+    'exportacion:exportar_excel': 3,
+    'exportacion:exportar_pdf': 3,
+    'exportacion:exportar_json': 3,
+    'exportacion:exportar_etiquetas': 3,
+    'exportacion:sincronizar': 4,          # + página de elementos + página de eliminados (+1 si hay lápidas)
+    # usuarios
+    'usuarios:login': 0,
+    'usuarios:perfil': 2,
+    'admin:usuarios_usuario_changelist': 5,
+}
+
+# Tamaños del inventario con los que se mide cada vista
+TAMANOS_INVENTARIO = (3, 40)
+
+
+# ==============================================================================
+# 2. Datos de prueba
+# ==============================================================================
+
+def crear_inventario(cantidad, usuario, inicio=0):
+    """
+    Crea 'cantidad' elementos (serial y por cantidad) repartidos entre varios
+    tipos y estados, para que un N+1 se note en el número de consultas.
+    """
+    tipos = [TipoDispositivo.objects.get_or_create(nombre=n)[0] for n in ('Laptop', 'Monitor', 'Cable')]
+    estados = [EstadoElemento.objects.get_or_create(nombre=n)[0] for n in ('En Uso', 'Almacén', 'Baja')]
+
+    elementos = []
+    for i in range(inicio, inicio + cantidad):
+        maneja_cantidad = i % 5 == 0
+        elementos.append(Elemento(
+            maneja_cantidad=maneja_cantidad,
+            cantidad=10 if maneja_cantidad else 1,
+            tipo_dispositivo=tipos[i % len(tipos)],
+            estado=estados[i % len(estados)],
+            marca=f'Marca {i % 4}',
+            modelo=f'Modelo {i}',
+            serial=None if maneja_cantidad else f'TEST-{i:05d}',
+            localizacion=f'Oficina {i % 6}',
+            fecha_adquisicion=datetime.date(2024, 1, 1) + datetime.timedelta(days=i),
+            usuario_registro=usuario,
+        ))
+    creados = Elemento.objects.bulk_create(elementos)
+    ContadorInventario.sumar_elementos(creados)
+    incrementar_version_datos()  # bulk_create no envía post_save
+    return creados
+
+
+# ==============================================================================
+# 3. Mixin para TestCase
+# ==============================================================================
+
+class PresupuestoConsultasMixin:
+    """
+    Uso (en un TestCase con self.client autenticado):
+
+        self.assertPresupuestoConsultas('inventario:lista_inventario')
+
+    Mide la vista con cada tamaño de TAMANOS_INVENTARIO y verifica que no
+    supere PRESUPUESTO_CONSULTAS ni cambie su número de consultas al crecer
+    el inventario.
+    """
+    usuario_inventario = None
+
+    def assertPresupuestoConsultas(self, nombre_url, args=None, params=None):
+        presupuesto = PRESUPUESTO_CONSULTAS[nombre_url]
+        url = reverse(nombre_url, args=args)
+
+        creados = Elemento.objects.count()
+        mediciones = []
+        for tamano in TAMANOS_INVENTARIO:
+            if creados < tamano:
+                crear_inventario(tamano - creados, self.usuario_inventario, inicio=creados)
+                creados = tamano
+
+            # Los catálogos se cargan una vez por proceso: se mide en estado estable
+            precargar_catalogos()
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(url, params)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertEqual(response.status_code, 200, f'{nombre_url} respondió {response.status_code}')
+
+            detalle = '\n'.join(q['sql'] for q in consultas.captured_queries)
+            self.assertLessEqual(
+                len(consultas), presupuesto,
+                f'{nombre_url}: {len(consultas)} consultas con {tamano} elementos '
+                f'(presupuesto {presupuesto}):\n{detalle}',
+            )
+            mediciones.append(len(consultas))
+
+        self.assertEqual(
+            len(set(mediciones)), 1,
+            f'{nombre_url}: el número de consultas depende del tamaño del inventario '
+            f'{dict(zip(TAMANOS_INVENTARIO, mediciones))}',
+        )
+
+
+# ==============================================================================
+# 4. Modo ASGI
+# ==============================================================================
+
+URLCONF_MODO = ('inventario.urls', 'exportacion.urls')
+
+
+def _recargar_urls():
+    for modulo in (*URLCONF_MODO, settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(modulo))
+    clear_url_caches()
+
+
+class modo_asgi(override_settings):
+    """
+    override_settings(MODO_ASGI=activo) que además recarga las URLconf:
+    inventario/urls.py y exportacion/urls.py eligen sus vistas (síncronas o
+    asíncronas) al importarse. Se usa como decorador de clase o de método:
+
+        @modo_asgi()          # vistas asíncronas, probar con self.async_client
+        @modo_asgi(False)     # vistas síncronas, aunque el entorno tenga MODO_ASGI=True
+    """
+    def __init__(self, activo=True):
+        super().__init__(MODO_ASGI=activo)
+
+    def decorate_class(self, cls):
+        # override_settings aplica sus valores en setUpClass sin llamar a
+        # enable(); así se activa (y se recargan las URLconf) en cada test
+        return TestContextDecorator.decorate_class(self, cls)
+
+    def enable(self):
+        super().enable()
+        _recargar_urls()
+
+    def disable(self):
+        super().disable()
+        _recargar_urls()
+
+
+# ==============================================================================
+# 5. Ejecutor de pruebas
+# ==============================================================================
+
+class EjecutorPruebas(DiscoverRunner):
+    """
+    DiscoverRunner con las métricas (inventario_tecnologico/metricas.py) en un
+    directorio temporal: las peticiones de las pruebas no se suman a las del
+    servidor ni crean BASE_DIR/metricas.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._metricas = tempfile.TemporaryDirectory(prefix='metricas_pruebas_')
+        self._metricas_dir = settings.METRICAS_DIR
+        settings.METRICAS_DIR = self._metricas.name
+
+    def teardown_test_environment(self, **kwargs):
+        cerrar_registro()  # Antes de borrar el directorio (atexit volvería a crearlo)
+        settings.METRICAS_DIR = self._metricas_dir
+        self._metricas.cleanup()
+        super().teardown_test_environment(**kwargs)
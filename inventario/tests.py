@@ -1,3 +1,1310 @@
-from django.test import TestCase
+# inventario/tests.py
+import asyncio
+import datetime
+import gzip
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from unittest import mock
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, ValidationError
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.db import connection, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from exportacion.sincronizacion import INICIO, codificar_cursor, pagina_cambios
+from inventario_tecnologico import archivos, bitacora, metricas, perfilamiento, replica, storage
+from inventario_tecnologico.storage import ManifestComprimidoStorage
+from usuarios.models import Usuario
+
+from .archivo import archivar_bajas, restaurar
+from .auditoria import DESCONOCIDO, ENCONTRADO, FUERA_DE_LUGAR, registrar_lecturas, resumen_conciliacion
+from .catalogos import catalogo, nombre_catalogo, precargar_catalogos
+from .contadores import actualizar_elementos, diferencias_contadores
+from .eventos import REINTENTO_ASGI, CanalEventos
+from .filters import ElementoFilter
+from .forms import ElementoForm
+from .historial import historial_elemento, inventario_a_fecha
+from .models import (
+    ContadorInventario, Elemento, ElementoArchivado, EstadoElemento, HistorialElemento, Localizacion,
+    MovimientoStock, ResumenDiario, SesionAuditoria, TipoDispositivo,
+)
+from .resumenes import guardar_resumenes, inicio_dia
+from .signals import incrementar_version_datos, version_datos
+from .stock import entrada, salida, transferir
+from .ubicaciones import filtrar_subarbol
+from .testing import PresupuestoConsultasMixin, crear_inventario, modo_asgi
+from .views import estado_dashboard
+
+
+class PresupuestoConsultasInventarioTests(PresupuestoConsultasMixin, TestCase):
+    """Número máximo de consultas de las vistas del inventario y del admin."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario_inventario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+
+    def setUp(self):
+        self.client.force_login(self.usuario_inventario)
+
+    def test_dashboard(self):
+        self.assertPresupuestoConsultas('inventario:dashboard')
+
+    def test_lista(self):
+        self.assertPresupuestoConsultas('inventario:lista_inventario')
+
+    def test_lista_con_busqueda(self):
+        self.assertPresupuestoConsultas('inventario:lista_inventario', params={'q': 'Marca'})
+
+    def test_detalle(self):
+        elemento = crear_inventario(1, self.usuario_inventario)[0]
+        self.assertPresupuestoConsultas('inventario:ver_elemento', args=[elemento.pk])
+
+    def test_admin_changelist(self):
+        self.assertPresupuestoConsultas('admin:inventario_elemento_changelist')
+
+    def test_admin_filtros_en_cache_hasta_que_cambian_los_datos(self):
+        elemento = crear_inventario(5, self.usuario_inventario)[0]
+        url = reverse('admin:inventario_elemento_changelist')
+
+        def consultas():
+            with CaptureQueriesContext(connection) as capturadas:
+                self.client.get(url)
+            return len(capturadas)
+
+        precargar_catalogos()
+        sin_cache = consultas()
+        # Los DISTINCT de marca y localización salen de la caché
+        self.assertEqual(consultas(), sin_cache - 2)
+        elemento.save()
+        self.assertEqual(consultas(), sin_cache)
+
+
+class CatalogosTests(TestCase):
+    """Tipos y estados servidos desde la memoria del proceso."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laptop = TipoDispositivo.objects.create(nombre='Laptop')
+        cls.en_uso = EstadoElemento.objects.create(nombre='En Uso')
+
+    def test_formularios_sin_consultar_los_catalogos(self):
+        precargar_catalogos()
+        with self.assertNumQueries(0):
+            html = ElementoForm().as_p() + ElementoFilter({}).form.as_p()
+        self.assertIn('Laptop', html)
+        self.assertIn('En Uso', html)
+
+    def test_guardar_un_catalogo_lo_invalida(self):
+        self.assertEqual(nombre_catalogo(TipoDispositivo, self.laptop.pk), 'Laptop')
+        monitor = TipoDispositivo.objects.create(nombre='Monitor')
+        self.assertEqual(catalogo(TipoDispositivo), ((self.laptop.pk, 'Laptop'), (monitor.pk, 'Monitor')))
+
+        monitor.delete()
+        self.assertEqual(catalogo(TipoDispositivo), ((self.laptop.pk, 'Laptop'),))
+
+
+class LocalizacionesTests(TestCase):
+    """Jerarquía de localizaciones y consultas por subárbol."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        cls.tipo = TipoDispositivo.objects.create(nombre='Laptop')
+        cls.estado = EstadoElemento.objects.create(nombre='En Uso')
+
+    def crear_elemento(self, serial, localizacion):
+        return Elemento.objects.create(
+            tipo_dispositivo=self.tipo, estado=self.estado, marca='HP', modelo='ProBook',
+            serial=serial, localizacion=localizacion, fecha_adquisicion='2024-01-01',
+            usuario_registro=self.usuario,
+        )
+
+    def test_el_texto_se_normaliza_en_la_jerarquia(self):
+        primero = self.crear_elemento('LOC-1', 'Sede Norte - Piso 2 - Sistemas')
+        segundo = self.crear_elemento('LOC-2', '  sede  norte / PISO 2>sistemas ')
+
+        self.assertEqual(primero.ubicacion_id, segundo.ubicacion_id)
+        self.assertEqual(segundo.localizacion, 'Sede Norte - Piso 2 - Sistemas')
+        self.assertEqual(
+            list(Localizacion.objects.values_list('ruta', 'tipo', 'profundidad')),
+            [('sede norte/', 'S', 0), ('sede norte/piso 2/', 'P', 1), ('sede norte/piso 2/sistemas/', 'A', 2)],
+        )
+
+    def test_subarbol_por_prefijo(self):
+        self.crear_elemento('LOC-1', 'Sede Norte - Piso 2 - Sistemas')
+        self.crear_elemento('LOC-2', 'Sede Norte - Piso 3')
+        self.crear_elemento('LOC-3', 'Sede Norte Anexo')
+        elementos = Elemento.objects.all()
+
+        self.assertEqual(filtrar_subarbol(elementos, 'sede norte').count(), 2)
+        self.assertEqual(filtrar_subarbol(elementos, 'Sede Norte - Piso 2').count(), 1)
+        self.assertEqual(ElementoFilter({'ubicacion': 'sede norte/piso 3/'}, queryset=elementos).qs.get().serial, 'LOC-2')
+
+    def test_cambiar_la_ubicacion_actualiza_el_texto(self):
+        elemento = self.crear_elemento('LOC-1', 'Sede Norte')
+        elemento.ubicacion = Localizacion.desde_texto('Sede Sur - Bodega')
+        elemento.save()
+        self.assertEqual(Elemento.objects.get(pk=elemento.pk).localizacion, 'Sede Sur - Bodega')
+
+    def test_elemento_invalido_no_crea_localizaciones(self):
+        with self.assertRaises(ValidationError):
+            self.crear_elemento(None, 'Sede Oeste - Bodega')  # Sin serial ni cantidad
+        self.assertFalse(Localizacion.objects.exists())
+
+
+class HistorialElementoTests(TestCase):
+    """Historial de cambios y reconstrucción del inventario a una fecha."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        cls.tipo = TipoDispositivo.objects.create(nombre='Laptop')
+        cls.en_uso = EstadoElemento.objects.create(nombre='En Uso')
+        cls.baja = EstadoElemento.objects.create(nombre='Baja')
+
+    def crear_elemento(self):
+        return Elemento.objects.create(
+            tipo_dispositivo=self.tipo, estado=self.en_uso, marca='HP', modelo='ProBook',
+            serial='HIST-1', localizacion='Sala 1', fecha_adquisicion='2024-01-01',
+            usuario_registro=self.usuario,
+        )
+
+    def test_un_insert_por_guardado_con_una_fila_por_campo(self):
+        elemento = Elemento.objects.get(pk=self.crear_elemento().pk)
+        sala_1 = elemento.ubicacion
+        elemento.localizacion = 'Sala 2'
+        elemento.estado = self.baja
+
+        with CaptureQueriesContext(connection) as consultas:
+            elemento.save()
+        inserts = [q for q in consultas.captured_queries if q['sql'].startswith('INSERT INTO "inventario_historialelemento"')]
+        self.assertEqual(len(inserts), 1)
+
+        cambios = HistorialElemento.objects.filter(elemento_id=elemento.pk, accion=HistorialElemento.Accion.MODIFICACION)
+        self.assertEqual(
+            sorted(cambios.values_list('campo', 'valor_anterior', 'valor_nuevo')),
+            [
+                ('estado_id', str(self.en_uso.pk), str(self.baja.pk)),
+                ('localizacion', 'Sala 1', 'Sala 2'),
+                ('ubicacion_id', str(sala_1.pk), str(elemento.ubicacion_id)),
+            ],
+        )
+
+    def test_guardar_sin_cambios_no_escribe_historial(self):
+        elemento = Elemento.objects.get(pk=self.crear_elemento().pk)
+        antes = HistorialElemento.objects.count()
+        elemento.save()
+        self.assertEqual(HistorialElemento.objects.count(), antes)
+
+    def test_inventario_a_fecha(self):
+        antes_de_crear = timezone.now()
+        elemento = self.crear_elemento()
+        creado = timezone.now()
+
+        elemento.localizacion = 'Bodega'
+        elemento.save()
+        movido = timezone.now()
+
+        pk = elemento.pk
+        elemento.delete()
+
+        self.assertEqual(inventario_a_fecha(antes_de_crear), [])
+        self.assertEqual(inventario_a_fecha(creado)[0]['localizacion'], 'Sala 1')
+        self.assertEqual(inventario_a_fecha(creado)[0]['estado_id'], self.en_uso.pk)
+        self.assertEqual(inventario_a_fecha(movido)[0]['localizacion'], 'Bodega')
+        self.assertEqual(inventario_a_fecha(timezone.now()), [])
+
+        acciones = [cambio.accion for cambio in historial_elemento(pk)]
+        self.assertEqual(acciones[0], HistorialElemento.Accion.CREACION)
+        self.assertEqual(acciones[-1], HistorialElemento.Accion.ELIMINACION)
+
+
+class MovimientoStockTests(TestCase):
+    """Movimientos de stock de los elementos por cantidad."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        cls.tipo = TipoDispositivo.objects.create(nombre='Cable')
+        cls.estado = EstadoElemento.objects.create(nombre='Activo')
+
+    def setUp(self):
+        self.cable = Elemento.objects.create(
+            maneja_cantidad=True, cantidad=10, tipo_dispositivo=self.tipo, estado=self.estado,
+            marca='Genérico', modelo='HDMI 2m', localizacion='Bodega',
+            fecha_adquisicion='2024-01-01', usuario_registro=self.usuario,
+        )
+
+    def test_entrada_y_salida_actualizan_saldo_y_libro(self):
+        entrada(self.cable, 5, usuario=self.usuario)
+        salida(self.cable, 12, usuario=self.usuario)
+
+        self.cable.refresh_from_db()
+        self.assertEqual(self.cable.cantidad, 3)
+        self.assertEqual(
+            list(self.cable.movimientos.order_by('id').values_list('tipo', 'cantidad', 'saldo')),
+            [('E', 5, 15), ('S', -12, 3)],
+        )
+        self.assertEqual(
+            HistorialElemento.objects.filter(
+                elemento_id=self.cable.pk, campo='cantidad', accion=HistorialElemento.Accion.MODIFICACION
+            ).count(),
+            2,
+        )
+
+    def test_stock_insuficiente_no_aplica_nada(self):
+        with self.assertRaises(ValidationError):
+            salida(self.cable, 11)
+        self.cable.refresh_from_db()
+        self.assertEqual(self.cable.cantidad, 10)
+        self.assertFalse(MovimientoStock.objects.exists())
+
+    def test_transferencia_crea_y_luego_reutiliza_el_destino(self):
+        transferir(self.cable, 4, 'Sala 2', usuario=self.usuario)
+        destino = Elemento.objects.get(localizacion='Sala 2')
+        self.assertEqual((destino.marca, destino.modelo, destino.cantidad), ('Genérico', 'HDMI 2m', 4))
+
+        transferir(self.cable, 1, 'Sala 2', usuario=self.usuario)
+        destino.refresh_from_db()
+        self.cable.refresh_from_db()
+        self.assertEqual((self.cable.cantidad, destino.cantidad), (5, 5))
+        self.assertEqual(Elemento.objects.filter(localizacion='Sala 2').count(), 1)
+
+    def test_editar_no_sobrescribe_la_cantidad(self):
+        form = ElementoForm(instance=self.cable)  # formulario abierto con 10 uds.
+        datos = {nombre: form[nombre].value() for nombre in form.fields if nombre != 'imagen'}
+        salida(self.cable, 4)
+
+        datos['descripcion'] = 'Revisado'
+        form = ElementoForm(datos, instance=Elemento.objects.get(pk=self.cable.pk))
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        self.cable.refresh_from_db()
+        self.assertEqual((self.cable.cantidad, self.cable.descripcion), (6, 'Revisado'))
+
+    def test_vista_registra_el_movimiento(self):
+        self.client.force_login(self.usuario)
+        url = reverse('inventario:movimiento_stock', args=[self.cable.pk])
+        respuesta = self.client.post(url, {'tipo': 'S', 'cantidad': 20})
+        self.assertContains(respuesta, 'Stock insuficiente')
+
+        respuesta = self.client.post(url, {'tipo': 'S', 'cantidad': 2, 'nota': 'Entrega'})
+        self.assertRedirects(respuesta, url)
+        self.assertEqual(Elemento.objects.get(pk=self.cable.pk).cantidad, 8)
+
+    def test_vista_anonimo_va_al_login(self):
+        for pk in (self.cable.pk, 0):
+            url = reverse('inventario:movimiento_stock', args=[pk])
+            respuesta = self.client.get(url)
+            self.assertRedirects(respuesta, f"{reverse('usuarios:login')}?next={url}", fetch_redirect_response=False)
+
+
+class EdicionConcurrenteTests(TestCase):
+    """Bloqueo optimista de ElementoUpdateView."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        cls.tipo = TipoDispositivo.objects.create(nombre='Laptop')
+        cls.estado = EstadoElemento.objects.create(nombre='En Uso')
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        self.elemento = Elemento.objects.create(
+            tipo_dispositivo=self.tipo, estado=self.estado, marca='HP', modelo='ProBook',
+            serial='VER-1', localizacion='Sala 1', fecha_adquisicion='2024-01-01',
+            usuario_registro=self.usuario,
+        )
+        self.url = reverse('inventario:editar_elemento', args=[self.elemento.pk])
+
+    def datos_formulario(self):
+        """Datos tal como los enviaría el formulario abierto ahora."""
+        form = self.client.get(self.url).context['form']
+        return {nombre: form[nombre].value() for nombre in form.fields if nombre != 'imagen' and form[nombre].value() is not None}
+
+    def test_guardado_posterior_genera_conflicto_sin_sobrescribir(self):
+        datos = self.datos_formulario()
+
+        otro = Elemento.objects.get(pk=self.elemento.pk)
+        otro.localizacion = 'Bodega'
+        otro.save()
+
+        datos['localizacion'] = 'Sala 3'
+        respuesta = self.client.post(self.url, datos)
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(
+            [(d['guardado'], d['mio']) for d in respuesta.context['conflicto']['diferencias']],
+            [('Bodega', 'Sala 3')],
+        )
+        self.assertEqual(Elemento.objects.get(pk=self.elemento.pk).localizacion, 'Bodega')
+
+        # El formulario del conflicto ya lleva la versión actual: guardar de nuevo sobrescribe
+        datos['version'] = respuesta.context['form']['version'].value()
+        respuesta = self.client.post(self.url, datos)
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(Elemento.objects.get(pk=self.elemento.pk).localizacion, 'Sala 3')
+
+    def test_guardados_sucesivos_sin_conflicto(self):
+        for localizacion in ('Sala 2', 'Sala 3'):
+            datos = self.datos_formulario()
+            datos['localizacion'] = localizacion
+            self.assertEqual(self.client.post(self.url, datos).status_code, 302)
+        self.assertEqual(Elemento.objects.get(pk=self.elemento.pk).version, 3)
+
+    def test_instancia_vieja_no_repite_una_version(self):
+        viejo = Elemento.objects.get(pk=self.elemento.pk)  # Ej. el admin o un comando, leído en la versión 1
+        otro = Elemento.objects.get(pk=self.elemento.pk)
+        otro.localizacion = 'Bodega'
+        otro.save()
+        datos = self.datos_formulario()  # Formulario abierto en la versión 2
+
+        viejo.descripcion = 'Revisado'
+        viejo.save()
+        self.assertEqual(viejo.version, 3)  # No 2: la versión se incrementa en la BD
+
+        datos['localizacion'] = 'Sala 3'
+        self.assertEqual(self.client.post(self.url, datos).status_code, 409)
+
+    def test_guardar_bloquea_y_lee_la_fila_en_una_sola_consulta(self):
+        for version_esperada in (None, 1):
+            with self.subTest(version_esperada=version_esperada):
+                elemento = Elemento.objects.get(pk=self.elemento.pk)
+                elemento._version_esperada = elemento.version if version_esperada else None
+                with CaptureQueriesContext(connection) as capturadas:
+                    elemento.save()
+                # Sin contar la validación del serial único de full_clean() ('SELECT 1 AS ...')
+                consultas = [
+                    consulta['sql'].split(' ', 1)[0] for consulta in capturadas
+                    if consulta['sql'].startswith('UPDATE "inventario_elemento"')
+                    or 'FROM "inventario_elemento"' in consulta['sql'] and not consulta['sql'].startswith('SELECT 1 AS')
+                ]
+                self.assertEqual(consultas, ['SELECT', 'UPDATE'])
+
+
+class AuditoriaTests(TestCase):
+    """Lectura de seriales por lotes y conciliación de una auditoría física."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        tipo = TipoDispositivo.objects.create(nombre='Laptop')
+        estado = EstadoElemento.objects.create(nombre='En Uso')
+        for serial, localizacion in (
+            ('AUD-1', 'Sede Norte - Piso 2 - Sistemas'),
+            ('AUD-2', 'Sede Norte - Piso 2'),
+            ('AUD-3', 'Sede Norte - Piso 2 - Sistemas'),
+            ('AUD-4', 'Sede Sur'),
+        ):
+            Elemento.objects.create(
+                tipo_dispositivo=tipo, estado=estado, marca='HP', modelo='ProBook',
+                serial=serial, localizacion=localizacion, fecha_adquisicion='2024-01-01',
+                usuario_registro=cls.usuario,
+            )
+        cls.piso = Localizacion.objects.get(ruta='sede norte/piso 2/')
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        self.sesion = SesionAuditoria.objects.create(ubicacion=self.piso, usuario=self.usuario)
+
+    def test_lote_en_dos_consultas_y_conciliacion(self):
+        with self.assertNumQueries(2):
+            resultado = registrar_lecturas(self.sesion, [' aud-1', 'AUD-1', 'aud-4 ', 'XYZ-9', ''])
+        self.assertEqual(
+            [(lectura['serial'], lectura['estado']) for lectura in resultado],
+            [('AUD-1', ENCONTRADO), ('AUD-4', FUERA_DE_LUGAR), ('XYZ-9', DESCONOCIDO)],
+        )
+
+        # Volver a leer un serial no lo cuenta dos veces
+        registrar_lecturas(self.sesion, ['aud-1', 'aud-2'])
+        with self.assertNumQueries(2):
+            resumen = resumen_conciliacion(self.sesion)
+        self.assertEqual(resumen, {
+            'encontrados': 2, 'faltantes': 1, 'fuera_de_lugar': 1, 'lecturas': 4, 'desconocidas': 1,
+        })
+
+    def test_endpoint_json(self):
+        url = reverse('inventario:lecturas_auditoria', args=[self.sesion.pk])
+        respuesta = self.client.post(url, {'seriales': ['aud-3', 'aud-4']}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['resumen']['faltantes'], 2)
+        self.assertEqual(respuesta.json()['lecturas'][1]['localizacion'], 'Sede Sur')
+
+        respuesta = self.client.post(url, {'seriales': 'aud-3'}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_sesion_cerrada_no_admite_lecturas(self):
+        self.client.post(reverse('inventario:cerrar_auditoria', args=[self.sesion.pk]))
+        respuesta = self.client.post(
+            reverse('inventario:lecturas_auditoria', args=[self.sesion.pk]), {'seriales': 'AUD-1\nAUD-2'}
+        )
+        self.assertRedirects(respuesta, reverse('inventario:sesion_auditoria', args=[self.sesion.pk]))
+        self.assertFalse(self.sesion.lecturas.exists())
+
+        respuesta = self.client.get(reverse('inventario:sesion_auditoria', args=[self.sesion.pk]))
+        self.assertEqual([fila['serial'] for fila in respuesta.context['faltantes']], ['AUD-2', 'AUD-1', 'AUD-3'])
+
+
+class EventosDashboardTests(TestCase):
+    """Flujo de cambios en vivo del dashboard (Server-Sent Events)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        cls.tipo = TipoDispositivo.objects.create(nombre='Laptop')
+        cls.estado = EstadoElemento.objects.create(nombre='En Uso')
+
+    def crear_elemento(self, serial):
+        return Elemento.objects.create(
+            tipo_dispositivo=self.tipo, estado=self.estado, marca='HP', modelo='ProBook',
+            serial=serial, localizacion='Sede Norte', fecha_adquisicion='2024-01-01',
+            usuario_registro=self.usuario,
+        )
+
+    @modo_asgi(False)  # La versión WSGI responde y cierra; la de ASGI se prueba en ModoAsgiTests
+    def test_estado_solo_si_cambio_la_version(self):
+        self.crear_elemento('SSE-1')
+        url = reverse('inventario:eventos_dashboard')
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        cuerpo = respuesta.content.decode()
+        self.assertIn('event: estado', cuerpo)
+        self.assertIn(f'id: {version_datos()}', cuerpo)
+        self.assertIn('"serial": "SSE-1"', cuerpo)
+
+        # El navegador ya tiene la versión actual: solo se le indica cuándo volver
+        respuesta = self.client.get(url, HTTP_LAST_EVENT_ID=str(version_datos()))
+        self.assertEqual(respuesta.content.decode(), 'retry: 30000\n\n')
+
+    def test_cambio_se_publica_al_confirmar(self):
+        with mock.patch('inventario.signals.canal') as canal:
+            canal.activo = True
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                elemento = self.crear_elemento('SSE-2')
+                canal.publicar.assert_not_called()
+            self.assertTrue(callbacks)
+        evento, datos = canal.publicar.call_args.args
+        self.assertEqual((evento, datos['accion'], datos['id'], datos['tipo']), ('elemento', 'creado', elemento.pk, 'Laptop'))
+
+    def test_estado_cacheado_antes_del_commit_no_se_reutiliza(self):
+        publicados = []
+        with mock.patch('inventario.signals.canal') as canal:
+            canal.activo = True
+            canal.publicar.side_effect = lambda *args: publicados.append(estado_dashboard()[0])
+            with self.captureOnCommitCallbacks(execute=True):
+                self.crear_elemento('SSE-3')
+                durante, _ = estado_dashboard()  # Un latido de otro cliente antes del COMMIT
+        self.assertNotIn(durante, publicados)
+        version, estado = estado_dashboard()
+        self.assertEqual((publicados, estado['resumen']['total_registros']), ([version], 1))
+
+    def test_canal_entrega_desde_otro_hilo(self):
+        canal = CanalEventos()
+
+        async def escuchar():
+            suscripcion = canal.suscribir()
+            hilo = threading.Thread(target=canal.publicar, args=('elemento', {'id': 1}))
+            hilo.start()
+            evento = await asyncio.wait_for(suscripcion.cola.get(), 1)
+            hilo.join()
+            canal.cancelar(suscripcion)
+            return evento
+
+        self.assertEqual(asyncio.run(escuchar()), ('elemento', {'id': 1}))
+        self.assertFalse(canal.activo)
+
+
+class RespuestaCondicionalTests(TestCase):
+    """ETag / 304 del detalle y de la lista de elementos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        cls.elemento = Elemento.objects.create(
+            tipo_dispositivo=TipoDispositivo.objects.create(nombre='Laptop'),
+            estado=EstadoElemento.objects.create(nombre='En Uso'),
+            marca='HP', modelo='ProBook', serial='ETAG-1', localizacion='Sede Norte',
+            fecha_adquisicion='2024-01-01', usuario_registro=cls.usuario,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def test_detalle_304_hasta_que_cambia_el_elemento(self):
+        url = reverse('inventario:ver_elemento', args=[self.elemento.pk])
+        self.assertNotIn('ETag', self.client.get(url))  # Aún sin cookie CSRF
+        respuesta = self.client.get(url)
+        etag = respuesta['ETag']
+        self.assertIn('private', respuesta['Cache-Control'])
+
+        # Sesión + usuario + la consulta por clave primaria de la ETag
+        with self.assertNumQueries(3):
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta.content, b'')
+
+        self.elemento.save()
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+        self.assertEqual(self.client.get(reverse('inventario:ver_elemento', args=[0])).status_code, 404)
+
+    def test_lista_304_por_version_de_datos_y_filtros(self):
+        url = reverse('inventario:lista_inventario')
+        self.client.get(url)
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(2):  # Solo sesión y usuario: la versión está en la caché
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {'page': 1}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        incrementar_version_datos()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_lista_armada_antes_del_commit_no_queda_en_cache(self):
+        url = reverse('inventario:lista_inventario')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.elemento.save()
+            etag = self.client.get(url)['ETag']  # Con la versión de la señal, antes del COMMIT
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_cada_version_nueva_es_unica(self):
+        # Sin cache.incr: en FileBasedCache lee y escribe sin bloqueo entre procesos
+        with mock.patch.object(cache, 'incr', side_effect=AssertionError):
+            versiones = set()
+            for _ in range(50):
+                incrementar_version_datos()
+                versiones.add(version_datos())
+        self.assertEqual(len(versiones), 50)
+
+    def test_la_version_cambia_otra_vez_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.elemento.save()
+            durante = version_datos()  # Lo que otro proceso cachearía antes del COMMIT
+        self.assertNotEqual(version_datos(), durante)
+
+
+@override_settings(REPLICA_ADHERENCIA=10)
+class ReplicaTests(TransactionTestCase):
+    """Qué lecturas van a la réplica y adherencia a 'default' después de escribir."""
+
+    def setUp(self):
+        cache.delete(replica.CLAVE_ESCRITURA)
+        replica._ultima_marca = 0.0
+        self.factory = RequestFactory()
+        self.router = replica.ReplicaRouter()
+
+    def test_destino_segun_vista_y_metodo(self):
+        lista = reverse('inventario:lista_inventario')
+        self.assertEqual(replica.destino_lecturas(self.factory.get(lista)), replica.ALIAS)
+        self.assertEqual(replica.destino_lecturas(self.factory.get('/admin/inventario/elemento/')), replica.ALIAS)
+        self.assertIsNone(replica.destino_lecturas(self.factory.post(lista)))
+        self.assertIsNone(replica.destino_lecturas(self.factory.get(reverse('inventario:ver_elemento', args=[1]))))
+        # El cursor de la sincronización no tolera el atraso de la réplica
+        self.assertIsNone(replica.destino_lecturas(self.factory.get(reverse('exportacion:sincronizar'))))
+
+        # Después de una escritura nadie lee de la réplica durante la ventana de adherencia
+        self.router.db_for_write(Elemento)
+        self.assertIsNone(replica.destino_lecturas(self.factory.get(lista)))
+
+    def test_router(self):
+        token = replica._destino.set(replica.ALIAS)
+        try:
+            self.assertEqual(self.router.db_for_read(Elemento), replica.ALIAS)
+            self.assertIsNone(self.router.db_for_read(Session))
+            with transaction.atomic():
+                self.assertIsNone(self.router.db_for_read(Elemento))
+
+            self.router.db_for_write(Elemento)  # El resto de la petición lee lo que acaba de escribir
+            self.assertIsNone(self.router.db_for_read(Elemento))
+        finally:
+            replica._destino.reset(token)
+
+
+
+class ArchivoBajasTests(TestCase):
+    """Archivo de los elementos dados de baja (inventario/archivo.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        cls.tipo = TipoDispositivo.objects.create(nombre='Laptop')
+        cls.en_uso = EstadoElemento.objects.create(nombre='En Uso')
+        cls.baja = EstadoElemento.objects.create(nombre='Baja')
+
+    def setUp(self):
+        hace_dos_anios = timezone.now() - datetime.timedelta(days=730)
+        self.viejas = [self.crear_elemento(f'BAJA-{i}', self.baja) for i in range(3)]
+        self.reciente = self.crear_elemento('BAJA-NUEVA', self.baja)
+        self.en_uso_viejo = self.crear_elemento('USO-1', self.en_uso)
+        Elemento.objects.exclude(pk=self.reciente.pk).update(fecha_actualizacion=hace_dos_anios)
+
+    def crear_elemento(self, serial, estado):
+        return Elemento.objects.create(
+            tipo_dispositivo=self.tipo, estado=estado, marca='Dell', modelo='Latitude', serial=serial,
+            localizacion='Bodega', fecha_adquisicion='2020-01-01', usuario_registro=self.usuario,
+        )
+
+    def test_archiva_por_lotes_solo_bajas_antiguas(self):
+        antes = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            lotes = list(archivar_bajas(meses=12, lote=2))
+
+        self.assertEqual([archivados for archivados, _ in lotes], [2, 1])
+        ids = sorted(elemento.pk for elemento in self.viejas)
+        self.assertEqual(sorted(ElementoArchivado.objects.values_list('pk', flat=True)), ids)
+        self.assertEqual(
+            set(Elemento.objects.values_list('pk', flat=True)), {self.reciente.pk, self.en_uso_viejo.pk}
+        )
+        # Volver a ejecutarlo no encuentra nada más
+        self.assertEqual(list(archivar_bajas(meses=12, lote=2)), [])
+        self.assertEqual(diferencias_contadores(), [])
+
+        # El historial lo registra como archivado (no como eliminación) y permite reconstruirlo
+        acciones = set(HistorialElemento.objects.filter(elemento_id=ids[0]).values_list('accion', flat=True))
+        self.assertIn(HistorialElemento.Accion.ARCHIVADO, acciones)
+        self.assertNotIn(HistorialElemento.Accion.ELIMINACION, acciones)
+        self.assertEqual(len(inventario_a_fecha(antes)), 5)
+        self.assertEqual(len(inventario_a_fecha(timezone.now())), 2)
+
+        # La sincronización lo entrega como eliminado
+        HistorialElemento.objects.filter(accion=HistorialElemento.Accion.ARCHIVADO).update(
+            fecha=timezone.now() - datetime.timedelta(minutes=1)
+        )
+        pagina = pagina_cambios(codificar_cursor(INICIO, INICIO))
+        self.assertEqual(sorted(eliminado['id'] for eliminado in pagina['eliminados']), ids)
+
+    def test_lista_busca_en_el_archivo_solo_si_se_pide(self):
+        list(archivar_bajas(meses=12))
+        self.client.force_login(self.usuario)
+        url = reverse('inventario:lista_inventario')
+
+        respuesta = self.client.get(url, {'q': 'BAJA'})
+        self.assertEqual(len(respuesta.context['elementos']), 1)
+        self.assertNotIn('archivados', respuesta.context)
+
+        respuesta = self.client.get(url, {'q': 'BAJA-1', 'archivados': 'on'})
+        self.assertEqual(respuesta.context['total_archivados'], 1)
+        self.assertContains(respuesta, 'BAJA-1')
+
+    def test_restaurar_conserva_id_y_fecha_de_registro(self):
+        elemento = self.viejas[0]
+        list(archivar_bajas(meses=12))
+
+        self.assertEqual(restaurar([elemento.pk]), 1)
+        self.assertEqual(diferencias_contadores(), [])
+        restaurado = Elemento.objects.get(pk=elemento.pk)
+        self.assertEqual((restaurado.serial, restaurado.fecha_registro), (elemento.serial, elemento.fecha_registro))
+        self.assertFalse(ElementoArchivado.objects.filter(pk=elemento.pk).exists())
+        self.assertTrue(HistorialElemento.objects.filter(
+            elemento_id=elemento.pk, accion=HistorialElemento.Accion.RESTAURACION
+        ).exists())
+
+        # Un serial que volvió a usarse impide la restauración
+        self.crear_elemento(self.viejas[1].serial, self.en_uso)
+        with self.assertRaises(ValidationError):
+            restaurar([self.viejas[1].pk])
+        self.assertTrue(ElementoArchivado.objects.filter(pk=self.viejas[1].pk).exists())
+
+
+class ContadoresInventarioTests(TestCase):
+    """Contadores por tipo, estado y ubicación (ContadorInventario)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        cls.laptop = TipoDispositivo.objects.create(nombre='Laptop')
+        cls.cable = TipoDispositivo.objects.create(nombre='Cable')
+        cls.activo = EstadoElemento.objects.create(nombre='Activo')
+        cls.baja = EstadoElemento.objects.create(nombre='Baja')
+
+    def crear(self, **valores):
+        return Elemento.objects.create(
+            **{'tipo_dispositivo': self.laptop, 'estado': self.activo, 'marca': 'HP', 'modelo': 'ProBook',
+               'localizacion': 'Sede Norte', 'fecha_adquisicion': '2024-01-01', 'usuario_registro': self.usuario,
+               **valores}
+        )
+
+    def unidades(self, **filtro):
+        return sum(ContadorInventario.objects.filter(**filtro).values_list('unidades', flat=True))
+
+    def test_se_mantienen_al_crear_editar_mover_stock_y_eliminar(self):
+        laptop = self.crear(serial='CNT-1')
+        cables = self.crear(tipo_dispositivo=self.cable, maneja_cantidad=True, cantidad=10, localizacion='Bodega')
+        self.assertEqual((self.unidades(tipo_dispositivo=self.cable), self.unidades()), (10, 11))
+
+        laptop = Elemento.objects.get(pk=laptop.pk)
+        laptop.estado, laptop.localizacion = self.baja, 'Sede Sur'
+        laptop.save()
+        salida(cables, 4)
+        transferir(cables, 2, 'Sede Norte')
+        Elemento.objects.filter(pk=cables.pk).only('marca').get().save(update_fields=['marca'])
+        self.assertEqual(self.unidades(estado=self.baja), 1)
+        self.assertEqual(self.unidades(tipo_dispositivo=self.cable), 6)
+        self.assertEqual(diferencias_contadores(), [])
+
+        laptop.delete()
+        self.assertEqual(self.unidades(tipo_dispositivo=self.laptop), 0)
+        self.assertEqual(diferencias_contadores(), [])
+
+    def test_dashboard_lee_los_contadores(self):
+        self.crear(serial='CNT-1')
+        self.crear(serial='CNT-2', estado=self.baja)
+        self.crear(tipo_dispositivo=self.cable, maneja_cantidad=True, cantidad=7)
+        self.client.force_login(self.usuario)
+        contexto = self.client.get(reverse('inventario:dashboard')).context
+        self.assertEqual(
+            (contexto['total_elementos'], contexto['total_registros'], contexto['elementos_activos']), (9, 3, 2)
+        )
+
+    def test_verificar_corrige_el_descuadre(self):
+        self.crear(serial='CNT-1')
+        self.crear(tipo_dispositivo=self.cable, maneja_cantidad=True, cantidad=5)
+        ContadorInventario.objects.filter(tipo_dispositivo=self.cable).update(unidades=1)
+        ContadorInventario.objects.filter(tipo_dispositivo=self.laptop).delete()
+
+        self.assertEqual(len(diferencias_contadores()), 2)
+        self.assertEqual(len(diferencias_contadores(reparar=True)), 2)
+        self.assertEqual(diferencias_contadores(), [])
+        self.assertEqual(self.unidades(), 6)
+
+    def test_actualizar_elementos_mueve_los_contadores(self):
+        self.crear(serial='CNT-1')
+        self.crear(serial='CNT-2')
+        self.crear(tipo_dispositivo=self.cable, maneja_cantidad=True, cantidad=5)
+        version = version_datos()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            actualizados = actualizar_elementos(Elemento.objects.filter(estado=self.activo), estado=self.baja)
+        self.assertEqual(actualizados, 3)
+        self.assertEqual((self.unidades(estado=self.activo), self.unidades(estado=self.baja)), (0, 7))
+        self.assertEqual(diferencias_contadores(), [])
+        self.assertNotEqual(version_datos(), version)
+
+    def test_guardar_una_instancia_vieja_descuenta_lo_que_hay_en_la_bd(self):
+        for version_esperada in (False, True):
+            with self.subTest(version_esperada=version_esperada):
+                laptop = Elemento.objects.get(pk=self.crear(serial=f'CNT-{version_esperada}').pk)
+                # Otro proceso la da de baja sin pasar por save() (ni cambiar la versión)
+                actualizar_elementos(Elemento.objects.filter(pk=laptop.pk), estado=self.baja)
+
+                laptop.marca = 'Dell'
+                if version_esperada:
+                    laptop._version_esperada = laptop.version
+                laptop.save()
+                self.assertEqual(diferencias_contadores(), [])
+
+
+
+class ResumenesDiariosTests(TestCase):
+    """Resúmenes diarios del inventario (ResumenDiario) y tendencias del dashboard."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        cls.laptop = TipoDispositivo.objects.create(nombre='Laptop')
+        cls.activo = EstadoElemento.objects.create(nombre='Activo')
+        cls.baja = EstadoElemento.objects.create(nombre='Baja')
+        cls.hoy = timezone.localdate()
+
+    def hace(self, dias):
+        return self.hoy - datetime.timedelta(days=dias)
+
+    def preparar(self):
+        """Un elemento adquirido hace 10 días y dado de baja hace 5; otro eliminado hace 3."""
+        comun = {'tipo_dispositivo': self.laptop, 'estado': self.activo, 'marca': 'HP', 'modelo': 'ProBook',
+                 'localizacion': 'Sede Norte', 'usuario_registro': self.usuario}
+        nuevo = Elemento.objects.create(serial='RES-1', fecha_adquisicion=self.hace(10), **comun)
+        Elemento.objects.filter(pk=nuevo.pk).update(fecha_registro=inicio_dia(self.hace(10)))
+        nuevo = Elemento.objects.get(pk=nuevo.pk)
+        nuevo.estado = self.baja
+        nuevo.save()
+        HistorialElemento.objects.filter(elemento_id=nuevo.pk, accion='M').update(
+            fecha=inicio_dia(self.hace(5)) + datetime.timedelta(hours=12)
+        )
+
+        eliminado = Elemento.objects.create(serial='RES-2', fecha_adquisicion=self.hace(20), **comun)
+        eliminado_id = eliminado.pk
+        eliminado.delete()
+        HistorialElemento.objects.filter(elemento_id=eliminado_id, accion='E').update(
+            fecha=inicio_dia(self.hace(3)) + datetime.timedelta(hours=9)
+        )
+
+    def resumen(self, dias):
+        return {
+            fila.estado_id: fila.registros
+            for fila in ResumenDiario.objects.filter(fecha=self.hace(dias), tipo_dispositivo=self.laptop)
+        }
+
+    def test_reconstruye_los_dias_anteriores_desde_el_historial(self):
+        self.preparar()
+        guardados = guardar_resumenes(desde=self.hace(12))
+        self.assertEqual(len(guardados), 13)
+
+        activo, baja = self.activo.pk, self.baja.pk
+        self.assertEqual(self.resumen(0), {baja: 1})      # Hoy: copia de los contadores
+        self.assertEqual(self.resumen(2), {baja: 1})      # Ya se eliminó el segundo
+        self.assertEqual(self.resumen(4), {activo: 1, baja: 1})
+        self.assertEqual(self.resumen(6), {activo: 2})    # Antes de la baja
+        self.assertEqual(self.resumen(11), {activo: 1})   # Antes de adquirir el primero
+
+        # Los días que ya tienen resumen no se recalculan (salvo hoy)
+        self.assertEqual(guardar_resumenes(desde=self.hace(12)), [self.hoy])
+
+    def test_alta_por_registro_y_por_adquisicion_corregida(self):
+        comun = {'tipo_dispositivo': self.laptop, 'estado': self.activo, 'marca': 'HP', 'modelo': 'ProBook',
+                 'localizacion': 'Sede Norte', 'usuario_registro': self.usuario}
+        # Registrado hace 8 días con una adquisición posterior; eliminado hace 1
+        eliminado = Elemento.objects.create(serial='RES-3', fecha_adquisicion=self.hace(2), **comun)
+        eliminado_id = eliminado.pk
+        HistorialElemento.objects.filter(elemento_id=eliminado_id, accion='C').update(fecha=inicio_dia(self.hace(8)))
+        eliminado.delete()
+        HistorialElemento.objects.filter(elemento_id=eliminado_id, accion='E').update(
+            fecha=inicio_dia(self.hace(1)) + datetime.timedelta(hours=9)
+        )
+        # Registrado hoy, adquirido hace 10 días; hace 2 se corrigió la adquisición a hace 3
+        corregido = Elemento.objects.create(serial='RES-4', fecha_adquisicion=self.hace(10), **comun)
+        corregido.fecha_adquisicion = self.hace(3)
+        corregido.save()
+        HistorialElemento.objects.filter(elemento_id=corregido.pk, accion='M').update(
+            fecha=inicio_dia(self.hace(2)) + datetime.timedelta(hours=12)
+        )
+
+        guardar_resumenes(desde=self.hace(12))
+        activo = self.activo.pk
+        self.assertEqual(self.resumen(1), {activo: 1})
+        self.assertEqual(self.resumen(6), {activo: 2})
+        self.assertEqual(self.resumen(9), {activo: 1})    # Antes del registro del eliminado
+        self.assertEqual(self.resumen(11), {})
+
+    def test_dashboard_muestra_las_tendencias(self):
+        self.client.force_login(self.usuario)
+        self.assertIsNone(self.client.get(reverse('inventario:dashboard')).context['tendencias'])
+
+        self.preparar()
+        guardar_resumenes(desde=self.hace(14))
+        respuesta = self.client.get(reverse('inventario:dashboard'))
+        tendencias = respuesta.context['tendencias']
+        self.assertEqual((tendencias['desde'], tendencias['hasta']), (self.hace(14), self.hoy))
+        self.assertEqual(
+            {serie['nombre']: serie['ultimo'] for serie in tendencias['por_estado']}, {'Baja': 1, 'Activo': 0}
+        )
+        # El único elemento que queda está de baja: la serie de su tipo termina en cero
+        self.assertEqual([(serie['nombre'], serie['ultimo']) for serie in tendencias['por_tipo']], [('Laptop', 0)])
+        self.assertContains(respuesta, '<polyline', count=3)
+
+
+@modo_asgi()
+class ModoAsgiTests(TestCase):
+    """Vistas asíncronas del inventario (MODO_ASGI=True) con AsyncClient."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        crear_inventario(6, cls.usuario)  # Dos son por cantidad (10 unidades cada uno)
+
+    async def test_requieren_login(self):
+        respuesta = await self.async_client.get(reverse('inventario:dashboard'))
+        self.assertEqual(respuesta.status_code, 302)
+        respuesta = await self.async_client.get(reverse('inventario:eventos_dashboard'))
+        self.assertEqual(respuesta.status_code, 401)
+
+    async def test_dashboard(self):
+        await self.async_client.aforce_login(self.usuario)
+        respuesta = await self.async_client.get(reverse('inventario:dashboard'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual((respuesta.context['total_registros'], respuesta.context['total_elementos']), (6, 24))
+        self.assertEqual(len(respuesta.context['ultimos_registros']), 5)
+        self.assertIn('tendencias', respuesta.context)
+
+    async def test_lista_con_etag(self):
+        await self.async_client.aforce_login(self.usuario)
+        url = reverse('inventario:lista_inventario')
+        await self.async_client.get(url)  # Primera visita: fija la cookie CSRF, que entra en la ETag
+        respuesta = await self.async_client.get(url, {'marca': 'Marca 2'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([e.serial for e in respuesta.context['elementos']], ['TEST-00002'])
+
+        repetida = await self.async_client.get(
+            url, {'marca': 'Marca 2'}, headers={'If-None-Match': respuesta['ETag']}
+        )
+        self.assertEqual(repetida.status_code, 304)
+
+    async def test_eventos_envia_el_estado_al_conectar(self):
+        await self.async_client.aforce_login(self.usuario)
+        respuesta = await self.async_client.get(reverse('inventario:eventos_dashboard'))
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        flujo = aiter(respuesta.streaming_content)
+        self.assertEqual(await anext(flujo), f'retry: {REINTENTO_ASGI}\n\n'.encode())
+        estado = (await anext(flujo)).decode()
+        self.assertIn('event: estado', estado)
+        self.assertIn('"serial": "TEST-00004"', estado)
+        await respuesta.streaming_content.aclose()  # El flujo no termina solo: se cierra la conexión
+
+
+class MetricasTests(SimpleTestCase):
+    """Totales de métricas compartidos entre procesos (inventario_tecnologico/metricas.py)."""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+
+    def test_procesos_suman_al_mismo_total(self):
+        # Dos "workers": cada volcado suma solo lo nuevo y no deja archivos por proceso
+        uno, otro = (metricas.RegistroMetricas(self.directorio, intervalo=3600) for _ in range(2))
+        uno.incrementar('inventario_login_total', resultado='exito')
+        otro.incrementar('inventario_login_total', 2, resultado='exito')
+        otro.observar('inventario_http_duracion_segundos', 0.02, vista='inventario:dashboard')
+        uno.volcar()
+        otro.volcar()
+        uno.incrementar('inventario_login_total', resultado='exito')
+        uno.volcar()
+        uno.volcar()  # Sin nada nuevo no cambia el total
+
+        totales = metricas.leer_totales(self.directorio)
+        self.assertEqual(totales[('inventario_login_total', (('resultado', 'exito'),))], 4)
+        histograma = totales[('inventario_http_duracion_segundos', (('vista', 'inventario:dashboard'),))]
+        self.assertEqual((histograma['cuenta'], histograma['buckets'][:2]), (1, [0, 1]))
+        self.assertEqual(os.listdir(self.directorio), [metricas.ARCHIVO_TOTALES])
+
+    def test_al_salir_vuelca_lo_pendiente(self):
+        metricas.cerrar_registro()
+        with override_settings(METRICAS_DIR=self.directorio, METRICAS_INTERVALO=3600):
+            clave = ('inventario_login_total', (('resultado', 'fallo'),))
+            metricas.registro().incrementar('inventario_login_total', resultado='fallo')  # El primero se vuelca
+            metricas.registro().incrementar('inventario_login_total', resultado='fallo')
+            self.assertEqual(metricas.leer_totales(self.directorio), {clave: 1})
+            metricas.cerrar_registro()  # Lo que atexit hace al terminar el proceso
+        self.assertEqual(metricas.leer_totales(self.directorio), {clave: 2})
+
+    def test_bloqueo_abandonado_no_detiene_el_volcado(self):
+        bloqueo = os.path.join(self.directorio, metricas.ARCHIVO_BLOQUEO)
+        open(bloqueo, 'w').close()
+        viejo = time.time() - metricas.BLOQUEO_ABANDONADO - 1
+        os.utime(bloqueo, (viejo, viejo))
+
+        registro = metricas.RegistroMetricas(self.directorio, intervalo=3600)
+        registro.incrementar('inventario_login_total', resultado='exito')
+        registro.volcar()
+        self.assertEqual(len(metricas.leer_totales(self.directorio)), 1)
+        self.assertFalse(os.path.exists(bloqueo))
+
+
+class BitacoraTests(SimpleTestCase):
+    """Logging con id de petición detrás de una cola (inventario_tecnologico/bitacora.py)."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def registro(self, mensaje, *args, exc_info=None):
+        return logging.getLogger('inventario').makeRecord(
+            'inventario', logging.ERROR, __file__, 1, mensaje, args, exc_info,
+        )
+
+    def test_middleware_usa_o_genera_el_id(self):
+        vistos = []
+
+        def vista(request):
+            vistos.append(bitacora.id_peticion.get())
+            return HttpResponse()
+
+        middleware = bitacora.PeticionIdMiddleware(vista)
+        respuesta = middleware(self.factory.get('/', headers={'X-Request-ID': 'proxy-42.a_b'}))
+        self.assertEqual((respuesta['X-Request-ID'], vistos[-1]), ('proxy-42.a_b', 'proxy-42.a_b'))
+
+        # Valores que no se aceptan del encabezado: se genera uno nuevo
+        for valor in ('', 'con espacio', 'x' * 65, 'a;b'):
+            with self.subTest(valor=valor):
+                respuesta = middleware(self.factory.get('/', headers={'X-Request-ID': valor}))
+                self.assertRegex(respuesta['X-Request-ID'], r'^[0-9a-f]{32}$')
+                self.assertEqual(vistos[-1], respuesta['X-Request-ID'])
+        self.assertEqual(bitacora.id_peticion.get(), '-')
+
+    async def test_middleware_asincrono(self):
+        async def vista(request):
+            return HttpResponse(bitacora.id_peticion.get())
+
+        middleware = bitacora.PeticionIdMiddleware(vista)
+        respuesta = await middleware(self.factory.get('/', headers={'X-Request-ID': 'abc'}))
+        self.assertEqual((respuesta['X-Request-ID'], respuesta.content), ('abc', b'abc'))
+        self.assertEqual(bitacora.id_peticion.get(), '-')
+
+    def test_cola_prepara_el_registro_en_el_hilo_de_la_peticion(self):
+        cola = queue.Queue()
+        lista = ['a']
+        try:
+            1 / 0
+        except ZeroDivisionError as error:
+            exc_info = (type(error), error, error.__traceback__)
+        token = bitacora.id_peticion.set('peticion-1')
+        try:
+            bitacora.ColaHandler(cola).handle(self.registro('valores %s', lista, exc_info=exc_info))
+        finally:
+            bitacora.id_peticion.reset(token)
+        lista.append('b')  # Cambios posteriores no llegan al registro encolado
+
+        encolado = cola.get_nowait()
+        self.assertEqual((encolado.getMessage(), encolado.args), ("valores ['a']", None))
+        self.assertIsNone(encolado.exc_info)
+        self.assertIn('ZeroDivisionError', encolado.exc_text)
+        self.assertEqual(encolado.id_peticion, 'peticion-1')
+
+    def test_formato_json(self):
+        registro = self.registro('hola %s', 'mundo')
+        registro.id_peticion = 'peticion-2'
+        datos = json.loads(bitacora.FormatoJSON().format(registro))
+        self.assertEqual(
+            (datos['mensaje'], datos['nivel'], datos['id_peticion']), ('hola mundo', 'ERROR', 'peticion-2'),
+        )
+        self.assertEqual(json.loads(bitacora.FormatoJSON().format(self.registro('sin id')))['id_peticion'], '-')
+
+
+class ArchivosTests(SimpleTestCase):
+    """Estáticos y media servidos por la capa WSGI (inventario_tecnologico/archivos.py)."""
+
+    CSS = b'body { color: #123456; } ' * 40
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        base = directorio.name
+        self.estaticos, self.media = os.path.join(base, 'static'), os.path.join(base, 'media')
+        for ruta, contenido in (
+            ('static/css/app.abc123.css', self.CSS),
+            ('static/css/app.abc123.css.gz', b'gz'),
+            ('static/css/app.abc123.css.br', b'br'),
+            ('static/staticfiles.json', b'{"paths": {"css/app.css": "css/app.abc123.css"}}'),
+            ('media/foto.jpg', b'0123456789'),
+            ('secreto.txt', b'fuera de la raiz'),
+        ):
+            os.makedirs(os.path.dirname(os.path.join(base, ruta)), exist_ok=True)
+            with open(os.path.join(base, ruta), 'wb') as archivo:
+                archivo.write(contenido)
+
+        with override_settings(STATIC_URL='/static/', STATIC_ROOT=self.estaticos, MEDIA_URL='/media/',
+                               MEDIA_ROOT=self.media, DEBUG=False):
+            self.wsgi = archivos.ArchivosWSGI(lambda environ, start_response: [b'django'])
+
+    def pedir(self, ruta, metodo='GET', file_wrapper=None, **encabezados):
+        """(estado, encabezados, cuerpo); estado None si la petición pasó a Django."""
+        respuesta = {}
+
+        def start_response(estado, lista):
+            respuesta['estado'], respuesta['encabezados'] = estado, dict(lista)
+
+        environ = {'PATH_INFO': ruta, 'REQUEST_METHOD': metodo}
+        if file_wrapper is not None:
+            environ['wsgi.file_wrapper'] = file_wrapper
+        environ.update({'HTTP_' + nombre.upper(): valor for nombre, valor in encabezados.items()})
+        cuerpo = self.wsgi(environ, start_response)
+        contenido = b''.join(cuerpo)
+        if hasattr(cuerpo, 'close'):
+            cuerpo.close()
+        return respuesta.get('estado'), respuesta.get('encabezados', {}), contenido
+
+    def test_variante_precomprimida_segun_accept_encoding(self):
+        url = '/static/css/app.abc123.css'
+        casos = (('gzip, br', 'br', b'br'), ('br;q=0, gzip', 'gzip', b'gz'), ('*;q=0.1', 'br', b'br'),
+                 ('gzip;q=0, deflate', None, self.CSS), ('', None, self.CSS))
+        for aceptadas, codificacion, cuerpo in casos:
+            with self.subTest(aceptadas=aceptadas):
+                estado, encabezados, contenido = self.pedir(url, accept_encoding=aceptadas)
+                self.assertEqual((estado, encabezados.get('Content-Encoding'), contenido), ('200 OK', codificacion, cuerpo))
+                self.assertEqual(encabezados['Vary'], 'Accept-Encoding')
+                self.assertIn('immutable', encabezados['Cache-Control'])  # Nombre del manifest
+
+    def test_no_guarda_en_memoria_las_rutas_inexistentes(self):
+        servidor = self.wsgi.servidores[0]
+        for indice in range(20):
+            self.assertIsNone(self.pedir(f'/static/no-existe-{indice}.css')[0])
+        self.assertEqual(servidor._indice, {})
+
+        self.pedir('/static/css/app.abc123.css', accept_encoding='gzip')
+        self.assertEqual(len(servidor._indice), 3)  # El archivo y sus dos variantes
+
+    def test_rangos(self):
+        url, tamano = '/media/foto.jpg', 10
+        estado, encabezados, contenido = self.pedir(url, range='bytes=2-5')
+        self.assertEqual((estado, contenido), ('206 Partial Content', b'2345'))
+        self.assertEqual((encabezados['Content-Range'], encabezados['Content-Length']), ('bytes 2-5/10', '4'))
+
+        self.assertEqual(self.pedir(url, range='bytes=-3')[2], b'789')
+        estado, encabezados, _ = self.pedir(url, range='bytes=20-')
+        self.assertEqual((estado, encabezados['Content-Range']), ('416 Range Not Satisfiable', 'bytes */10'))
+        # Varios intervalos: se ignora el Range y se envía el archivo completo
+        self.assertEqual(self.pedir(url, range='bytes=0-1,3-4')[:3:2], ('200 OK', b'0123456789'))
+
+        casos = (
+            ('bytes=0-', (0, 9)), ('bytes=5-100', (5, 9)), ('bytes=-20', (0, 9)), ('bytes=9-9', (9, 9)),
+            ('bytes=10-', None), ('bytes=5-2', None), ('bytes=-0', None),
+            ('items=0-1', False), ('bytes=a-b', False), ('bytes=5', False), ('bytes=0-1,2-3', False),
+        )
+        for valor, esperado in casos:
+            with self.subTest(valor=valor):
+                self.assertEqual(archivos.parsear_rango(valor, tamano), esperado)
+
+    def test_peticiones_condicionales(self):
+        url = '/media/foto.jpg'
+        _estado, encabezados, _ = self.pedir(url)
+        etag, fecha = encabezados['ETag'], encabezados['Last-Modified']
+
+        self.assertEqual(self.pedir(url, if_none_match=etag)[::2], ('304 Not Modified', b''))
+        self.assertEqual(self.pedir(url, if_modified_since=fecha)[::2], ('304 Not Modified', b''))
+        self.assertEqual(self.pedir(url, if_modified_since='Thu, 01 Jan 1970 00:00:00 GMT')[0], '200 OK')
+        # If-None-Match manda sobre la fecha
+        self.assertEqual(self.pedir(url, if_none_match='"otro"', if_modified_since=fecha)[0], '200 OK')
+
+        # If-Range: el Range solo vale si el archivo sigue siendo el mismo
+        self.assertEqual(self.pedir(url, range='bytes=0-1', if_range=etag)[::2], ('206 Partial Content', b'01'))
+        self.assertEqual(self.pedir(url, range='bytes=0-1', if_range=fecha)[0], '206 Partial Content')
+        self.assertEqual(self.pedir(url, range='bytes=0-1', if_range='"viejo"')[::2], ('200 OK', b'0123456789'))
+
+    def test_rutas_fuera_de_la_raiz_pasan_a_django(self):
+        os.symlink(os.path.join(os.path.dirname(self.media), 'secreto.txt'), os.path.join(self.media, 'enlace.txt'))
+        for url in ('/media/../secreto.txt', '/media/%2e%2e/secreto.txt', '/media/%2E%2E%2Fsecreto.txt',
+                    '/media/foto.jpg%00', '/media/enlace.txt', '/media/', '/static/css'):
+            with self.subTest(url=url):
+                self.assertEqual(self.pedir(url), (None, {}, b'django'))
+
+    def test_head_y_file_wrapper(self):
+        estado, encabezados, contenido = self.pedir('/media/foto.jpg', metodo='HEAD')
+        self.assertEqual((estado, encabezados['Content-Length'], contenido), ('200 OK', '10', b''))
+        self.assertEqual(encabezados['Cache-Control'], f'public, max-age={settings.MEDIA_MAX_AGE}')
+
+        enviados = []
+
+        def file_wrapper(archivo, bloque):
+            enviados.append(archivo.name)
+            return FileWrapper(archivo, bloque)
+
+        self.assertEqual(self.pedir('/media/foto.jpg', file_wrapper=file_wrapper)[2], b'0123456789')
+        # Un rango que no llega al final no puede usar sendfile()
+        self.assertEqual(self.pedir('/media/foto.jpg', file_wrapper=file_wrapper, range='bytes=0-3')[2], b'0123')
+        self.assertEqual(enviados, [os.path.join(self.media, 'foto.jpg')])
+
+
+class ManifestComprimidoStorageTests(SimpleTestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.raiz = directorio.name
+        self.almacen = ManifestComprimidoStorage(location=self.raiz, base_url='/static/')
+
+    def escribir(self, nombre, contenido):
+        ruta = os.path.join(self.raiz, nombre)
+        with open(ruta, 'wb') as archivo:
+            archivo.write(contenido)
+        return ruta
+
+    def test_hashed_name_sin_archivo_devuelve_el_nombre(self):
+        self.escribir('app.css', b'body {}')
+        self.assertRegex(self.almacen.hashed_name('app.css'), r'^app\.[0-9a-f]{12}\.css$')
+        self.assertEqual(self.almacen.hashed_name('img/no-existe.png'), 'img/no-existe.png')
+
+        self.almacen.manifest_strict = True
+        with self.assertRaises(ValueError):
+            self.almacen.hashed_name('img/no-existe.png')
+
+    def test_comprimir_archivo_solo_si_ahorra(self):
+        texto = b'.fila { margin: 0; } ' * 200
+        ruta = self.escribir('app.css', texto)
+        self.almacen.comprimir_archivo(ruta)
+        with gzip.open(ruta + '.gz') as archivo:
+            self.assertEqual(archivo.read(), texto)
+        self.assertEqual(os.path.exists(ruta + '.br'), storage.brotli is not None)
+
+        ruta = self.escribir('ruido.js', os.urandom(2000))
+        self.almacen.comprimir_archivo(ruta)
+        self.assertFalse(os.path.exists(ruta + '.gz'))
+
+
+class PerfilamientoTests(TestCase):
+    """Middleware de perfilamiento (inventario_tecnologico/perfilamiento.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser('perfil@prueba.co', 'clave-prueba')
+
+    def middleware(self, vista):
+        with override_settings(PERFILAMIENTO=True, PERFILAMIENTO_MAX_CONSULTAS=10, PERFILAMIENTO_MAX_REPETIDAS=3):
+            return perfilamiento.PerfilamientoMiddleware(vista)
+
+    def test_huella_agrupa_consultas_con_distintos_parametros(self):
+        huella = perfilamiento.huella_sql(
+            "SELECT *  FROM x\n WHERE id = 15 AND nombre = 'O''Brien' AND tipo IN (%s, %s, %s) LIMIT 21"
+        )
+        self.assertEqual(huella, 'SELECT * FROM x WHERE id = ? AND nombre = ? AND tipo IN (...) LIMIT ?')
+        self.assertEqual(
+            perfilamiento.huella_sql('SELECT 1 FROM x WHERE id IN (1, 2)'),
+            perfilamiento.huella_sql('SELECT 7 FROM x WHERE id IN (3,4,5)'),
+        )
+
+    def test_repetidas_de_mayor_a_menor(self):
+        def ejecutar(sql, params, many, context):
+            return None
+
+        registro = perfilamiento.RegistroConsultas()
+        for sql in ['SELECT a FROM x WHERE id = 1', 'SELECT a FROM x WHERE id = 2', 'SELECT b FROM y',
+                    'SELECT a FROM x WHERE id = 3', 'SELECT b FROM y']:
+            registro(ejecutar, sql, None, False, {})
+
+        self.assertEqual(registro.cantidad, 5)
+        self.assertEqual(
+            registro.repetidas(2), [('SELECT a FROM x WHERE id = ?', 3), ('SELECT b FROM y', 2)],
+        )
+        self.assertEqual(registro.repetidas(3), [('SELECT a FROM x WHERE id = ?', 3)])
+
+    def test_desactivado_no_se_instala(self):
+        with override_settings(PERFILAMIENTO=False), self.assertRaises(MiddlewareNotUsed):
+            perfilamiento.PerfilamientoMiddleware(lambda request: HttpResponse())
+
+    @override_settings(PERFILAMIENTO=True)
+    def test_encabezado_server_timing(self):
+        self.client.force_login(self.usuario)
+        with self.assertLogs('inventario_tecnologico.perfilamiento', 'INFO'):
+            response = self.client.get(reverse('inventario:dashboard'))
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ consultas", tpl;dur=[\d.]+;desc="plantilla", total;dur=[\d.]+$',
+        )
+
+    def test_warning_si_la_vista_repite_una_consulta(self):
+        def vista(request):
+            for pk in range(4):  # N+1
+                Elemento.objects.filter(pk=pk).exists()
+            return HttpResponse()
+
+        middleware = self.middleware(vista)
+        with self.assertLogs('inventario_tecnologico.perfilamiento', 'INFO') as registros:
+            response = middleware(RequestFactory().get('/n-mas-uno/'))
+        self.assertIn('4 consultas', response['Server-Timing'])
+        [linea] = registros.records
+        self.assertEqual(linea.levelname, 'WARNING')
+        datos = json.loads(linea.getMessage().split(': ', 1)[1])
+        self.assertEqual((datos['ruta'], datos['consultas'], datos['repetidas'][0]['veces']), ('/n-mas-uno/', 4, 4))
+
+        # Dentro del presupuesto queda en INFO
+        with self.assertLogs('inventario_tecnologico.perfilamiento', 'INFO') as registros:
+            self.middleware(lambda request: HttpResponse())(RequestFactory().get('/'))
+        self.assertEqual([r.levelname for r in registros.records], ['INFO'])
 
-# Create your tests here.
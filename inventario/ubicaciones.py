@@ -0,0 +1,112 @@
+# inventario/ubicaciones.py
+"""
+Jerarquía de localizaciones (sede → edificio → piso → sala).
+
+Cada Localizacion guarda su 'ruta' materializada: las claves normalizadas de
+sus ancestros y la suya, terminadas en '/':
+
+    'sede principal/'
+    'sede principal/piso 3/'
+    'sede principal/piso 3/sistemas/'
+
+Así "todo lo que hay en la Sede Principal" es un prefijo (ruta LIKE
+'sede principal/%'), que usa el índice único de 'ruta' (en PostgreSQL Django
+crea además el índice varchar_pattern_ops para LIKE). La clave ignora
+mayúsculas, tildes y espacios repetidos, de modo que 'Sede  principal' y
+'SEDE PRINCIPAL' son la misma localización.
+
+Las funciones de este módulo solo usan campos del modelo (no sus métodos),
+así que también sirven con el modelo histórico de las migraciones.
+"""
+import re
+import unicodedata
+
+from django.core.exceptions import ValidationError
+
+# Separadores aceptados entre niveles: 'Sede Norte - Piso 2 - Sala 201', 'Sede Norte / Piso 2'...
+SEPARADORES = re.compile(r'\s+-\s+|\s*[/>|»]\s*')
+SEPARADOR_NOMBRE = ' - '
+MAX_NIVELES = 4
+
+# Tipo de cada nivel según la palabra con la que empieza su nombre
+PALABRAS_TIPO = {
+    'S': ('sede',),
+    'E': ('edificio', 'bloque', 'torre'),
+    'P': ('piso', 'planta', 'nivel'),
+}
+
+
+def partes_ubicacion(texto):
+    """'sede norte -  Piso 2/Sala 201' -> ['sede norte', 'Piso 2', 'Sala 201'] (máx. 4 niveles)."""
+    partes = [' '.join(parte.split()) for parte in SEPARADORES.split(texto or '')]
+    partes = [parte for parte in partes if parte]
+    if len(partes) > MAX_NIVELES:
+        partes[MAX_NIVELES - 1:] = [SEPARADOR_NOMBRE.join(partes[MAX_NIVELES - 1:])]
+    return partes
+
+
+def clave_ubicacion(nombre):
+    """Clave de comparación: sin tildes, en minúsculas y con espacios simples."""
+    sin_tildes = unicodedata.normalize('NFKD', nombre)
+    sin_tildes = ''.join(c for c in sin_tildes if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.casefold().split()).replace('/', ' ')
+
+
+def tipo_ubicacion(nombre, profundidad):
+    """Sede (S), Edificio (E), Piso (P) o Sala/Área (A) según el nombre y el nivel."""
+    primera = clave_ubicacion(nombre).split(' ', 1)[0]
+    for tipo, palabras in PALABRAS_TIPO.items():
+        if primera in palabras:
+            return tipo
+    return 'S' if profundidad == 0 else 'A'
+
+
+def resolver_ubicacion(modelo, texto):
+    """
+    Devuelve la Localizacion (del 'modelo' dado) que corresponde al texto,
+    creando los niveles que falten. None si el texto está vacío.
+    """
+    partes = partes_ubicacion(texto)
+    if not partes:
+        return None
+
+    rutas = []
+    for parte in partes:
+        rutas.append((rutas[-1] if rutas else '') + clave_ubicacion(parte) + '/')
+
+    existentes = {u.ruta: u for u in modelo.objects.filter(ruta__in=rutas)}
+    if rutas[-1] in existentes:
+        return existentes[rutas[-1]]
+
+    padre = None
+    for profundidad, (parte, ruta) in enumerate(zip(partes, rutas)):
+        nodo = existentes.get(ruta)
+        if nodo is None:
+            nombre_completo = f'{padre.nombre_completo}{SEPARADOR_NOMBRE}{parte}' if padre else parte
+            if len(nombre_completo) > modelo._meta.get_field('nombre_completo').max_length:
+                raise ValidationError(f'La localización "{nombre_completo}" es demasiado larga.')
+            nodo, _ = modelo.objects.get_or_create(ruta=ruta, defaults={
+                'nombre': parte,
+                'tipo': tipo_ubicacion(parte, profundidad),
+                'padre': padre,
+                'profundidad': profundidad,
+                'nombre_completo': nombre_completo,
+            })
+        padre = nodo
+    return padre
+
+
+def ruta_ubicacion(texto):
+    """Ruta de un texto sin consultar la BD: 'Sede Norte - Piso 2' -> 'sede norte/piso 2/'."""
+    return ''.join(clave_ubicacion(parte) + '/' for parte in partes_ubicacion(texto))
+
+
+def filtrar_subarbol(elementos, ubicacion):
+    """
+    Elementos de la localización y de todas las que cuelgan de ella.
+    'ubicacion' es una Localizacion, su ruta o su nombre completo.
+    """
+    from .models import Localizacion
+
+    ruta = getattr(ubicacion, 'ruta', None) or ruta_ubicacion(ubicacion)
+    return elementos.filter(ubicacion__in=Localizacion.objects.filter(ruta__startswith=ruta).values('pk'))
@@ -1,19 +1,33 @@
 # inventario/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 
 # Define el namespace de la aplicación
 app_name = 'inventario'
 
+# En modo ASGI las vistas de lectura más concurridas usan sus versiones asíncronas
+if settings.MODO_ASGI:
+    DashboardView = views.DashboardAsyncView
+    ListaInventarioView = views.ListaInventarioAsyncView
+    eventos_dashboard = views.eventos_dashboard_async
+else:
+    DashboardView = views.DashboardView
+    ListaInventarioView = views.ListaInventarioView
+    eventos_dashboard = views.eventos_dashboard
+
 urlpatterns = [
     # 1. Dashboard / Página principal
     # Esta ruta es la que se mapea a la raíz del proyecto ('/') en el urls.py principal
-    path('', views.DashboardView.as_view(), name='dashboard'), 
+    path('', DashboardView.as_view(), name='dashboard'), 
+
+    # Cambios en vivo para el dashboard (Server-Sent Events, ver eventos.py)
+    path('eventos/', eventos_dashboard, name='eventos_dashboard'),
 
     # 2. Vistas CRUD de Elementos
     
     # Listar todos los elementos
-    path('lista/', views.ListaInventarioView.as_view(), name='lista_inventario'),
+    path('lista/', ListaInventarioView.as_view(), name='lista_inventario'),
     
     # Crear nuevo elemento
     path('anadir/', views.ElementoCreateView.as_view(), name='anadir_elemento'),
@@ -26,4 +40,13 @@ urlpatterns = [
     
     # Eliminar un elemento específico (usa su PK)
     path('eliminar/<int:pk>/', views.ElementoDeleteView.as_view(), name='eliminar_elemento'),
-]
\ No newline at end of file
+
+    # Movimientos de stock (entradas, salidas y transferencias) de un elemento por cantidad
+    path('movimiento/<int:pk>/', views.MovimientoStockView.as_view(), name='movimiento_stock'),
+
+    # Auditorías físicas: sesiones, lectura de seriales por lotes y cierre
+    path('auditorias/', views.AuditoriasView.as_view(), name='auditorias'),
+    path('auditorias/<int:pk>/', views.SesionAuditoriaView.as_view(), name='sesion_auditoria'),
+    path('auditorias/<int:pk>/lecturas/', views.lecturas_auditoria, name='lecturas_auditoria'),
+    path('auditorias/<int:pk>/cerrar/', views.CerrarAuditoriaView.as_view(), name='cerrar_auditoria'),
+]
@@ -24,6 +24,15 @@ def generar_codigo_activo(tipo_dispositivo_nombre):
     return f"{prefijo}-{identificador}"
 
 
+def normalizar_serial(serial):
+    """
+    Forma canónica de un número de serie (la que se guarda en Elemento.serial):
+    en mayúsculas y sin espacios alrededor. None si queda vacío.
+    """
+    serial = (serial or '').upper().strip()
+    return serial or None
+
+
 def limpiar_nombre_archivo(instance, filename):
     """
     Función de utilidad para nombrar los archivos subidos (ej. imágenes de productos).
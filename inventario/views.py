@@ -1,20 +1,151 @@
 # inventario/views.py
-from django.shortcuts import render, get_object_or_404
+import asyncio
+import datetime
+import json
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.functional import cached_property
+from django.views.decorators.http import require_POST
 from django.views.generic import (
-    TemplateView, ListView, DetailView, 
-    CreateView, UpdateView, DeleteView
+    View, TemplateView, ListView, DetailView, 
+    CreateView, UpdateView, DeleteView, FormView
+)
+from . import eventos
+from .auditoria import cerrar_sesion, conciliacion, registrar_lecturas, resumen_conciliacion
+from .catalogos import nombres_catalogo
+from .condicional import condicional, etag_elemento, etag_lista
+from .filters import ElementoFilter, archivados_filtrados
+from .historial import historial_elemento
+from .models import (
+    ConflictoEdicion, ContadorInventario, Elemento, EstadoElemento, MovimientoStock, ResumenDiario,
+    SesionAuditoria, TipoDispositivo,
 )
-from .filters import ElementoFilter
-from .models import Elemento
-from .forms import ElementoForm
+from .forms import ElementoForm, MovimientoStockForm, SesionAuditoriaForm
+from .signals import version_datos
+from .stock import Movimiento, aplicar_movimientos
 
 # ==============================================================================
 # 1. Vistas de Inicio y Dashboard
 # ==============================================================================
 
+def resumen_dashboard():
+    """
+    Agregados del dashboard sobre ContadorInventario (una fila por tipo,
+    estado y ubicación usados), en UNA sola consulta y sin recorrer el
+    inventario. Los elementos por cantidad suman sus unidades; los de serial cuentan como 1.
+    """
+    return {
+        'total_elementos': Coalesce(Sum('unidades'), 0),
+        'total_registros': Coalesce(Sum('registros'), 0),
+        'elementos_activos': Coalesce(Sum('registros', filter=Q(estado__nombre__iexact='activo')), 0),
+    }
+
+
+def ultimos_registros():
+    """Últimos elementos registrados (con el tipo ya cargado para la tabla)."""
+    return Elemento.objects.select_related('tipo_dispositivo').order_by('-fecha_registro')[:5]
+
+
+def estado_dashboard():
+    """
+    (versión, {'resumen': {...}, 'ultimos': [...]}) para el flujo de eventos.
+    Se calcula una vez por versión de los datos y lo comparten todos los
+    clientes conectados (y todos los procesos, vía la caché). Si se calcula
+    mientras otra petición guarda (contadores aún sin confirmar), la versión
+    vuelve a cambiar con su COMMIT y ese estado no se reutiliza.
+    """
+    version = version_datos()
+    clave = f'dashboard:estado:{version}'
+    estado = cache.get(clave)
+    if estado is None:
+        estado = {
+            'resumen': ContadorInventario.objects.aggregate(**resumen_dashboard()),
+            'ultimos': [eventos.fila_dashboard(elemento) for elemento in ultimos_registros()],
+        }
+        cache.set(clave, estado, 300)
+    return version, estado
+
+
+# Tendencias: una muestra por semana del último año, hasta SERIES_TENDENCIA tipos
+SEMANAS_TENDENCIA = 52
+SERIES_TENDENCIA = 5
+COLORES_TENDENCIA = ('#0d6efd', '#198754', '#fd7e14', '#6f42c1', '#dc3545', '#20c997', '#6c757d')
+ANCHO_GRAFICO, ALTO_GRAFICO = 600, 160
+
+
+def _serie_svg(nombre, valores, maximo, indice):
+    """Serie lista para el template: puntos de la polilínea SVG y último valor."""
+    paso = ANCHO_GRAFICO / max(len(valores) - 1, 1)
+    puntos = ' '.join(
+        f'{i * paso:.1f},{ALTO_GRAFICO - valor * ALTO_GRAFICO / (maximo or 1):.1f}'
+        for i, valor in enumerate(valores)
+    )
+    return {
+        'nombre': nombre, 'puntos': puntos, 'ultimo': valores[-1],
+        'color': COLORES_TENDENCIA[indice % len(COLORES_TENDENCIA)],
+    }
+
+
+def tendencias_dashboard(hoy=None):
+    """
+    Series de unidades por estado y por tipo (sin las de baja) a partir de los
+    resúmenes diarios (comando 'resumen_diario'), en UNA consulta pequeña: solo
+    los días de muestra, agrupados por tipo y estado. Devuelve None si todavía
+    no hay al menos dos días con resumen.
+    """
+    hoy = hoy or timezone.localdate()
+    muestras = [hoy - datetime.timedelta(weeks=semana) for semana in range(SEMANAS_TENDENCIA, -1, -1)]
+    filas = (
+        ResumenDiario.objects
+        .filter(fecha__in=muestras)
+        .order_by()
+        .values_list('fecha', 'tipo_dispositivo_id', 'estado_id')
+        .annotate(total=Sum('unidades'))
+    )
+    por_estado, por_tipo = defaultdict(lambda: defaultdict(int)), defaultdict(lambda: defaultdict(int))
+    estados = nombres_catalogo(EstadoElemento)
+    for fecha, tipo, estado, total in filas:
+        por_estado[estado][fecha] += total
+        if (estados.get(estado) or '').lower() != 'baja':
+            por_tipo[tipo][fecha] += total
+
+    fechas = sorted({fecha for serie in por_estado.values() for fecha in serie})
+    if len(fechas) < 2:
+        return None
+
+    def series(totales, nombres):
+        # Las de más unidades al final del período primero
+        claves = sorted(totales, key=lambda clave: -totales[clave].get(fechas[-1], 0))[:SERIES_TENDENCIA]
+        valores = {clave: [totales[clave].get(fecha, 0) for fecha in fechas] for clave in claves}
+        maximo = max((max(serie) for serie in valores.values()), default=0)
+        return [
+            _serie_svg(nombres.get(clave, clave), valores[clave], maximo, indice)
+            for indice, clave in enumerate(claves)
+        ]
+
+    return {
+        'desde': fechas[0], 'hasta': fechas[-1],
+        'ancho': ANCHO_GRAFICO, 'alto': ALTO_GRAFICO,
+        'por_estado': series(por_estado, estados),
+        'por_tipo': series(por_tipo, nombres_catalogo(TipoDispositivo)),
+    }
+
+
 class DashboardView(LoginRequiredMixin, TemplateView):
     """
     Vista principal del sistema (Dashboard).
@@ -23,29 +154,45 @@ class DashboardView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Total de elementos (considerando cantidades)
-        total_items = 0
-        for elemento in Elemento.objects.all():
-            if elemento.maneja_cantidad:
-                total_items += elemento.cantidad
-            else:
-                total_items += 1
-        
-        context['total_elementos'] = total_items
-        context['total_registros'] = Elemento.objects.count()
-        context['elementos_activos'] = Elemento.objects.filter(estado__nombre__iexact='activo').count()
-        context['ultimos_registros'] = Elemento.objects.all().order_by('-fecha_registro')[:5]
+        context.update(ContadorInventario.objects.aggregate(**resumen_dashboard()))
+        context['ultimos_registros'] = ultimos_registros()
+        context['tendencias'] = tendencias_dashboard()
         return context
 
 
+def eventos_dashboard(request):
+    """
+    Flujo de eventos del dashboard bajo WSGI. Los hilos del servidor son pocos,
+    así que no se deja la conexión abierta: se envía el estado solo si cambió
+    desde el último id que recibió el navegador, y EventSource vuelve a
+    conectar pasados eventos.REINTENTO_WSGI ms. Con MODO_ASGI se usa
+    eventos_dashboard_async, que sí mantiene la conexión.
+    """
+    if not request.user.is_authenticated:
+        return HttpResponse(status=401)
+
+    cuerpo = f'retry: {eventos.REINTENTO_WSGI}\n\n'
+    if request.headers.get('Last-Event-ID') != str(version_datos()):
+        version, estado = estado_dashboard()
+        cuerpo += eventos.mensaje_sse('estado', estado, version)
+    response = HttpResponse(cuerpo, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
 # ==============================================================================
 # 2. Vistas CRUD de Elementos de Inventario
 # ==============================================================================
 
+# Elementos archivados que se muestran bajo la lista cuando se piden (?archivados=on)
+LIMITE_ARCHIVADOS = 50
+
+
+@method_decorator(condicional(etag_lista), name='get')
 class ListaInventarioView(LoginRequiredMixin, ListView):
     """
     Vista para listar todos los elementos del inventario con filtros.
+    Responde 304 mientras no cambien los datos (ver condicional.py).
     """
     model = Elemento
     template_name = 'inventario/lista_inventario.html'
@@ -54,7 +201,8 @@ class ListaInventarioView(LoginRequiredMixin, ListView):
     
     def get_queryset(self):
         """Aplicar filtros usando django-filter"""
-        queryset = Elemento.objects.all()
+        # select_related evita una consulta por fila para el tipo y el estado
+        queryset = Elemento.objects.select_related('tipo_dispositivo', 'estado')
         self.filterset = ElementoFilter(self.request.GET, queryset=queryset)
         return self.filterset.qs
     
@@ -62,14 +210,21 @@ class ListaInventarioView(LoginRequiredMixin, ListView):
         """Agregar el filterset al contexto para usar en el template"""
         context = super().get_context_data(**kwargs)
         context['filterset'] = self.filterset
+        archivados = archivados_filtrados(self.filterset)
+        if archivados is not None:
+            context['total_archivados'] = archivados.count()
+            context['archivados'] = archivados[:LIMITE_ARCHIVADOS]
         return context
 
 
+@method_decorator(condicional(etag_elemento), name='get')
 class DetalleElementoView(LoginRequiredMixin, DetailView):
     """
     Vista para ver el detalle de un elemento específico.
+    Responde 304 mientras el elemento no cambie (ver condicional.py).
     """
     model = Elemento
+    queryset = Elemento.objects.select_related('tipo_dispositivo', 'estado', 'usuario_registro')
     template_name = 'inventario/ver_producto.html'
     context_object_name = 'elemento'
 
@@ -111,7 +266,11 @@ class ElementoUpdateView(LoginRequiredMixin, UpdateView):
     success_url = reverse_lazy('inventario:lista_inventario')
 
     def form_valid(self, form):
-        response = super().form_valid(form)
+        form.instance._usuario_cambio = self.request.user  # Para el historial
+        try:
+            response = super().form_valid(form)
+        except ConflictoEdicion:
+            return self.conflicto(form)
         
         if self.object.maneja_cantidad:
             messages.info(
@@ -126,6 +285,35 @@ class ElementoUpdateView(LoginRequiredMixin, UpdateView):
         return response
 
 
+    def conflicto(self, form):
+        """
+        Otro usuario guardó el elemento mientras se editaba: se muestran sus
+        valores junto a los del formulario y se vuelve a presentar el formulario
+        con la versión actual, de modo que guardar de nuevo es una decisión explícita.
+        """
+        actual = Elemento.objects.select_related('tipo_dispositivo', 'estado').get(pk=self.object.pk)
+        diferencias = []
+        for nombre, campo in form.fields.items():
+            if nombre in ('version', 'imagen') or campo.disabled:
+                continue
+            mio, guardado = form.cleaned_data.get(nombre), getattr(actual, nombre)
+            if mio != guardado and (mio or guardado):
+                diferencias.append({'campo': campo.label, 'mio': mio, 'guardado': guardado})
+
+        datos = form.data.copy()
+        datos['version'] = actual.version
+        self.object = actual
+        form = self.get_form_class()(datos, instance=actual)
+        form.is_valid()
+
+        context = self.get_context_data(form=form)
+        context['conflicto'] = {
+            'diferencias': diferencias,
+            'ultimo_cambio': historial_elemento(actual.pk).last(),
+        }
+        return self.render_to_response(context, status=409)
+
+
 class ElementoDeleteView(LoginRequiredMixin, DeleteView):
     """
     Vista para eliminar un elemento existente.
@@ -141,6 +329,284 @@ class ElementoDeleteView(LoginRequiredMixin, DeleteView):
         else:
             element_info = f'Serial: {self.object.serial}'
         
+        self.object._usuario_cambio = self.request.user  # Para el historial
         response = super().form_valid(form)
         messages.error(self.request, f'El elemento "{element_info}" ha sido eliminado permanentemente.')
-        return response
\ No newline at end of file
+        return response
+
+
+class MovimientoStockView(LoginRequiredMixin, FormView):
+    """
+    Vista para registrar entradas, salidas y transferencias de un elemento por cantidad.
+    """
+    form_class = MovimientoStockForm
+    template_name = 'inventario/movimiento_stock.html'
+
+    @cached_property
+    def elemento(self):
+        # Se carga al usarlo (después de LoginRequiredMixin.dispatch): un
+        # anónimo va al login aunque el pk no exista
+        return get_object_or_404(
+            Elemento.objects.select_related('tipo_dispositivo'), pk=self.kwargs['pk'], maneja_cantidad=True
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['elemento'] = self.elemento
+        context['movimientos'] = self.elemento.movimientos.select_related('usuario')[:20]
+        return context
+
+    def form_valid(self, form):
+        datos = form.cleaned_data
+        movimiento = Movimiento(self.elemento.pk, datos['tipo'], datos['cantidad'], datos['destino'] or None)
+        try:
+            aplicar_movimientos([movimiento], usuario=self.request.user, nota=datos['nota'])
+        except ValidationError as error:
+            form.add_error(None, error)
+            return self.form_invalid(form)
+
+        tipo = MovimientoStock.Tipo(datos['tipo']).label.lower()
+        messages.success(
+            self.request,
+            f'Se registró la {tipo} de {datos["cantidad"]} uds. de "{self.elemento.marca} {self.elemento.modelo}".'
+        )
+        return redirect('inventario:movimiento_stock', pk=self.elemento.pk)
+
+
+# ==============================================================================
+# 3. Vistas Asíncronas (modo ASGI)
+# ==============================================================================
+# Se usan en lugar de las anteriores cuando settings.MODO_ASGI está activo
+# (ver inventario/urls.py). Las consultas usan la API asíncrona del ORM, de modo
+# que un cliente lento ocupa una corrutina y no un hilo del servidor.
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """
+    Equivalente asíncrono de LoginRequiredMixin.
+    Carga el usuario con request.auser() y lo deja resuelto en request.user para
+    que las plantillas y context processors no vuelvan a consultar la sesión.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+
+class DashboardAsyncView(AsyncLoginRequiredMixin, View):
+    """
+    Versión asíncrona de DashboardView.
+    """
+    template_name = DashboardView.template_name
+
+    async def get(self, request, *args, **kwargs):
+        context = await ContadorInventario.objects.aaggregate(**resumen_dashboard())
+        context['ultimos_registros'] = [elemento async for elemento in ultimos_registros()]
+        context['tendencias'] = await sync_to_async(tendencias_dashboard)()
+        return TemplateResponse(request, self.template_name, context)
+
+
+async def flujo_eventos(ultimo_id):
+    """
+    Mensajes SSE para un navegador: el estado completo al conectar (si el que
+    tiene no es el actual), luego cada cambio publicado en este proceso seguido
+    de los contadores, y un latido cada eventos.LATIDO segundos que además
+    detecta los cambios hechos por otros procesos.
+    """
+    suscripcion = eventos.canal.suscribir()
+    try:
+        yield f'retry: {eventos.REINTENTO_ASGI}\n\n'
+        version = await sync_to_async(version_datos)()
+        if str(version) != ultimo_id:
+            version, estado = await sync_to_async(estado_dashboard)()
+            yield eventos.mensaje_sse('estado', estado, version)
+
+        while True:
+            try:
+                primero = await asyncio.wait_for(suscripcion.cola.get(), eventos.LATIDO)
+            except asyncio.TimeoutError:
+                if await sync_to_async(version_datos)() == version:
+                    yield ': latido\n\n'
+                    continue
+                version, estado = await sync_to_async(estado_dashboard)()
+                yield eventos.mensaje_sse('estado', estado, version)
+                continue
+
+            await asyncio.sleep(eventos.AGRUPAR)
+            lote = [primero]
+            while not suscripcion.cola.empty():
+                lote.append(suscripcion.cola.get_nowait())
+            version, estado = await sync_to_async(estado_dashboard)()
+
+            if suscripcion.desbordada or len(lote) > eventos.MAX_LOTE:
+                suscripcion.desbordada = False
+                yield eventos.mensaje_sse('estado', estado, version)
+                continue
+            for evento, datos in lote:
+                yield eventos.mensaje_sse(evento, datos)
+            yield eventos.mensaje_sse('resumen', estado['resumen'], version)
+    finally:
+        eventos.canal.cancelar(suscripcion)
+
+
+async def eventos_dashboard_async(request):
+    """Flujo de eventos del dashboard con la conexión abierta (modo ASGI)."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+
+    response = StreamingHttpResponse(
+        flujo_eventos(request.headers.get('Last-Event-ID')), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Que un proxy (nginx) no acumule el flujo
+    return response
+
+
+@method_decorator(condicional(etag_lista), name='get')
+class ListaInventarioAsyncView(AsyncLoginRequiredMixin, View):
+    """
+    Versión asíncrona de ListaInventarioView (mismo template, paginación y ETag).
+    """
+    template_name = ListaInventarioView.template_name
+    paginate_by = ListaInventarioView.paginate_by
+
+    async def get(self, request, *args, **kwargs):
+        # Validar el formulario de filtros puede consultar los catálogos (ModelChoice),
+        # así que se construye en un hilo; la consulta resultante sigue siendo perezosa.
+        filterset = await sync_to_async(
+            lambda: self._filtrar(request.GET)
+        )()
+        queryset = filterset.qs.select_related('tipo_dispositivo', 'estado')
+
+        paginator = Paginator(queryset, self.paginate_by)
+        # Se precarga el conteo asíncrono para que el Paginator no lo calcule en sync
+        paginator.count = await queryset.acount()
+        page = paginator.get_page(request.GET.get('page'))
+        page.object_list = [elemento async for elemento in page.object_list]
+
+        context = {
+            'filterset': filterset,
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            'elementos': page.object_list,
+        }
+        archivados = await sync_to_async(archivados_filtrados)(filterset)  # Valida sus filtros, como _filtrar
+        if archivados is not None:
+            context['total_archivados'] = await archivados.acount()
+            context['archivados'] = [elemento async for elemento in archivados[:LIMITE_ARCHIVADOS]]
+        return TemplateResponse(request, self.template_name, context)
+
+    @staticmethod
+    def _filtrar(datos):
+        filterset = ElementoFilter(datos, queryset=Elemento.objects.all())
+        filterset.qs  # fuerza la validación del formulario dentro del hilo
+        return filterset
+
+
+# ==============================================================================
+# 4. Auditorías Físicas (ver inventario/auditoria.py)
+# ==============================================================================
+
+class AuditoriasView(LoginRequiredMixin, FormView):
+    """
+    Inicia una sesión de auditoría y lista las más recientes.
+    """
+    form_class = SesionAuditoriaForm
+    template_name = 'inventario/auditorias.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['sesiones'] = SesionAuditoria.objects.select_related('ubicacion', 'usuario')[:20]
+        return context
+
+    def form_valid(self, form):
+        sesion = SesionAuditoria.objects.create(
+            ubicacion=form.cleaned_data['ubicacion'],
+            nota=form.cleaned_data['nota'],
+            usuario=self.request.user,
+        )
+        return redirect('inventario:sesion_auditoria', pk=sesion.pk)
+
+
+class SesionAuditoriaView(LoginRequiredMixin, DetailView):
+    """
+    Lectura de seriales y conciliación de una sesión de auditoría.
+    """
+    model = SesionAuditoria
+    template_name = 'inventario/sesion_auditoria.html'
+    context_object_name = 'sesion'
+    # Filas mostradas por grupo (los totales siempre son completos)
+    limite_lista = 200
+
+    def get_queryset(self):
+        return SesionAuditoria.objects.select_related('ubicacion', 'usuario')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        grupos = conciliacion(self.object)
+        campos = ('pk', 'serial', 'marca', 'modelo', 'localizacion')
+        context['resumen'] = resumen_conciliacion(self.object)
+        context['faltantes'] = grupos['faltantes'].order_by('localizacion', 'serial').values(*campos)[:self.limite_lista]
+        context['fuera_de_lugar'] = grupos['fuera_de_lugar'].order_by('localizacion', 'serial').values(*campos)[:self.limite_lista]
+        context['desconocidas'] = grupos['desconocidas'].values_list('serial', flat=True)[:self.limite_lista]
+        context['limite_lista'] = self.limite_lista
+        return context
+
+
+@require_POST
+def lecturas_auditoria(request, pk):
+    """
+    Registra un lote de seriales leídos. Acepta JSON ({"seriales": [...]},
+    responde con el estado de cada serial y el resumen actualizado) o el
+    formulario de la página (un serial por línea, redirige a la sesión).
+    """
+    es_json = request.content_type == 'application/json'
+    if not request.user.is_authenticated:
+        if es_json:
+            return JsonResponse({'error': 'Autenticación requerida.'}, status=401)
+        return redirect_to_login(request.get_full_path())
+    sesion = get_object_or_404(SesionAuditoria.objects.select_related('ubicacion'), pk=pk)
+
+    if es_json:
+        try:
+            seriales = json.loads(request.body)['seriales']
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({'error': 'Se esperaba {"seriales": [...]}.'}, status=400)
+        if not isinstance(seriales, list) or not all(isinstance(serial, str) for serial in seriales):
+            return JsonResponse({'error': '"seriales" debe ser una lista de textos.'}, status=400)
+    else:
+        seriales = request.POST.get('seriales', '').splitlines()
+
+    try:
+        resultado = registrar_lecturas(sesion, seriales)
+    except ValidationError as error:
+        if es_json:
+            return JsonResponse({'error': ' '.join(error.messages)}, status=400)
+        messages.error(request, ' '.join(error.messages))
+        return redirect('inventario:sesion_auditoria', pk=sesion.pk)
+
+    if es_json:
+        return JsonResponse({
+            'lecturas': [
+                {'serial': lectura['serial'], 'estado': lectura['estado'],
+                 'localizacion': lectura['elemento']['localizacion'] if lectura['elemento'] else None}
+                for lectura in resultado
+            ],
+            'resumen': resumen_conciliacion(sesion),
+        }, json_dumps_params={'ensure_ascii': False})
+
+    messages.success(request, f'Se registraron {len(resultado)} seriales.')
+    return redirect('inventario:sesion_auditoria', pk=sesion.pk)
+
+
+class CerrarAuditoriaView(LoginRequiredMixin, View):
+    """Cierra la sesión: no admite más lecturas y la conciliación queda fija."""
+
+    def post(self, request, pk):
+        sesion = get_object_or_404(SesionAuditoria, pk=pk)
+        cerrar_sesion(sesion)
+        messages.info(request, 'La sesión de auditoría quedó cerrada.')
+        return redirect('inventario:sesion_auditoria', pk=sesion.pk)
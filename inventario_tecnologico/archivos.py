@@ -0,0 +1,439 @@
+# inventario_tecnologico/archivos.py
+"""
+Capa para servir archivos estáticos (STATIC_ROOT) y subidos (MEDIA_ROOT)
+directamente desde el servidor WSGI, sin pasar por middlewares, URLs ni vistas
+de Django.
+
+- Estáticos: los nombres "hasheados" del manifest (ver storage.py) se envían con
+  Cache-Control de un año + immutable, y se prefieren las variantes .br/.gz
+  precomprimidas cuando el navegador las acepta.
+- Media: se envía con wsgi.file_wrapper (sendfile en waitress/gunicorn), es
+  decir, sin copiar el archivo a memoria de Python.
+- Ambos soportan HEAD, Range, If-Modified-Since e If-None-Match.
+
+La misma lógica se expone como middleware WSGI (ArchivosWSGI) y ASGI (ArchivosASGI).
+"""
+import asyncio
+import json
+import mimetypes
+import os
+import posixpath
+import stat
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.utils.http import http_date, parse_http_date_safe
+
+TAMANO_BLOQUE = 64 * 1024
+
+UN_ANO = 60 * 60 * 24 * 365
+
+# Orden de preferencia de las variantes precomprimidas
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+
+# ==============================================================================
+# 1. Resolución de archivos (independiente del protocolo WSGI/ASGI)
+# ==============================================================================
+
+class RespuestaArchivo:
+    """Resultado de resolver una petición: estado, encabezados y el archivo a enviar."""
+
+    def __init__(self, estado, encabezados, archivo=None, inicio=0, longitud=0):
+        self.estado = estado
+        self.encabezados = encabezados
+        self.archivo = archivo
+        self.inicio = inicio
+        self.longitud = longitud
+
+    def cerrar(self):
+        if self.archivo is not None:
+            self.archivo.close()
+            self.archivo = None
+
+
+class ServidorArchivos:
+    """
+    Sirve los archivos de una carpeta ('raiz') publicados bajo un prefijo de URL.
+
+    Si 'inmutable' es True los archivos no cambian mientras el proceso vive
+    (STATIC_ROOT tras collectstatic), así que los stat() se guardan en memoria:
+    los de archivos que existen y los de sus variantes, no los de cualquier URL
+    pedida (un cliente podría llenar la memoria pidiendo rutas inexistentes).
+    Con 'precomprimidos' se buscan las variantes .br/.gz junto a cada archivo.
+    """
+
+    def __init__(self, prefijo, raiz, max_age, inmutable=False, precomprimidos=False,
+                 nombres_hasheados=None):
+        self.prefijo = '/' + prefijo.strip('/') + '/'
+        self.raiz = os.path.realpath(raiz)
+        self.max_age = max_age
+        self.inmutable = inmutable
+        self.precomprimidos = precomprimidos
+        self.nombres_hasheados = nombres_hasheados or set()
+        self._indice = {}
+
+    def atiende(self, ruta_url):
+        return ruta_url.startswith(self.prefijo)
+
+    # --- Localización en disco -------------------------------------------------
+
+    def _ruta_segura(self, ruta_url):
+        """Convierte la URL en una ruta absoluta dentro de 'raiz' (o None)."""
+        relativa = unquote(ruta_url[len(self.prefijo):])
+        relativa = posixpath.normpath(relativa).lstrip('/')
+        if not relativa or relativa.startswith('..') or '\x00' in relativa:
+            return None, None
+
+        ruta = os.path.realpath(os.path.join(self.raiz, *relativa.split('/')))
+        if not ruta.startswith(self.raiz + os.sep):
+            return None, None
+        return relativa, ruta
+
+    def _stat(self, ruta, guardar_ausente=False):
+        """
+        stat() de un archivo regular (o None). 'guardar_ausente' solo para las
+        variantes de un archivo que existe: su número está acotado por el disco.
+        """
+        if self.inmutable and ruta in self._indice:
+            return self._indice[ruta]
+        try:
+            info = os.stat(ruta)
+        except OSError:
+            info = None
+        if info is not None and not stat.S_ISREG(info.st_mode):
+            info = None
+        if self.inmutable and (info is not None or guardar_ausente):
+            self._indice[ruta] = info
+        return info
+
+    # --- Resolución de la petición ---------------------------------------------
+
+    def resolver(self, metodo, ruta_url, encabezados):
+        """
+        Devuelve un RespuestaArchivo o None si el archivo no existe (en ese caso
+        la petición sigue su curso normal hacia Django).
+
+        'encabezados' es un dict con los nombres en minúsculas ('range',
+        'accept-encoding', 'if-none-match', 'if-modified-since', 'if-range').
+        """
+        if metodo not in ('GET', 'HEAD'):
+            return None
+
+        relativa, ruta = self._ruta_segura(ruta_url)
+        if ruta is None:
+            return None
+
+        info = self._stat(ruta)
+        if info is None:
+            return None
+
+        content_type, _ = mimetypes.guess_type(ruta)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+
+        # Variante precomprimida (solo sin Range: los rangos se calculan sobre el original)
+        codificacion, variantes = None, False
+        aceptadas = codificaciones_aceptadas(encabezados.get('accept-encoding', ''))
+        for nombre, sufijo in CODIFICACIONES if self.precomprimidos else ():
+            info_variante = self._stat(ruta + sufijo, guardar_ausente=True)
+            if info_variante is None:
+                continue
+            variantes = True
+            if codificacion is None and nombre in aceptadas and 'range' not in encabezados:
+                codificacion, ruta, info = nombre, ruta + sufijo, info_variante
+
+        etag = '"%x-%x%s"' % (int(info.st_mtime), info.st_size, '-' + codificacion if codificacion else '')
+        ultima_modificacion = http_date(info.st_mtime)
+
+        if relativa in self.nombres_hasheados:
+            cache_control = f'public, max-age={UN_ANO}, immutable'
+        else:
+            cache_control = f'public, max-age={self.max_age}'
+
+        base = [
+            ('Content-Type', content_type),
+            ('Last-Modified', ultima_modificacion),
+            ('ETag', etag),
+            ('Cache-Control', cache_control),
+            ('Accept-Ranges', 'bytes'),
+        ]
+        if variantes:
+            base.append(('Vary', 'Accept-Encoding'))
+        if codificacion:
+            base.append(('Content-Encoding', codificacion))
+
+        # Peticiones condicionales (If-None-Match tiene prioridad sobre la fecha)
+        if self._no_modificado(encabezados, etag, info.st_mtime):
+            return RespuestaArchivo('304 Not Modified', base)
+
+        tamano = info.st_size
+        inicio, longitud, estado = 0, tamano, '200 OK'
+
+        rango = encabezados.get('range')
+        if rango and self._rango_vigente(encabezados.get('if-range'), etag, info.st_mtime):
+            limites = parsear_rango(rango, tamano)
+            if limites is None:
+                return RespuestaArchivo(
+                    '416 Range Not Satisfiable',
+                    base + [('Content-Range', f'bytes */{tamano}'), ('Content-Length', '0')],
+                )
+            if limites is not False:
+                inicio, fin = limites
+                longitud = fin - inicio + 1
+                estado = '206 Partial Content'
+                base.append(('Content-Range', f'bytes {inicio}-{fin}/{tamano}'))
+
+        base.append(('Content-Length', str(longitud)))
+
+        if metodo == 'HEAD':
+            return RespuestaArchivo(estado, base)
+
+        archivo = open(ruta, 'rb')
+        if inicio:
+            archivo.seek(inicio)
+        return RespuestaArchivo(estado, base, archivo, inicio, longitud)
+
+    @staticmethod
+    def _no_modificado(encabezados, etag, mtime):
+        if_none_match = encabezados.get('if-none-match')
+        if if_none_match is not None:
+            etiquetas = [e.strip().removeprefix('W/') for e in if_none_match.split(',')]
+            return '*' in etiquetas or etag in etiquetas
+
+        desde = parse_http_date_safe(encabezados.get('if-modified-since', ''))
+        return desde is not None and int(mtime) <= desde
+
+    @staticmethod
+    def _rango_vigente(if_range, etag, mtime):
+        """Con If-Range solo se respeta el Range si el recurso no ha cambiado."""
+        if not if_range:
+            return True
+        if if_range.startswith('"') or if_range.startswith('W/'):
+            return if_range == etag
+        fecha = parse_http_date_safe(if_range)
+        return fecha is not None and int(mtime) <= fecha
+
+
+def codificaciones_aceptadas(valor):
+    """
+    Codificaciones que acepta el encabezado Accept-Encoding: las que tienen
+    q > 0 ('gzip;q=0' la rechaza) y, con '*', las de CODIFICACIONES que no se
+    rechazaron por nombre.
+    """
+    aceptadas, rechazadas = set(), set()
+    for parte in valor.split(','):
+        nombre, _, parametros = parte.partition(';')
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        calidad = 1.0
+        for parametro in parametros.split(';'):
+            clave, _, numero = parametro.partition('=')
+            if clave.strip().lower() == 'q':
+                try:
+                    calidad = float(numero)
+                except ValueError:
+                    calidad = 0.0
+        (aceptadas if calidad > 0 else rechazadas).add(nombre)
+    if '*' in aceptadas:
+        aceptadas |= {nombre for nombre, _ in CODIFICACIONES} - rechazadas
+    return aceptadas - rechazadas
+
+
+def parsear_rango(valor, tamano):
+    """
+    Interpreta un encabezado Range de un solo intervalo.
+
+    Devuelve (inicio, fin) inclusivo, False si el encabezado debe ignorarse
+    (sintaxis desconocida o varios intervalos) o None si no es satisfacible.
+    """
+    unidad, _, especificacion = valor.partition('=')
+    if unidad.strip().lower() != 'bytes' or ',' in especificacion:
+        return False
+
+    desde, guion, hasta = especificacion.strip().partition('-')
+    if not guion:
+        return False
+
+    try:
+        if desde == '':
+            # Sufijo: los últimos N bytes
+            sufijo = int(hasta)
+            if sufijo <= 0:
+                return None
+            return max(tamano - sufijo, 0), tamano - 1
+
+        inicio = int(desde)
+        fin = int(hasta) if hasta else tamano - 1
+    except ValueError:
+        return False
+
+    if inicio >= tamano or fin < inicio:
+        return None
+    return inicio, min(fin, tamano - 1)
+
+
+def leer_manifest(raiz):
+    """Nombres hasheados publicados por ManifestStaticFilesStorage (staticfiles.json)."""
+    try:
+        with open(os.path.join(raiz, 'staticfiles.json'), encoding='utf-8') as archivo:
+            manifest = json.load(archivo)
+    except (OSError, ValueError):
+        return set()
+    return set(manifest.get('paths', {}).values())
+
+
+def crear_servidores():
+    """Servidores configurados a partir de settings (estáticos y media)."""
+    servidores = []
+    if settings.STATIC_URL and settings.STATIC_ROOT:
+        servidores.append(ServidorArchivos(
+            settings.STATIC_URL,
+            settings.STATIC_ROOT,
+            max_age=settings.STATIC_MAX_AGE,
+            inmutable=not settings.DEBUG,
+            precomprimidos=True,
+            nombres_hasheados=leer_manifest(settings.STATIC_ROOT),
+        ))
+    if settings.MEDIA_URL and settings.MEDIA_ROOT:
+        servidores.append(ServidorArchivos(
+            settings.MEDIA_URL,
+            settings.MEDIA_ROOT,
+            max_age=settings.MEDIA_MAX_AGE,
+        ))
+    return servidores
+
+
+# ==============================================================================
+# 2. Adaptador WSGI
+# ==============================================================================
+
+class IteradorArchivo:
+    """Iterador por bloques que respeta la longitud pedida y cierra el archivo."""
+
+    def __init__(self, archivo, longitud):
+        self.archivo = archivo
+        self.restante = longitud
+
+    def __iter__(self):
+        while self.restante > 0:
+            datos = self.archivo.read(min(TAMANO_BLOQUE, self.restante))
+            if not datos:
+                break
+            self.restante -= len(datos)
+            yield datos
+
+    def close(self):
+        self.archivo.close()
+
+
+class ArchivosWSGI:
+    """
+    Envuelve la aplicación WSGI de Django. Las URL bajo STATIC_URL/MEDIA_URL
+    con un archivo existente se responden aquí; el resto pasa a Django.
+    """
+
+    def __init__(self, application, servidores=None):
+        self.application = application
+        self.servidores = crear_servidores() if servidores is None else servidores
+
+    def __call__(self, environ, start_response):
+        ruta_url = environ.get('PATH_INFO', '')
+        for servidor in self.servidores:
+            if not servidor.atiende(ruta_url):
+                continue
+
+            encabezados = {
+                nombre: environ[clave]
+                for nombre, clave in (
+                    ('accept-encoding', 'HTTP_ACCEPT_ENCODING'),
+                    ('range', 'HTTP_RANGE'),
+                    ('if-range', 'HTTP_IF_RANGE'),
+                    ('if-none-match', 'HTTP_IF_NONE_MATCH'),
+                    ('if-modified-since', 'HTTP_IF_MODIFIED_SINCE'),
+                )
+                if clave in environ
+            }
+            respuesta = servidor.resolver(environ.get('REQUEST_METHOD', 'GET'), ruta_url, encabezados)
+            if respuesta is None:
+                break
+
+            start_response(respuesta.estado, respuesta.encabezados)
+            if respuesta.archivo is None:
+                return []
+
+            # wsgi.file_wrapper usa sendfile(); solo es seguro si se envía
+            # hasta el final del archivo (algunos servidores ignoran Content-Length).
+            file_wrapper = environ.get('wsgi.file_wrapper')
+            tamano = os.fstat(respuesta.archivo.fileno()).st_size
+            if file_wrapper is not None and respuesta.inicio + respuesta.longitud == tamano:
+                return file_wrapper(respuesta.archivo, TAMANO_BLOQUE)
+            return IteradorArchivo(respuesta.archivo, respuesta.longitud)
+
+        return self.application(environ, start_response)
+
+
+# ==============================================================================
+# 3. Adaptador ASGI
+# ==============================================================================
+
+class ArchivosASGI:
+    """
+    Equivalente ASGI de ArchivosWSGI (modo ASGI, ver asgi.py). La lectura del
+    disco se hace en un hilo para no bloquear el event loop.
+    """
+
+    def __init__(self, application, servidores=None):
+        self.application = application
+        self.servidores = crear_servidores() if servidores is None else servidores
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            ruta_url = scope.get('path', '')
+            for servidor in self.servidores:
+                if not servidor.atiende(ruta_url):
+                    continue
+
+                encabezados = {
+                    nombre.decode('latin-1').lower(): valor.decode('latin-1')
+                    for nombre, valor in scope.get('headers', [])
+                }
+                respuesta = servidor.resolver(scope.get('method', 'GET'), ruta_url, encabezados)
+                if respuesta is None:
+                    break
+
+                await self._enviar(respuesta, send)
+                return
+
+        await self.application(scope, receive, send)
+
+    @staticmethod
+    async def _enviar(respuesta, send):
+        codigo = int(respuesta.estado.split(' ', 1)[0])
+        await send({
+            'type': 'http.response.start',
+            'status': codigo,
+            'headers': [
+                (nombre.lower().encode('latin-1'), valor.encode('latin-1'))
+                for nombre, valor in respuesta.encabezados
+            ],
+        })
+
+        if respuesta.archivo is None:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        try:
+            restante = respuesta.longitud
+            while restante > 0:
+                datos = await asyncio.to_thread(respuesta.archivo.read, min(TAMANO_BLOQUE, restante))
+                if not datos:
+                    break
+                restante -= len(datos)
+                await send({'type': 'http.response.body', 'body': datos, 'more_body': restante > 0})
+            if restante > 0:
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            respuesta.cerrar()
@@ -3,6 +3,10 @@ ASGI config for inventario_tecnologico project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Modo ASGI (ver serve_asgi.py): con MODO_ASGI=True en el .env el dashboard, la
+lista y las exportaciones usan vistas asíncronas, y los archivos estáticos y
+media se sirven con ``ArchivosASGI`` sin pasar por Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -14,3 +18,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventario_tecnologico.settings')
 
 application = get_asgi_application()
+
+# Se importa después de configurar Django porque lee settings al crearse.
+from inventario_tecnologico.archivos import ArchivosASGI  # noqa: E402
+
+application = ArchivosASGI(application)
@@ -0,0 +1,187 @@
+# inventario_tecnologico/bitacora.py
+"""
+Logging sin bloqueos en la petición.
+
+settings.LOGGING declara los handlers del logger raíz (consola y archivo
+rotativo) como siempre; configurar_logging (LOGGING_CONFIG) los saca del
+logger raíz y los pone detrás de una cola:
+
+    petición ── logger ── QueueHandler ──> cola ──> hilo escritor ── consola
+                                                                 └─ archivo (rota)
+
+La petición solo arma el registro y lo encola. Un único hilo por proceso
+escribe y rota el archivo, así que los hilos de waitress ya no compiten por
+él ni esperan al disco. Con varios procesos (ASGI_WORKERS > 1) cada uno tiene
+su escritor; antes de rotar, el archivo se reabre si otro proceso ya lo rotó.
+
+Cada registro lleva el id de la petición en curso (atributo 'id_peticion',
+'-' fuera de una petición), que fija PeticionIdMiddleware: se toma del
+encabezado X-Request-ID si viene de un proxy, o se genera, y se devuelve en
+la respuesta. Con LOG_JSON=True el archivo se escribe en líneas JSON
+(FormatoJSON) en lugar de texto.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import re
+import uuid
+from datetime import datetime, timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+id_peticion = contextvars.ContextVar('id_peticion', default='-')
+
+ENCABEZADO = 'X-Request-ID'
+# Ids aceptados desde el encabezado (evita inyectar saltos de línea o textos largos en el log)
+_ID_VALIDO = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+# Registros en espera como máximo; si el disco no da abasto se descartan en vez de frenar las peticiones
+CAPACIDAD_COLA = 10000
+
+_escritores = []
+
+
+# ==============================================================================
+# 1. Cola y escritor
+# ==============================================================================
+
+class ColaHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que prepara el registro en el hilo de la petición (mensaje
+    formateado, traza de la excepción como texto y su id de petición) para
+    que el escritor no dependa de objetos que la petición ya liberó.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if not hasattr(record, 'id_peticion'):
+            record.id_peticion = id_peticion.get()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass  # Se pierde el registro, no la latencia de la petición
+
+
+class ArchivoRotativo(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler que no vuelve a rotar un archivo que otro proceso ya rotó."""
+
+    def shouldRollover(self, record):
+        if self.stream is not None:
+            try:
+                rotado = os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+            except OSError:
+                rotado = True
+            if rotado:
+                self.stream.close()
+                self.stream = self._open()
+        return super().shouldRollover(record)
+
+
+def configurar_logging(config):
+    """
+    LOGGING_CONFIG: aplica 'config' con dictConfig y mueve los handlers del
+    logger raíz detrás de una cola atendida por un hilo escritor.
+    """
+    logging.config.dictConfig(config)
+
+    raiz = logging.getLogger()
+    destinos = list(raiz.handlers)
+    if not destinos:
+        return
+    cola = queue.Queue(CAPACIDAD_COLA)
+    for handler in destinos:
+        raiz.removeHandler(handler)
+    raiz.addHandler(ColaHandler(cola))
+
+    escritor = logging.handlers.QueueListener(cola, *destinos, respect_handler_level=True)
+    escritor.start()
+    _escritores.append(escritor)
+
+
+@atexit.register
+def _detener_escritores():
+    # Escribe lo que quede en la cola antes de salir
+    while _escritores:
+        _escritores.pop().stop()
+
+
+# ==============================================================================
+# 2. Formato JSON
+# ==============================================================================
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, con el id de la petición."""
+
+    def format(self, record):
+        datos = {
+            'fecha': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'id_peticion': getattr(record, 'id_peticion', '-'),
+            'proceso': record.process,
+            'hilo': record.thread,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            datos['excepcion'] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+# ==============================================================================
+# 3. Id de la petición
+# ==============================================================================
+
+class PeticionIdMiddleware:
+    """
+    Fija el id de la petición (X-Request-ID) para los registros de log y lo
+    devuelve en la respuesta. Funciona en modo WSGI y ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.modo_async = iscoroutinefunction(get_response)
+        if self.modo_async:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _iniciar(request):
+        valor = request.headers.get(ENCABEZADO, '')
+        request.id_peticion = valor if _ID_VALIDO.match(valor) else uuid.uuid4().hex
+        return id_peticion.set(request.id_peticion)
+
+    def __call__(self, request):
+        if self.modo_async:
+            return self.__acall__(request)
+        token = self._iniciar(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            id_peticion.reset(token)
+        response[ENCABEZADO] = request.id_peticion
+        return response
+
+    async def __acall__(self, request):
+        token = self._iniciar(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            id_peticion.reset(token)
+        response[ENCABEZADO] = request.id_peticion
+        return response
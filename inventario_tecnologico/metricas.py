@@ -0,0 +1,393 @@
+# inventario_tecnologico/metricas.py
+"""
+Métricas de la aplicación en formato de texto Prometheus (endpoint /metrics).
+
+- Peticiones y latencia por nombre de URL (ej. 'inventario:dashboard').
+- Consultas SQL por petición.
+- Duración y tamaño de las exportaciones (Excel, PDF, JSON).
+- Inicios de sesión exitosos y fallidos.
+
+Cada proceso acumula sus incrementos en memoria (protegidos con un lock) y
+cada METRICAS_INTERVALO segundos los suma al total común (ARCHIVO_TOTALES en
+METRICAS_DIR), con un archivo de bloqueo para que dos procesos no lo
+reescriban a la vez. Así los totales son correctos aunque haya varios workers
+(waitress, uvicorn, etc.), no quedan archivos de los workers que terminaron y
+al salir cada proceso vuelca lo que le faltaba (atexit).
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Límites (en segundos / unidades) de los histogramas
+BUCKETS_LATENCIA = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 250, 1000)
+BUCKETS_BYTES = (10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+ARCHIVO_TOTALES = 'metricas.json'
+ARCHIVO_BLOQUEO = 'metricas.bloqueo'
+# Un bloqueo más antiguo quedó de un proceso que murió mientras escribía
+BLOQUEO_ABANDONADO = 10
+
+DEFINICIONES = {
+    'inventario_http_peticiones_total': ('counter', 'Peticiones HTTP atendidas.', None),
+    'inventario_http_duracion_segundos': ('histogram', 'Latencia de las peticiones HTTP.', BUCKETS_LATENCIA),
+    'inventario_db_consultas_por_peticion': ('histogram', 'Consultas SQL ejecutadas por petición.', BUCKETS_CONSULTAS),
+    'inventario_exportacion_duracion_segundos': ('histogram', 'Duración de las exportaciones.', BUCKETS_LATENCIA),
+    'inventario_exportacion_bytes': ('histogram', 'Tamaño de los archivos exportados.', BUCKETS_BYTES),
+    'inventario_login_total': ('counter', 'Intentos de inicio de sesión por resultado.', None),
+}
+
+
+# ==============================================================================
+# 1. Registro en memoria (por proceso)
+# ==============================================================================
+
+def _sumar(totales, clave, valor):
+    """Suma un valor (contador o histograma) a totales[clave]."""
+    if isinstance(valor, dict):
+        actual = totales.setdefault(clave, {'buckets': [0] * len(valor['buckets']), 'suma': 0, 'cuenta': 0})
+        actual['buckets'] = [a + b for a, b in zip(actual['buckets'], valor['buckets'])]
+        actual['suma'] += valor['suma']
+        actual['cuenta'] += valor['cuenta']
+    else:
+        totales[clave] = totales.get(clave, 0) + valor
+
+
+class RegistroMetricas:
+    """Incrementos del proceso actual, sumados periódicamente al total en disco."""
+
+    def __init__(self, directorio, intervalo):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._valores = {}  # Solo lo acumulado desde el último volcado
+        self._ultimo_volcado = 0.0
+
+    @staticmethod
+    def _clave(nombre, etiquetas):
+        return nombre, tuple(sorted(etiquetas.items()))
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = self._clave(nombre, etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+        self._volcar_si_corresponde()
+
+    def observar(self, nombre, valor, **etiquetas):
+        buckets = DEFINICIONES[nombre][2]
+        clave = self._clave(nombre, etiquetas)
+        with self._lock:
+            datos = self._valores.get(clave)
+            if datos is None:
+                datos = self._valores[clave] = {'buckets': [0] * len(buckets), 'suma': 0, 'cuenta': 0}
+            for indice, limite in enumerate(buckets):
+                if valor <= limite:
+                    datos['buckets'][indice] += 1
+            datos['suma'] += valor
+            datos['cuenta'] += 1
+        self._volcar_si_corresponde()
+
+    def _volcar_si_corresponde(self):
+        if time.monotonic() - self._ultimo_volcado >= self.intervalo:
+            self.volcar()
+
+    def volcar(self):
+        """Suma al total en disco lo acumulado desde el último volcado."""
+        with self._lock:
+            self._ultimo_volcado = time.monotonic()
+            pendientes, self._valores = self._valores, {}
+        if not pendientes:
+            return
+
+        try:
+            with _bloqueo(self.directorio):
+                totales = leer_totales(self.directorio)
+                for clave, valor in pendientes.items():
+                    _sumar(totales, clave, valor)
+                _escribir_totales(self.directorio, totales)
+        except BaseException:
+            with self._lock:  # No se pierden: quedan para el próximo volcado
+                for clave, valor in pendientes.items():
+                    _sumar(self._valores, clave, valor)
+            raise
+
+
+@contextlib.contextmanager
+def _bloqueo(directorio):
+    """Exclusión entre procesos (y hilos) para reescribir el total: un archivo creado con O_EXCL."""
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, ARCHIVO_BLOQUEO)
+    while True:
+        try:
+            descriptor = os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(ruta) > BLOQUEO_ABANDONADO:
+                    os.remove(ruta)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.005)
+    try:
+        yield
+    finally:
+        os.close(descriptor)
+        os.remove(ruta)
+
+
+def _escribir_totales(directorio, totales):
+    """Reemplazo atómico: quien lee ve el total anterior o el nuevo, nunca uno a medias."""
+    contenido = [
+        {'nombre': nombre, 'etiquetas': dict(etiquetas), 'valor': valor}
+        for (nombre, etiquetas), valor in totales.items()
+    ]
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+        json.dump(contenido, archivo)
+    os.replace(temporal, os.path.join(directorio, ARCHIVO_TOTALES))
+
+
+_registro = None
+_registro_lock = threading.Lock()
+
+
+def registro():
+    """Registro del proceso actual (se crea al primer uso)."""
+    global _registro
+    if _registro is None:
+        with _registro_lock:
+            if _registro is None:
+                _registro = RegistroMetricas(settings.METRICAS_DIR, settings.METRICAS_INTERVALO)
+    return _registro
+
+
+@atexit.register
+def cerrar_registro():
+    """Vuelca lo pendiente del proceso y descarta su registro (al salir, o al terminar las pruebas)."""
+    global _registro
+    with _registro_lock:
+        anterior, _registro = _registro, None
+    if anterior is not None:
+        anterior.volcar()
+
+
+# ==============================================================================
+# 2. Totales de todos los procesos y formato de texto
+# ==============================================================================
+
+def leer_totales(directorio):
+    """Totales sumados por todos los procesos ({} si todavía no hay)."""
+    totales = {}
+    try:
+        with open(os.path.join(directorio, ARCHIVO_TOTALES), encoding='utf-8') as archivo:
+            entradas = json.load(archivo)
+    except FileNotFoundError:
+        return totales
+    except ValueError:
+        return totales  # Archivo dañado: se vuelve a contar desde cero (Prometheus lo ve como un reinicio)
+
+    for entrada in entradas:
+        _sumar(totales, (entrada['nombre'], tuple(sorted(entrada['etiquetas'].items()))), entrada['valor'])
+    return totales
+
+
+def _etiquetas_texto(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ''
+    contenido = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pares
+    )
+    return '{' + contenido + '}'
+
+
+def formato_texto(totales):
+    """Genera la exposición en formato de texto de Prometheus (versión 0.0.4)."""
+    lineas = []
+    for nombre, (tipo, ayuda, buckets) in DEFINICIONES.items():
+        series = sorted((etiquetas, valor) for (n, etiquetas), valor in totales.items() if n == nombre)
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        for etiquetas, valor in series:
+            if tipo == 'histogram':
+                for limite, cuenta in zip(buckets, valor['buckets']):
+                    lineas.append(f'{nombre}_bucket{_etiquetas_texto(etiquetas, [("le", limite)])} {cuenta}')
+                lineas.append(f'{nombre}_bucket{_etiquetas_texto(etiquetas, [("le", "+Inf")])} {valor["cuenta"]}')
+                lineas.append(f'{nombre}_sum{_etiquetas_texto(etiquetas)} {valor["suma"]}')
+                lineas.append(f'{nombre}_count{_etiquetas_texto(etiquetas)} {valor["cuenta"]}')
+            else:
+                lineas.append(f'{nombre}{_etiquetas_texto(etiquetas)} {valor}')
+    return '\n'.join(lineas) + '\n'
+
+
+# ==============================================================================
+# 3. Recolección: middleware, exportaciones e inicios de sesión
+# ==============================================================================
+
+class ContadorConsultas:
+    """execute_wrapper mínimo: solo cuenta consultas."""
+
+    def __init__(self):
+        self.cantidad = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.cantidad += 1
+        return execute(sql, params, many, context)
+
+
+def _nombre_vista(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match and match.view_name else 'sin_ruta'
+
+
+class MetricasMiddleware:
+    """
+    Registra latencia, estado y consultas SQL de cada petición por nombre de URL.
+    Funciona en modo WSGI y ASGI (en ASGI no se cuentan las consultas, porque el
+    ORM asíncrono las ejecuta en otro hilo).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.modo_async = iscoroutinefunction(get_response)
+        if self.modo_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.modo_async:
+            return self.__acall__(request)
+
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with connections['default'].execute_wrapper(contador):
+            response = self.get_response(request)
+        self._registrar(request, response, time.perf_counter() - inicio, contador.cantidad)
+        return response
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        response = await self.get_response(request)
+        self._registrar(request, response, time.perf_counter() - inicio, None)
+        return response
+
+    @staticmethod
+    def _registrar(request, response, duracion, consultas):
+        vista = _nombre_vista(request)
+        metricas = registro()
+        metricas.incrementar(
+            'inventario_http_peticiones_total', vista=vista, metodo=request.method, estado=response.status_code,
+        )
+        metricas.observar('inventario_http_duracion_segundos', duracion, vista=vista)
+        if consultas is not None:
+            metricas.observar('inventario_db_consultas_por_peticion', consultas, vista=vista)
+
+
+def _registrar_exportacion(formato, inicio, response):
+    if not settings.METRICAS or response.status_code != 200:
+        return
+    metricas = registro()
+    if response.streaming:
+        # El tamaño y la duración se conocen cuando termina el envío
+        response.streaming_content = _medir_stream(formato, inicio, response.streaming_content, response.is_async)
+        return
+    metricas.observar('inventario_exportacion_duracion_segundos', time.perf_counter() - inicio, formato=formato)
+    metricas.observar('inventario_exportacion_bytes', len(response.content), formato=formato)
+
+
+def _medir_stream(formato, inicio, contenido, asincrono):
+    def registrar(total):
+        metricas = registro()
+        metricas.observar('inventario_exportacion_duracion_segundos', time.perf_counter() - inicio, formato=formato)
+        metricas.observar('inventario_exportacion_bytes', total, formato=formato)
+
+    if asincrono:
+        async def envolver_async():
+            total = 0
+            async for bloque in contenido:
+                total += len(bloque)
+                yield bloque
+            registrar(total)
+        return envolver_async()
+
+    def envolver():
+        total = 0
+        for bloque in contenido:
+            total += len(bloque)
+            yield bloque
+        registrar(total)
+    return envolver()
+
+
+def medir_exportacion(formato):
+    """Decorador para vistas de exportación (síncronas o asíncronas)."""
+    def decorador(vista):
+        if iscoroutinefunction(vista):
+            @functools.wraps(vista)
+            async def envoltura_async(request, *args, **kwargs):
+                inicio = time.perf_counter()
+                response = await vista(request, *args, **kwargs)
+                _registrar_exportacion(formato, inicio, response)
+                return response
+            return envoltura_async
+
+        @functools.wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            inicio = time.perf_counter()
+            response = vista(request, *args, **kwargs)
+            _registrar_exportacion(formato, inicio, response)
+            return response
+        return envoltura
+    return decorador
+
+
+@receiver(user_logged_in)
+def contar_login_exitoso(sender, **kwargs):
+    if settings.METRICAS:
+        registro().incrementar('inventario_login_total', resultado='exito')
+
+
+@receiver(user_login_failed)
+def contar_login_fallido(sender, **kwargs):
+    if settings.METRICAS:
+        registro().incrementar('inventario_login_total', resultado='fallo')
+
+
+# ==============================================================================
+# 4. Endpoint /metrics
+# ==============================================================================
+
+def _es_local(request):
+    # ngrok (y cualquier proxy) se conecta desde 127.0.0.1 pero añade
+    # X-Forwarded-For: esas peticiones NO se consideran locales.
+    if 'HTTP_X_FORWARDED_FOR' in request.META:
+        return False
+    return request.META.get('REMOTE_ADDR') in ('127.0.0.1', '::1')
+
+
+def vista_metricas(request):
+    """Expone las métricas agregadas de todos los procesos (solo staff o localhost)."""
+    if not (_es_local(request) or (request.user.is_authenticated and request.user.is_staff)):
+        return HttpResponseForbidden('Acceso restringido.')
+
+    registro().volcar()
+    contenido = formato_texto(leer_totales(settings.METRICAS_DIR))
+    return HttpResponse(contenido, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,132 @@
+# inventario_tecnologico/perfilamiento.py
+"""
+Middleware opcional de perfilamiento por petición (PERFILAMIENTO=True en el .env).
+
+Por cada petición mide:
+- número y tiempo total de consultas SQL,
+- consultas repetidas (misma "huella" con distintos parámetros: típico N+1),
+- tiempo de renderizado de la plantilla,
+- tiempo total.
+
+Los resultados se envían en el encabezado Server-Timing (visible en las
+herramientas de desarrollo del navegador) y como una línea JSON en el logger
+'inventario_tecnologico.perfilamiento'. Si la vista supera el presupuesto de
+consultas o repite una consulta demasiadas veces se registra un WARNING.
+
+Nota: es un middleware síncrono; en modo ASGI fuerza a Django a ejecutar las
+vistas en un hilo, así que solo conviene activarlo para diagnosticar.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Literales que se reemplazan para agrupar consultas equivalentes
+_PATRON_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_PATRON_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PATRON_LISTAS = re.compile(r'\((?:\s*(?:%s|\?|\d+)\s*,)+\s*(?:%s|\?|\d+)\s*\)')
+_PATRON_ESPACIOS = re.compile(r'\s+')
+
+
+def huella_sql(sql):
+    """Normaliza una consulta para detectar repeticiones (sin literales ni listas IN)."""
+    sql = _PATRON_CADENAS.sub('?', sql)
+    sql = _PATRON_LISTAS.sub('(...)', sql)
+    sql = _PATRON_NUMEROS.sub('?', sql)
+    return _PATRON_ESPACIOS.sub(' ', sql).strip()
+
+
+class RegistroConsultas:
+    """execute_wrapper que acumula cantidad, tiempo y huellas de las consultas."""
+
+    def __init__(self):
+        self.cantidad = 0
+        self.tiempo = 0.0
+        self.huellas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += time.perf_counter() - inicio
+            self.cantidad += 1
+            self.huellas[huella_sql(sql)] += 1
+
+    def repetidas(self, minimo):
+        """Huellas ejecutadas al menos 'minimo' veces, de mayor a menor."""
+        return [(huella, veces) for huella, veces in self.huellas.most_common() if veces >= minimo]
+
+
+class PerfilamientoMiddleware:
+    """
+    Mide cada petición y publica los tiempos en Server-Timing y en el log.
+    Se desactiva solo (MiddlewareNotUsed) si PERFILAMIENTO no está activo.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERFILAMIENTO:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.max_consultas = settings.PERFILAMIENTO_MAX_CONSULTAS
+        self.max_repetidas = settings.PERFILAMIENTO_MAX_REPETIDAS
+
+    def __call__(self, request):
+        registro = RegistroConsultas()
+        request._perfil_plantilla = 0.0
+
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(registro))
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        self._publicar(request, response, registro, total)
+        return response
+
+    def process_template_response(self, request, response):
+        """Marca el inicio del renderizado; el callback marca el final."""
+        inicio = time.perf_counter()
+
+        def fin_renderizado(respuesta):
+            request._perfil_plantilla += time.perf_counter() - inicio
+
+        response.add_post_render_callback(fin_renderizado)
+        return response
+
+    def _publicar(self, request, response, registro, total):
+        match = getattr(request, 'resolver_match', None)
+        vista = match.view_name if match else None
+        repetidas = registro.repetidas(self.max_repetidas)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={registro.tiempo * 1000:.1f};desc="{registro.cantidad} consultas"',
+            f'tpl;dur={request._perfil_plantilla * 1000:.1f};desc="plantilla"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+        datos = {
+            'vista': vista,
+            'metodo': request.method,
+            'ruta': request.path,
+            'estado': response.status_code,
+            'consultas': registro.cantidad,
+            'sql_ms': round(registro.tiempo * 1000, 1),
+            'plantilla_ms': round(request._perfil_plantilla * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+            'repetidas': [{'sql': huella[:300], 'veces': veces} for huella, veces in repetidas[:5]],
+        }
+
+        if registro.cantidad > self.max_consultas or repetidas:
+            logger.warning('Presupuesto de consultas excedido: %s', json.dumps(datos, ensure_ascii=False))
+        else:
+            logger.info('Perfil: %s', json.dumps(datos, ensure_ascii=False))
@@ -0,0 +1,162 @@
+# inventario_tecnologico/replica.py
+"""
+Réplica de lectura opcional (DB_REPLICA_HOST en el .env) para el tráfico de
+consulta: dashboard, lista, exportaciones, API JSON y listados del admin.
+
+- ReplicaMiddleware decide al inicio de cada petición si sus lecturas van a
+  la réplica: solo GET/HEAD de las vistas de settings.REPLICA_VISTAS. El
+  resto de las vistas, y todas las escrituras, usan 'default'.
+- ReplicaRouter aplica esa decisión a cada consulta. Dentro de una
+  transacción (select_for_update, stock...) siempre se lee de 'default'.
+- Adherencia: cada escritura marca la caché compartida durante
+  REPLICA_ADHERENCIA segundos, y mientras tanto nadie lee de la réplica.
+  Así quien acaba de guardar ve su cambio aunque la réplica vaya atrasada, y
+  los valores cacheados por version_datos() (filtros del admin, ETags de la
+  lista) no se calculan con datos anteriores a la versión que llevan.
+
+Para probarlo en local con dos bases PostgreSQL (la réplica como copia):
+
+    createdb -T inventario inventario_replica
+    DB_REPLICA_HOST=localhost DB_REPLICA_NAME=inventario_replica python serve.py
+
+En los tests la réplica es un espejo de 'default' (TEST MIRROR).
+"""
+import contextvars
+import time
+from fnmatch import fnmatch
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import Resolver404, resolve
+
+ALIAS = 'replica'
+CLAVE_ESCRITURA = 'replica:escritura_reciente'
+# Apps que nunca se leen de la réplica ni marcan escrituras (la sesión recién creada al iniciar sesión)
+APPS_PRIMARIA = {'sessions'}
+
+_destino = contextvars.ContextVar('destino_lecturas', default=None)
+_ultima_marca = 0.0  # Para no escribir la marca en la caché en cada save() de un lote
+
+
+def escritura_reciente():
+    return cache.get(CLAVE_ESCRITURA) is not None
+
+
+def registrar_escritura():
+    """Lo que quede de la petición y, por REPLICA_ADHERENCIA segundos, todos leen de 'default'."""
+    global _ultima_marca
+    _destino.set(None)
+    ahora = time.monotonic()
+    if ahora - _ultima_marca >= 1:
+        cache.set(CLAVE_ESCRITURA, True, settings.REPLICA_ADHERENCIA)
+        _ultima_marca = ahora
+
+
+def destino_lecturas(request):
+    """ALIAS si las lecturas de la petición pueden ir a la réplica, si no None."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    try:
+        vista = resolve(request.path_info).view_name
+    except Resolver404:
+        return None
+    if not any(fnmatch(vista, patron) for patron in settings.REPLICA_VISTAS):
+        return None
+    return None if escritura_reciente() else ALIAS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            _destino.get() == ALIAS
+            and model._meta.app_label not in APPS_PRIMARIA
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in APPS_PRIMARIA:
+            registrar_escritura()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Misma base de datos replicada
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+# ==============================================================================
+# Middleware
+# ==============================================================================
+
+# El servidor consume el contenido fuera del middleware: el destino se fija
+# mientras se genera (con set y no reset, que falla si el servidor cierra el
+# generador desde otro contexto)
+
+def _sync_en_replica(contenido):
+    anterior = _destino.set(ALIAS).old_value
+    try:
+        yield from contenido
+    finally:
+        _destino.set(None if anterior is contextvars.Token.MISSING else anterior)
+
+
+async def _async_en_replica(contenido):
+    anterior = _destino.set(ALIAS).old_value
+    try:
+        async for parte in contenido:
+            yield parte
+    finally:
+        _destino.set(None if anterior is contextvars.Token.MISSING else anterior)
+
+
+class ReplicaMiddleware:
+    """
+    Fija el destino de las lecturas de la petición (ver destino_lecturas).
+    Las respuestas en streaming (exportación JSON) se generan después de que
+    la vista retorna, así que su contenido se envuelve para seguir leyendo de
+    la réplica. Funciona en modo WSGI y ASGI; sin réplica configurada se desactiva.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if ALIAS not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.modo_async = iscoroutinefunction(get_response)
+        if self.modo_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.modo_async:
+            return self.__acall__(request)
+        token = _destino.set(destino_lecturas(request))
+        try:
+            response = self.get_response(request)
+            return self._streaming(response)
+        finally:
+            _destino.reset(token)
+
+    async def __acall__(self, request):
+        token = _destino.set(destino_lecturas(request))
+        try:
+            response = await self.get_response(request)
+            return self._streaming(response)
+        finally:
+            _destino.reset(token)
+
+    @staticmethod
+    def _streaming(response):
+        # Solo si la petición leía de la réplica y no escribió nada mientras tanto
+        if response.streaming and _destino.get() == ALIAS:
+            if response.is_async:
+                response.streaming_content = _async_en_replica(response.streaming_content)
+            else:
+                response.streaming_content = _sync_en_replica(response.streaming_content)
+        return response
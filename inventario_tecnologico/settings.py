@@ -66,6 +66,14 @@ INSTALLED_APPS = [
 # ==============================================================================
 
 MIDDLEWARE = [
+    # Id de la petición (X-Request-ID) para los registros de log
+    'inventario_tecnologico.bitacora.PeticionIdMiddleware',
+    # Lecturas de consulta en la réplica (se desactiva solo si no hay DB_REPLICA_HOST)
+    'inventario_tecnologico.replica.ReplicaMiddleware',
+    # Métricas por vista para /metrics (METRICAS=False lo desactiva)
+    'inventario_tecnologico.metricas.MetricasMiddleware',
+    # Perfilamiento opcional (se desactiva solo si PERFILAMIENTO no es True)
+    'inventario_tecnologico.perfilamiento.PerfilamientoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,6 +85,20 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'inventario_tecnologico.urls'
 
+# Perfilamiento por petición: Server-Timing + log estructurado (ver perfilamiento.py).
+# Se alerta si una vista supera MAX_CONSULTAS o repite la misma consulta MAX_REPETIDAS veces.
+PERFILAMIENTO = os.environ.get('PERFILAMIENTO') == 'True'
+PERFILAMIENTO_MAX_CONSULTAS = int(os.environ.get('PERFILAMIENTO_MAX_CONSULTAS', '20'))
+PERFILAMIENTO_MAX_REPETIDAS = int(os.environ.get('PERFILAMIENTO_MAX_REPETIDAS', '5'))
+
+# Métricas en formato Prometheus (ver metricas.py). Cada proceso suma sus
+# valores al total en METRICAS_DIR cada METRICAS_INTERVALO segundos y al salir.
+# Las pruebas usan un directorio temporal (TEST_RUNNER, ver inventario/testing.py).
+METRICAS = os.environ.get('METRICAS', 'True') == 'True'
+METRICAS_DIR = os.environ.get('METRICAS_DIR', str(BASE_DIR / 'metricas'))
+METRICAS_INTERVALO = float(os.environ.get('METRICAS_INTERVALO', '5'))
+TEST_RUNNER = 'inventario.testing.EjecutorPruebas'
+
 # ==============================================================================
 # TEMPLATES
 # ==============================================================================
@@ -100,11 +122,25 @@ TEMPLATES = [
 WSGI_APPLICATION = 'inventario_tecnologico.wsgi.application'
 ASGI_APPLICATION = 'inventario_tecnologico.asgi.application'
 
+# Modo ASGI: activa las versiones asíncronas del dashboard, la lista y las
+# exportaciones. Usar junto con un servidor ASGI (ver serve_asgi.py).
+MODO_ASGI = os.environ.get('MODO_ASGI') == 'True'
+
 
 # ==============================================================================
 # BASE DE DATOS 
 # ==============================================================================
 
+# Conexiones persistentes: segundos que se reutiliza una conexión entre peticiones
+# (0 = abrir y cerrar en cada petición, "None" = sin límite).
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '60')
+DB_CONN_MAX_AGE = None if DB_CONN_MAX_AGE == 'None' else int(DB_CONN_MAX_AGE)
+
+# Pool de conexiones de psycopg 3 (requiere psycopg[pool]). Recomendado en modo
+# ASGI, donde las conexiones persistentes por hilo no se reutilizan bien.
+# Con el pool activo Django exige CONN_MAX_AGE = 0 (el pool ya las conserva).
+DB_POOL = os.environ.get('DB_POOL') == 'True'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -113,9 +149,52 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+        # Verifica que la conexión reutilizada siga viva antes de usarla
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {},
     }
 }
 
+if DB_POOL:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN', '2')),
+        'max_size': int(os.environ.get('DB_POOL_MAX', '10')),
+        'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+    }
+
+# Réplica de lectura opcional (ver inventario_tecnologico/replica.py). Los
+# datos que no se indiquen se toman de la base principal.
+DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': DB_REPLICA_HOST,
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': {**DATABASES['default']['OPTIONS']},
+        # En los tests la réplica es la misma base de prueba que 'default'
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['inventario_tecnologico.replica.ReplicaRouter']
+
+# Segundos después de una escritura en los que nadie lee de la réplica (su atraso tolerado)
+REPLICA_ADHERENCIA = int(os.environ.get('DB_REPLICA_ADHERENCIA', '10'))
+
+# Vistas (nombre de URL, admite comodines) cuyas lecturas GET van a la réplica.
+# 'exportacion:sincronizar' no: su cursor da por vistos los cambios de hace más
+# de unos segundos, y con una réplica atrasada los saltaría para siempre.
+REPLICA_VISTAS = [
+    'inventario:dashboard',
+    'inventario:lista_inventario',
+    'exportacion:opciones_exportacion',
+    'exportacion:exportar_*',
+    'admin:*_changelist',
+]
+
 
 # ==============================================================================
 # AUTENTICACIÓN
@@ -162,6 +241,55 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# En producción los estáticos se publican con nombres "hasheados" (manifest) y
+# variantes .gz/.br precomprimidas, generadas al ejecutar collectstatic.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'inventario_tecnologico.storage.ManifestComprimidoStorage'
+        ),
+    },
+}
+
+# Tiempo de caché (segundos) para estáticos sin hash y archivos media.
+# Los estáticos con hash en el nombre siempre se cachean un año (immutable).
+# Ver inventario_tecnologico/archivos.py (capa WSGI que sirve ambos).
+STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 60 * 60))
+MEDIA_MAX_AGE = int(os.environ.get('MEDIA_MAX_AGE', 60 * 60 * 24))
+
+# ==============================================================================
+# CACHÉ
+# ==============================================================================
+
+# Caché en archivos: la comparten todos los procesos del servidor (waitress,
+# uvicorn con varios workers), a diferencia de la caché en memoria por defecto.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / 'cache')),
+        'TIMEOUT': 600,
+    },
+}
+
+# Admin de Elemento (ver inventario/admin.py): segundos que se guardan los valores
+# de los filtros laterales y a partir de cuántas filas se usa el conteo estimado
+# de PostgreSQL (pg_class) en lugar de COUNT(*).
+ADMIN_FILTROS_CACHE = int(os.environ.get('ADMIN_FILTROS_CACHE', '600'))
+ADMIN_CONTEO_ESTIMADO_DESDE = int(os.environ.get('ADMIN_CONTEO_ESTIMADO_DESDE', '100000'))
+
+# Meses sin cambios tras los que un elemento de baja pasa al archivo
+# (comando 'archivar_bajas', ver inventario/archivo.py)
+ARCHIVO_MESES = int(os.environ.get('ARCHIVO_MESES', '12'))
+
+# Etiquetas (ver exportacion/etiquetas.py): dibujos de códigos que cada proceso
+# guarda en memoria para reimprimir sin volver a codificar (unos pocos KB cada
+# uno). Conviene que supere el lote de etiquetas que se imprime habitualmente.
+ETIQUETAS_MAX_DIBUJOS = int(os.environ.get('ETIQUETAS_MAX_DIBUJOS', '5000'))
+
 # ==============================================================================
 # MISC
 # ==============================================================================
@@ -175,14 +303,22 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Los handlers del logger raíz se atienden en un hilo aparte (ver bitacora.py)
+LOGGING_CONFIG = 'inventario_tecnologico.bitacora.configurar_logging'
+# Líneas JSON en el archivo de log en lugar de texto
+LOG_JSON = os.environ.get('LOG_JSON') == 'True'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} [{id_peticion}] {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'inventario_tecnologico.bitacora.FormatoJSON',
+        },
     },
     'handlers': {
         'console': {
@@ -190,15 +326,21 @@ LOGGING = {
         },
         'file': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'inventario_tecnologico.bitacora.ArchivoRotativo',
             'filename': LOGS_DIR / 'django.log',
             'maxBytes': 1024 * 1024 * 5,
             'backupCount': 5,
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_JSON else 'verbose',
         },
     },
     'root': {
         'handlers': ['console', 'file'],
         'level': 'INFO',
     },
+    'loggers': {
+        # Líneas JSON del middleware de perfilamiento (usa los handlers de root)
+        'inventario_tecnologico.perfilamiento': {
+            'level': 'INFO',
+        },
+    },
 }
@@ -0,0 +1,76 @@
+# inventario_tecnologico/storage.py
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se generan variantes .gz
+    brotli = None
+
+
+class ManifestComprimidoStorage(ManifestStaticFilesStorage):
+    """
+    Almacenamiento de estáticos con nombres "hasheados" (manifest) que, al
+    terminar collectstatic, genera variantes precomprimidas (.gz y .br) de los
+    archivos de texto. La capa WSGI de 'archivos.py' sirve esas variantes
+    directamente según el encabezado Accept-Encoding del navegador.
+    """
+    # Si falta una entrada en el manifest se usa el nombre original en lugar de
+    # lanzar un error (ej. imágenes de ejemplo que aún no existen en /static).
+    manifest_strict = False
+
+    # Extensiones que vale la pena comprimir (las imágenes ya vienen comprimidas)
+    extensiones_comprimibles = (
+        '.css', '.js', '.mjs', '.map', '.json', '.svg', '.html', '.txt', '.xml', '.ico',
+    )
+
+    # Solo se guarda la variante si ahorra al menos este porcentaje
+    ahorro_minimo = 0.05
+
+    def hashed_name(self, name, content=None, filename=None):
+        # Sin manifest_strict, un archivo que no existe en disco tampoco debe
+        # romper la plantilla: se devuelve el nombre sin hash.
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if self.manifest_strict:
+                raise
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+        if dry_run:
+            return
+
+        for raiz, _carpetas, archivos in os.walk(self.location):
+            for nombre in archivos:
+                if nombre.endswith(self.extensiones_comprimibles):
+                    self.comprimir_archivo(os.path.join(raiz, nombre))
+
+    def comprimir_archivo(self, ruta):
+        """Genera 'ruta.gz' (y 'ruta.br' si brotli está instalado) cuando conviene."""
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+
+        if not contenido:
+            return
+
+        variantes = [('.gz', lambda datos: gzip.compress(datos, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variantes.append(('.br', lambda datos: brotli.compress(datos, quality=11)))
+
+        for sufijo, comprimir in variantes:
+            destino = ruta + sufijo
+            # Evita recomprimir si la variante ya está al día
+            if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(ruta):
+                continue
+
+            comprimido = comprimir(contenido)
+            if len(comprimido) > len(contenido) * (1 - self.ahorro_minimo):
+                continue
+
+            with open(destino, 'wb') as archivo:
+                archivo.write(comprimido)
@@ -4,6 +4,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from .metricas import vista_metricas
 # Importamos una vista genérica para el dashboard si no la tenemos en inventario.
 # Si tienes una vista específica para el inicio, puedes importarla aquí. 
 # Por ahora, asumiremos que el home principal lo maneja 'inventario'.
@@ -12,6 +13,9 @@ urlpatterns = [
     # Ruta de administración de Django
     path('admin/', admin.site.urls),
 
+    # Métricas para Prometheus (solo staff o localhost)
+    path('metrics', vista_metricas, name='metricas'),
+
     # Rutas para la gestión de usuarios (registro, login, perfil)
     path('usuarios/', include('usuarios.urls')),
     
@@ -28,6 +32,7 @@ urlpatterns = [
 ]
 
 # Configuración para servir archivos subidos (MEDIA) en modo de desarrollo.
-# Esto es necesario para que las imágenes de productos se muestren correctamente.
+# En producción (y con waitress) los sirve la capa WSGI de 'archivos.py' antes
+# de llegar a Django; esta ruta solo aplica si se usa otra aplicación WSGI.
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -3,6 +3,9 @@ WSGI config for inventario_tecnologico project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+La aplicación de Django se envuelve con ``ArchivosWSGI`` para que los archivos
+estáticos y media se sirvan sin pasar por el stack de vistas.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
@@ -14,3 +17,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventario_tecnologico.settings')
 
 application = get_wsgi_application()
+
+# Se importa después de configurar Django porque lee settings al crearse.
+from inventario_tecnologico.archivos import ArchivosWSGI  # noqa: E402
+
+application = ArchivosWSGI(application)
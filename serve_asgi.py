@@ -0,0 +1,19 @@
+import os
+import uvicorn
+
+# Activa las vistas asíncronas (dashboard, lista y exportaciones)
+os.environ.setdefault("MODO_ASGI", "True")
+
+if __name__ == "__main__":
+    print(f"Servidor ASGI corriendo en:")
+    print(f" 👉 http://127.0.0.1:8080 (solo este PC)")
+    print(f" 👉 http://192.168.1.16:8080 (desde tu red local 🚀)")
+
+    # Un solo proceso atiende muchos clientes lentos (ej. vía ngrok) con corrutinas
+    uvicorn.run(
+        "inventario_tecnologico.asgi:application",
+        host="0.0.0.0",
+        port=8080,
+        workers=int(os.environ.get("ASGI_WORKERS", "1")),
+        proxy_headers=True,
+    )
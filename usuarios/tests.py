@@ -1,3 +1,29 @@
+# usuarios/tests.py
 from django.test import TestCase
 
-# Create your tests here.
+from inventario.testing import PresupuestoConsultasMixin
+
+from .models import Usuario
+
+
+class PresupuestoConsultasUsuariosTests(PresupuestoConsultasMixin, TestCase):
+    """Número máximo de consultas de las vistas de usuarios."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario_inventario = Usuario.objects.create_superuser('admin@prueba.co', 'clave-prueba')
+        Usuario.objects.bulk_create([
+            Usuario(email=f'usuario{i}@prueba.co', nombre='Usuario', apellido=str(i), is_approved=True)
+            for i in range(20)
+        ])
+
+    def test_login(self):
+        self.assertPresupuestoConsultas('usuarios:login')
+
+    def test_perfil(self):
+        self.client.force_login(self.usuario_inventario)
+        self.assertPresupuestoConsultas('usuarios:perfil', args=[self.usuario_inventario.pk])
+
+    def test_admin_changelist(self):
+        self.client.force_login(self.usuario_inventario)
+        self.assertPresupuestoConsultas('admin:usuarios_usuario_changelist')